@@ -0,0 +1,26 @@
+"""Add image_variants to products
+
+Revision ID: 5b2e9c41d7a3
+Revises: ff5d6a52c4f0
+Create Date: 2026-10-19 09:12:31.418205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2e9c41d7a3'
+down_revision: Union[str, None] = 'ff5d6a52c4f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('products', sa.Column('image_variants', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('products', 'image_variants')
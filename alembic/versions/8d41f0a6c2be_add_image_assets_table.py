@@ -0,0 +1,40 @@
+"""Add image_assets table
+
+Revision ID: 8d41f0a6c2be
+Revises: 5b2e9c41d7a3
+Create Date: 2026-10-19 10:03:54.902117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d41f0a6c2be'
+down_revision: Union[str, None] = '5b2e9c41d7a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('image_assets',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('url', sa.String(), nullable=False),
+    sa.Column('variants', sa.JSON(), nullable=True),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_image_assets_id'), 'image_assets', ['id'], unique=False)
+    op.create_index(op.f('ix_image_assets_content_hash'), 'image_assets', ['content_hash'], unique=True)
+    op.create_index(op.f('ix_image_assets_url'), 'image_assets', ['url'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_image_assets_url'), table_name='image_assets')
+    op.drop_index(op.f('ix_image_assets_content_hash'), table_name='image_assets')
+    op.drop_index(op.f('ix_image_assets_id'), table_name='image_assets')
+    op.drop_table('image_assets')
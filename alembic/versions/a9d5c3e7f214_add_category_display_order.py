@@ -0,0 +1,38 @@
+"""Add category display_order
+
+Revision ID: a9d5c3e7f214
+Revises: e4f2b8a9d017
+Create Date: 2026-10-19 13:08:32.640158
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9d5c3e7f214'
+down_revision: Union[str, None] = 'e4f2b8a9d017'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('categories', sa.Column('display_order', sa.Integer(), server_default='0', nullable=False))
+
+    # Keep today's (insertion) order among siblings
+    op.execute("""
+        UPDATE categories SET display_order = ranked.position
+        FROM (
+            SELECT id, row_number() OVER (PARTITION BY parent_id ORDER BY id) - 1 AS position
+            FROM categories
+        ) AS ranked
+        WHERE ranked.id = categories.id
+    """)
+    op.create_index('ix_categories_parent_display_order', 'categories', ['parent_id', 'display_order'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_categories_parent_display_order', table_name='categories')
+    op.drop_column('categories', 'display_order')
@@ -0,0 +1,36 @@
+"""Widen product listing indexes
+
+Revision ID: b3e81f4c9a62
+Revises: a9d5c3e7f214
+Create Date: 2026-10-19 15:21:44.902317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e81f4c9a62'
+down_revision: Union[str, None] = 'a9d5c3e7f214'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # id keeps the "column, id" sort in index order; the trailing filter columns let listings
+    # across a category subtree (category_id IN ...) be filtered inside the index
+    op.drop_index('ix_products_active_created', table_name='products')
+    op.drop_index('ix_products_active_price', table_name='products')
+    op.create_index('ix_products_active_price', 'products',
+                    ['is_active', 'price', 'id', 'category_id', 'stock_quantity'], unique=False)
+    op.create_index('ix_products_active_created', 'products',
+                    ['is_active', 'created_at', 'id', 'category_id', 'price', 'stock_quantity'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_active_created', table_name='products')
+    op.drop_index('ix_products_active_price', table_name='products')
+    op.create_index('ix_products_active_price', 'products', ['is_active', 'price'], unique=False)
+    op.create_index('ix_products_active_created', 'products', ['is_active', 'created_at'], unique=False)
@@ -0,0 +1,34 @@
+"""Add product listing indexes
+
+Revision ID: c7a93e15b8d2
+Revises: 8d41f0a6c2be
+Create Date: 2026-10-19 11:42:17.318406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7a93e15b8d2'
+down_revision: Union[str, None] = '8d41f0a6c2be'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_products_active_category_price', 'products', ['is_active', 'category_id', 'price'], unique=False)
+    op.create_index('ix_products_active_category_created', 'products', ['is_active', 'category_id', 'created_at'], unique=False)
+    op.create_index('ix_products_active_price', 'products', ['is_active', 'price'], unique=False)
+    op.create_index('ix_products_active_created', 'products', ['is_active', 'created_at'], unique=False)
+    op.create_index('ix_order_items_product_quantity', 'order_items', ['product_id', 'quantity'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_order_items_product_quantity', table_name='order_items')
+    op.drop_index('ix_products_active_created', table_name='products')
+    op.drop_index('ix_products_active_price', table_name='products')
+    op.drop_index('ix_products_active_category_created', table_name='products')
+    op.drop_index('ix_products_active_category_price', table_name='products')
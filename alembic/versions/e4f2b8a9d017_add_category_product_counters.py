@@ -0,0 +1,57 @@
+"""Add category product counters
+
+Revision ID: e4f2b8a9d017
+Revises: c7a93e15b8d2
+Create Date: 2026-10-19 12:26:51.770293
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4f2b8a9d017'
+down_revision: Union[str, None] = 'c7a93e15b8d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('categories', sa.Column('product_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('categories', sa.Column('active_product_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('categories', sa.Column('total_product_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('categories', sa.Column('total_active_product_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill: direct counts, then subtree totals via a recursive walk of the hierarchy
+    op.execute("""
+        UPDATE categories SET
+            product_count = (SELECT count(*) FROM products p WHERE p.category_id = categories.id),
+            active_product_count = (SELECT count(*) FROM products p WHERE p.category_id = categories.id AND p.is_active)
+    """)
+    op.execute("""
+        WITH RECURSIVE subtree(root_id, id) AS (
+            SELECT id, id FROM categories
+            UNION ALL
+            SELECT subtree.root_id, c.id FROM categories c JOIN subtree ON c.parent_id = subtree.id
+        ),
+        totals AS (
+            SELECT subtree.root_id AS id,
+                   sum(c.product_count) AS total,
+                   sum(c.active_product_count) AS total_active
+            FROM subtree JOIN categories c ON c.id = subtree.id
+            GROUP BY subtree.root_id
+        )
+        UPDATE categories SET
+            total_product_count = totals.total,
+            total_active_product_count = totals.total_active
+        FROM totals WHERE totals.id = categories.id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('categories', 'total_active_product_count')
+    op.drop_column('categories', 'total_product_count')
+    op.drop_column('categories', 'active_product_count')
+    op.drop_column('categories', 'product_count')
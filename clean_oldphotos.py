@@ -1,48 +1,212 @@
-# cleanup_orphans.py
+# clean_oldphotos.py
+"""
+Orphan image garbage collector across all image-bearing models.
+
+1. Collect every referenced image from Product, Category and HeroBanner (plus product
+   variants and the image_assets index) with streaming, column-only queries into one set.
+2. Diff that set against each storage backend: local static/images and a Cloudinary listing.
+   Backends are pluggable - anything with `name`, `list()` and `delete()` works.
+3. Delete orphans older than the grace period, in batches. Unreferenced image_assets rows
+   pointing at an orphan are deleted first, so store_image() never hands out a dead URL.
+
+Usage:
+    python clean_oldphotos.py [--dry-run] [--grace-hours 24] [--batch-size 100]
+                              [--skip-local] [--skip-cloudinary] [--prefix ecommerce/]
+"""
+import argparse
 import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import delete
 from sqlalchemy.orm import Session
 from database import SessionLocal
-from models import HeroBanner, Product
+from models import HeroBanner, Product, Category, ImageAsset
+from utils.cloudinary_config import public_id_from_url
+from utils.image_variants import iter_variant_urls
 
-def cleanup_orphans(model, image_field="image", image_dir="static/images"):
-    db: Session = SessionLocal()
+IMAGE_DIR = "static/images"
+IMAGE_MODELS = (Product, Category, HeroBanner)
+STREAM_BATCH = 1000
 
-    try:
-        # Get all image filenames in DB for the given model
-        db_files = set()
-        for obj in db.query(model).all():
-            img = getattr(obj, image_field, None)
-            if img:
-                db_files.add(os.path.basename(img))
-
-        # Get all files in static/images/
-        if not os.path.exists(image_dir):
-            print(f"{image_dir} does not exist")
-            return
 
-        all_files = set(os.listdir(image_dir))
+def image_key(url: str) -> str:
+    """Normalise a stored image reference to the key a storage backend lists (public_id or file name)."""
+    return public_id_from_url(url) or os.path.basename(url)
+
+
+def collect_referenced_images(db: Session) -> Set[str]:
+    """Stream image columns only (no ORM objects, no selectin relationships) into one set of keys."""
+    referenced: Set[str] = set()
+
+    for model in IMAGE_MODELS:
+        for (image,) in db.query(model.image).filter(model.image.isnot(None)).yield_per(STREAM_BATCH):
+            referenced.add(image_key(image))
+
+    for (variants,) in db.query(Product.image_variants).filter(Product.image_variants.isnot(None)).yield_per(STREAM_BATCH):
+        referenced.update(image_key(url) for url in iter_variant_urls(variants))
 
-        # Orphaned files = files on disk not in DB
-        orphaned_files = all_files - db_files
+    # Assets still counted as referenced, even if the referencing row is not an image column above
+    assets = db.query(ImageAsset.url, ImageAsset.variants).filter(ImageAsset.ref_count > 0).yield_per(STREAM_BATCH)
+    for url, variants in assets:
+        referenced.add(image_key(url))
+        referenced.update(image_key(v) for v in iter_variant_urls(variants))
 
-        if not orphaned_files:
-            print("✅ No orphaned images found.")
+    return referenced
+
+
+def collect_unreferenced_assets(db: Session) -> Dict[str, List[int]]:
+    """Map the key of every image_assets row with no references left to the ids of those rows."""
+    assets: Dict[str, List[int]] = {}
+    rows = db.query(ImageAsset.id, ImageAsset.url).filter(ImageAsset.ref_count == 0).yield_per(STREAM_BATCH)
+    for asset_id, url in rows:
+        assets.setdefault(image_key(url), []).append(asset_id)
+    return assets
+
+
+def drop_unreferenced_assets(db: Session, keys: List[str], assets: Dict[str, List[int]]) -> List[str]:
+    """
+    Delete the still-unreferenced image_assets rows for these orphan keys, before their files go.
+    Returns the keys that are safe to delete; a row that gained a reference since it was
+    collected (an upload reusing the same bytes) keeps its file.
+    """
+    ids = [asset_id for key in keys for asset_id in assets.get(key, ())]
+    if not ids:
+        return keys
+    deleted = set(db.execute(
+        delete(ImageAsset)
+        .where(ImageAsset.id.in_(ids), ImageAsset.ref_count == 0)
+        .returning(ImageAsset.id)
+        .execution_options(synchronize_session=False)
+    ).scalars())
+    db.commit()
+    return [key for key in keys if all(asset_id in deleted for asset_id in assets.get(key, ()))]
+
+
+class LocalImageStore:
+    name = "local"
+
+    def __init__(self, image_dir: str = IMAGE_DIR):
+        self.image_dir = image_dir
+
+    def list(self) -> Iterator[Tuple[str, datetime]]:
+        if not os.path.exists(self.image_dir):
+            print(f"{self.image_dir} does not exist")
             return
+        with os.scandir(self.image_dir) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    yield entry.name, datetime.fromtimestamp(entry.stat().st_mtime, tz=timezone.utc)
+
+    def delete(self, keys: List[str]):
+        for name in keys:
+            path = os.path.join(self.image_dir, name)
+            try:
+                os.remove(path)
+                print(f"🗑️ Deleted orphaned file: {path}")
+            except FileNotFoundError:
+                pass
 
-        # Delete orphaned files
-        for filename in orphaned_files:
-            file_path = os.path.join(image_dir, filename)
-            os.remove(file_path)
-            print(f"🗑️ Deleted orphaned file: {file_path}")
 
-        print("✅ Cleanup complete.")
+class CloudinaryImageStore:
+    name = "cloudinary"
 
+    def __init__(self, prefix: str = "ecommerce/"):
+        self.prefix = prefix
+
+    def list(self) -> Iterator[Tuple[str, datetime]]:
+        import cloudinary.api
+
+        cursor = None
+        while True:
+            page = cloudinary.api.resources(
+                type="upload", resource_type="image", prefix=self.prefix,
+                max_results=500, next_cursor=cursor,
+            )
+            for resource in page.get("resources", []):
+                created = datetime.fromisoformat(resource["created_at"].replace("Z", "+00:00"))
+                yield resource["public_id"], created
+            cursor = page.get("next_cursor")
+            if not cursor:
+                break
+
+    def delete(self, keys: List[str]):
+        from utils.cloudinary_config import delete_images_from_cloudinary
+
+        results = delete_images_from_cloudinary(keys)
+        for public_id, result in results.items():
+            print(f"🗑️ Cloudinary {public_id}: {result}")
+
+
+def find_orphans(store, referenced: Set[str], grace: timedelta) -> Tuple[List[str], int]:
+    """Return (orphan keys past the grace period, count of orphans still inside it)."""
+    cutoff = datetime.now(timezone.utc) - grace
+    orphans, too_new = [], 0
+    for key, modified_at in store.list():
+        if key in referenced:
+            continue
+        if modified_at > cutoff:
+            too_new += 1
+            continue
+        orphans.append(key)
+    return orphans, too_new
+
+
+def cleanup_orphans(
+    stores: Optional[Iterable] = None,
+    dry_run: bool = False,
+    grace_hours: float = 24,
+    batch_size: int = 100,
+):
+    stores = list(stores) if stores is not None else [LocalImageStore(), CloudinaryImageStore()]
+    grace = timedelta(hours=grace_hours)
+
+    db: Session = SessionLocal()
+    try:
+        _cleanup_stores(db, stores, dry_run, grace, batch_size)
     finally:
         db.close()
 
-        if __name__ == "__main__":
-            cleanup_orphans(Product)
+    print("✅ Cleanup complete." if not dry_run else "✅ Dry run complete, nothing deleted.")
+
+
+def _cleanup_stores(db: Session, stores: List, dry_run: bool, grace: timedelta, batch_size: int):
+    referenced = collect_referenced_images(db)
+    assets = collect_unreferenced_assets(db)
+    print(f"📚 {len(referenced)} images referenced in the database ({len(assets)} unreferenced assets)")
+
+    for store in stores:
+        orphans, too_new = find_orphans(store, referenced, grace)
+        if not orphans:
+            print(f"✅ [{store.name}] No orphaned images found ({too_new} within grace period).")
+            continue
+
+        print(f"🧹 [{store.name}] {len(orphans)} orphaned images ({too_new} within grace period skipped)")
+        if dry_run:
+            for key in orphans:
+                print(f"🔎 Would delete: {key}")
+            continue
+
+        for start in range(0, len(orphans), batch_size):
+            batch = drop_unreferenced_assets(db, orphans[start:start + batch_size], assets)
+            if batch:
+                store.delete(batch)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete images no row references any more")
+    parser.add_argument("--dry-run", action="store_true", help="Report orphans without deleting")
+    parser.add_argument("--grace-hours", type=float, default=24, help="Never delete files newer than this")
+    parser.add_argument("--batch-size", type=int, default=100, help="Deletes per batch")
+    parser.add_argument("--prefix", default="ecommerce/", help="Cloudinary public_id prefix to scan")
+    parser.add_argument("--skip-local", action="store_true")
+    parser.add_argument("--skip-cloudinary", action="store_true")
+    args = parser.parse_args()
+
+    selected = []
+    if not args.skip_local:
+        selected.append(LocalImageStore())
+    if not args.skip_cloudinary:
+        selected.append(CloudinaryImageStore(prefix=args.prefix))
 
-        # or be specific and write
-#         cleanup_orphans(Product, image_dir="static/images/products")
-# cleanup_orphans(HeroBanner, image_dir="static/images/banners")
\ No newline at end of file
+    cleanup_orphans(selected, dry_run=args.dry_run, grace_hours=args.grace_hours, batch_size=args.batch_size)
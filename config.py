@@ -38,4 +38,57 @@ class Settings:
     SMTP_HOST = os.getenv("SMTP_HOST")
     SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
 
+    # Cloudinary uploads - bounded worker pool + per-upload timeout (seconds)
+    CLOUDINARY_UPLOAD_WORKERS = int(os.getenv("CLOUDINARY_UPLOAD_WORKERS", 4))
+    CLOUDINARY_UPLOAD_TIMEOUT = float(os.getenv("CLOUDINARY_UPLOAD_TIMEOUT", 30))
+
+    # Background image deletion - retries with exponential backoff
+    DELETION_MAX_ATTEMPTS = int(os.getenv("DELETION_MAX_ATTEMPTS", 5))
+    DELETION_FLUSH_SECONDS = float(os.getenv("DELETION_FLUSH_SECONDS", 2))
+
+    # Uploads - hard cap on image size (bytes)
+    MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 10 * 1024 * 1024))
+    # Whole multipart request body (image + form fields), enforced before Starlette spools it
+    MAX_MULTIPART_BYTES = int(os.getenv("MAX_MULTIPART_BYTES", MAX_UPLOAD_BYTES + 1024 * 1024))
+
+    # On-demand resizing of local static images (/img)
+    IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", ".image_cache")
+    IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+    # Storefront fragment cache - max age (seconds) even without a detected write
+    STOREFRONT_CACHE_TTL = float(os.getenv("STOREFRONT_CACHE_TTL", 300))
+
+    # Conditional GET - ETags roll over at least this often (seconds) to bound cross-worker staleness
+    ETAG_TTL = int(os.getenv("ETAG_TTL", 300))
+
+    # Response compression (brotli when installed, else gzip)
+    COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", 1024))
+    COMPRESSION_THREAD_BYTES = int(os.getenv("COMPRESSION_THREAD_BYTES", 64 * 1024))  # larger bodies compress off the event loop
+    COMPRESSION_CACHE_MAX_BYTES = int(os.getenv("COMPRESSION_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+
+    # Static catalogue snapshots (static/catalog) republished after catalogue writes
+    CATALOG_PUBLISH_ENABLED = os.getenv("CATALOG_PUBLISH_ENABLED", "true").lower() == "true"
+
+    # Product detail cache (by id and slug) - entries dropped on product writes; TTL bounds cross-worker staleness
+    PRODUCT_CACHE_SIZE = int(os.getenv("PRODUCT_CACHE_SIZE", 2000))
+    PRODUCT_CACHE_TTL = float(os.getenv("PRODUCT_CACHE_TTL", 300))
+    # Optional stock overlay: re-read stock_quantity when older than this (seconds, 0 = off)
+    PRODUCT_STOCK_TTL = float(os.getenv("PRODUCT_STOCK_TTL", 0))
+
+    # Rate limiting - token bucket per client IP and route group, "<requests>/<seconds>"
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    # Only enable behind a proxy that appends to X-Forwarded-For; PROXY_HOPS = proxies in front of the app
+    RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "false").lower() == "true"
+    RATE_LIMIT_PROXY_HOPS = int(os.getenv("RATE_LIMIT_PROXY_HOPS", 1))
+    RATE_LIMIT_DEFAULT = os.getenv("RATE_LIMIT_DEFAULT", "120/60")
+    RATE_LIMIT_SEARCH = os.getenv("RATE_LIMIT_SEARCH", "30/60")
+    RATE_LIMIT_SUGGEST = os.getenv("RATE_LIMIT_SUGGEST", "300/60")  # /search/suggest - one call per keystroke
+    RATE_LIMIT_DELIVERY_STOPS = os.getenv("RATE_LIMIT_DELIVERY_STOPS", "30/60")
+    RATE_LIMIT_AUTH = os.getenv("RATE_LIMIT_AUTH", "10/60")
+    RATE_LIMIT_IMAGES = os.getenv("RATE_LIMIT_IMAGES", "600/60")  # /img - one page loads many srcset images
+
+    # Load shedding - reject with 503 once queueing delay passes the threshold
+    MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", 40))
+    MAX_QUEUE_WAIT_MS = int(os.getenv("MAX_QUEUE_WAIT_MS", 500))
+
 settings = Settings()
@@ -9,9 +9,19 @@ from models import Base
 from routers import (
     products, orders, auth, payments, categories,
     admin, admin_products, admin_orders, admin_banners, 
-    hero_banners, delivery_routes, admin_delivery_routes, admin_categories
+    hero_banners, delivery_routes, admin_delivery_routes, admin_categories, images,
+    storefront, search
 )
 from setup_database import seed_data
+from utils.rate_limit import RateLimitMiddleware, ConcurrencyLimitMiddleware, get_limiter_stats
+from utils.image_variants import shutdown_process_pool
+from services.deletion_queue import deletion_queue
+import services.category_counters  # registers the product counter flush hook
+from services.catalog_publisher import catalog_publisher, MANIFEST_PATH
+from config import settings
+from utils.conditional_get import ConditionalGetMiddleware
+from utils.compression import CompressionMiddleware
+from utils.uploads import UploadSizeLimitMiddleware
 
 # Environment
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
@@ -20,8 +30,12 @@ ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup - Alembic migrations handle table creation via start.sh
+    if settings.CATALOG_PUBLISH_ENABLED and not os.path.exists(MANIFEST_PATH):
+        catalog_publisher.schedule()
     yield
     # Shutdown (cleanup if needed)
+    shutdown_process_pool()
+    deletion_queue.stop()
 
 # CREATE APP WITH LIFESPAN
 app = FastAPI(
@@ -38,12 +52,22 @@ cors_origins = [
     if origin.strip()
 ]
 
+# Rate limiting + load shedding (added before CORS so 429/503 responses still get CORS headers)
+# Conditional GET sits inside rate limiting but outside the concurrency cap, so 304s never take a slot
+# Oversized uploads are refused before Starlette spools the multipart body
+app.add_middleware(UploadSizeLimitMiddleware)
+app.add_middleware(ConcurrencyLimitMiddleware)
+app.add_middleware(ConditionalGetMiddleware)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(RateLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=cors_origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count"],
 )
 
 # Static files
@@ -58,6 +82,9 @@ app.include_router(payments.router, prefix="/payments", tags=["Payments"])
 app.include_router(categories.router, prefix="/categories", tags=["Categories"])
 app.include_router(hero_banners.router, prefix="/hero-banners", tags=["HeroBanners"])
 app.include_router(delivery_routes.router, prefix="/delivery", tags=["DeliveryRoutes"])
+app.include_router(images.router, prefix="/img", tags=["Images"])
+app.include_router(storefront.router, prefix="/storefront", tags=["Storefront"])
+app.include_router(search.router, prefix="/search", tags=["Search"])
 
 # Admin routes
 app.include_router(admin.router, prefix="/admin", tags=["Admin"])
@@ -73,4 +100,12 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "environment": ENVIRONMENT, "database": "connected"}
\ No newline at end of file
+    return {"status": "healthy", "environment": ENVIRONMENT, "database": "connected"}
+
+@app.get("/health/limits")
+async def limiter_stats():
+    return get_limiter_stats()
+
+@app.get("/health/deletions")
+async def deletion_queue_stats():
+    return {**deletion_queue.stats, "pending": deletion_queue.pending()}
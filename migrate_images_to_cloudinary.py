@@ -1,140 +1,240 @@
+"""
+Migrate local static/images files to Cloudinary for every image-bearing model.
+
+- One generic pass over IMAGE_MODELS instead of a copy-pasted loop per model
+- Uploads run concurrently on a bounded worker pool; the DB is only touched from the main thread
+- Rows are committed in batches and a checkpoint file records committed rows, so a crash
+  loses at most one batch and a rerun resumes where it stopped
+- Uploads are content-addressed (see utils/image_store.py): identical files are uploaded once
+
+Usage:
+    python migrate_images_to_cloudinary.py [--dry-run] [--workers 8] [--batch-size 50]
+                                           [--checkpoint .image_migration.json] [--reset]
+"""
+import argparse
+import hashlib
+import json
 import os
-from sqlalchemy.orm import Session
-from database import engine, get_db
-from models import Product, HeroBanner, Category
-from utils.cloudinary_config import upload_image_to_cloudinary
-
-def migrate_existing_images():
-    db = next(get_db())
-    
-    print("🚀 Starting image migration to Cloudinary...")
-    
-    # Migrate Product images
-    products = db.query(Product).filter(Product.image.isnot(None)).all()
-    print(f"\n📦 Migrating {len(products)} product images...")
-    
-    for product in products:
-        if not product.image:
-            continue
-            
-        # Skip if already a Cloudinary URL
-        if "cloudinary.com" in product.image:
-            print(f"⏭️ Product '{product.name}' already migrated")
-            continue
-        
-        # Handle both "/static/images/file.jpg" and just "file.jpg"
-        if product.image.startswith("/static/images/"):
-            filename = product.image.replace("/static/images/", "")
-        elif product.image.startswith("static/images/"):
-            filename = product.image.replace("static/images/", "")
-        else:
-            filename = product.image  # Just the filename
-        
-        local_path = f"static/images/{filename}"
-        
-        if os.path.exists(local_path):
-            try:
-                with open(local_path, "rb") as f:
-                    file_content = f.read()
-                
-                cloudinary_url = upload_image_to_cloudinary(
-                    file_content,
-                    filename,
-                    folder="ecommerce/products"
-                )
-                
-                product.image = cloudinary_url
-                print(f"✅ Migrated product '{product.name}': {cloudinary_url}")
-            except Exception as e:
-                print(f"❌ Failed to migrate product '{product.name}': {str(e)}")
-        else:
-            print(f"⚠️ File not found for product '{product.name}': {local_path}")
-    
-    # Migrate Banner images
-    banners = db.query(HeroBanner).all()
-    print(f"\n🎨 Migrating {len(banners)} banner images...")
-    
-    for banner in banners:
-        if not banner.image:
-            continue
-            
-        # Skip if already a Cloudinary URL
-        if "cloudinary.com" in banner.image:
-            print(f"⏭️ Banner '{banner.title}' already migrated")
-            continue
-        
-        # Handle both "/static/images/file.jpg" and just "file.jpg"
-        if banner.image.startswith("/static/images/"):
-            filename = banner.image.replace("/static/images/", "")
-        elif banner.image.startswith("static/images/"):
-            filename = banner.image.replace("static/images/", "")
-        else:
-            filename = banner.image
-        
-        local_path = f"static/images/{filename}"
-        
-        if os.path.exists(local_path):
-            try:
-                with open(local_path, "rb") as f:
-                    file_content = f.read()
-                
-                cloudinary_url = upload_image_to_cloudinary(
-                    file_content,
-                    filename,
-                    folder="ecommerce/banners"
-                )
-                
-                banner.image = cloudinary_url
-                print(f"✅ Migrated banner '{banner.title}': {cloudinary_url}")
-            except Exception as e:
-                print(f"❌ Failed to migrate banner '{banner.title}': {str(e)}")
-        else:
-            print(f"⚠️ File not found for banner '{banner.title}': {local_path}")
-    
-    # Migrate Category images (if any)
-    categories = db.query(Category).filter(Category.image.isnot(None)).all()
-    print(f"\n📂 Migrating {len(categories)} category images...")
-    
-    for category in categories:
-        if not category.image:
-            continue
-            
-        # Skip if already a Cloudinary URL
-        if "cloudinary.com" in category.image:
-            print(f"⏭️ Category '{category.name}' already migrated")
-            continue
-        
-        # Handle both "/static/images/file.jpg" and just "file.jpg"
-        if category.image.startswith("/static/images/"):
-            filename = category.image.replace("/static/images/", "")
-        elif category.image.startswith("static/images/"):
-            filename = category.image.replace("static/images/", "")
-        else:
-            filename = category.image
-        
-        local_path = f"static/images/{filename}"
-        
-        if os.path.exists(local_path):
-            try:
-                with open(local_path, "rb") as f:
-                    file_content = f.read()
-                
-                cloudinary_url = upload_image_to_cloudinary(
-                    file_content,
-                    filename,
-                    folder="ecommerce/categories"
-                )
-                
-                category.image = cloudinary_url
-                print(f"✅ Migrated category '{category.name}': {cloudinary_url}")
-            except Exception as e:
-                print(f"❌ Failed to migrate category '{category.name}': {str(e)}")
-        else:
-            print(f"⚠️ File not found for category '{category.name}': {local_path}")
-    
-    db.commit()
-    print("\n✨ Migration complete!")
-    print("⚠️ IMPORTANT: Backup your database before deleting static/images folder")
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterator, Optional, Set, Tuple
+
+from database import SessionLocal
+from models import Product, HeroBanner, Category, ImageAsset
+
+IMAGE_DIR = "static/images"
+DEFAULT_CHECKPOINT = ".image_migration_checkpoint.json"
+
+# (model, label column, Cloudinary folder)
+IMAGE_MODELS = [
+    (Product, "name", "ecommerce/products"),
+    (HeroBanner, "title", "ecommerce/banners"),
+    (Category, "name", "ecommerce/categories"),
+]
+
+Uploader = Callable[[bytes, str, str], str]
+
+
+def default_uploader(content: bytes, filename: str, folder: str) -> str:
+    from utils.cloudinary_config import upload_image_to_cloudinary
+    return upload_image_to_cloudinary(content, filename, folder=folder)
+
+
+def local_path_for(image: str) -> str:
+    # Handle both "/static/images/file.jpg", "static/images/file.jpg" and just "file.jpg"
+    filename = image.lstrip("/")
+    if filename.startswith("static/images/"):
+        filename = filename[len("static/images/"):]
+    return os.path.join(IMAGE_DIR, filename)
+
+
+def load_checkpoint(path: str) -> Set[str]:
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        return set(json.load(f).get("done", []))
+
+
+def save_checkpoint(path: str, done: Set[str]):
+    # Write-then-rename so a crash mid-write never corrupts the checkpoint
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"done": sorted(done)}, f)
+    os.replace(tmp_path, path)
+
+
+class ImageMigrator:
+    def __init__(
+        self,
+        uploader: Uploader = default_uploader,
+        workers: int = 8,
+        batch_size: int = 50,
+        checkpoint_path: str = DEFAULT_CHECKPOINT,
+        dry_run: bool = False,
+        session_factory=SessionLocal,
+    ):
+        self.uploader = uploader
+        self.workers = workers
+        self.batch_size = batch_size
+        self.checkpoint_path = checkpoint_path
+        self.dry_run = dry_run
+        self.session_factory = session_factory
+
+        self.done = load_checkpoint(checkpoint_path)
+        self.known_hashes: Dict[str, str] = {}
+        self.hash_lock = threading.Lock()
+        self.stats = {"migrated": 0, "reused": 0, "missing": 0, "failed": 0, "skipped": 0, "bytes": 0}
+
+    def pending_rows(self, db) -> Iterator[Tuple[str, type, int, str, str, str]]:
+        """Yield (key, model, id, label, image, folder) for every row still pointing at a local file."""
+        for model, label_attr, folder in IMAGE_MODELS:
+            label_col = getattr(model, label_attr)
+            rows = (
+                db.query(model.id, label_col, model.image)
+                .filter(model.image.isnot(None), ~model.image.contains("cloudinary.com"))
+                .order_by(model.id)
+                .yield_per(500)
+            )
+            for row_id, label, image in rows:
+                key = f"{model.__tablename__}:{row_id}"
+                if key in self.done:
+                    self.stats["skipped"] += 1
+                    continue
+                yield key, model, row_id, label, image, folder
+
+    def upload_one(self, path: str, folder: str) -> Tuple[str, str, int, bool]:
+        """Worker: read, hash and upload one file. Returns (url, sha256, size, reused)."""
+        with open(path, "rb") as f:
+            content = f.read()
+        digest = hashlib.sha256(content).hexdigest()
+
+        with self.hash_lock:
+            existing = self.known_hashes.get(digest)
+        if existing:
+            return existing, digest, len(content), True
+
+        extension = os.path.splitext(path)[1] or ".img"
+        url = self.uploader(content, f"{digest}{extension}", folder)
+        with self.hash_lock:
+            self.known_hashes.setdefault(digest, url)
+        return url, digest, len(content), False
+
+    def record(self, db, model, row_id: int, url: str, digest: str):
+        db.query(model).filter(model.id == row_id).update({model.image: url}, synchronize_session=False)
+        asset = db.query(ImageAsset).filter(ImageAsset.content_hash == digest).first()
+        if asset is None:
+            asset = ImageAsset(content_hash=digest, url=url, ref_count=0)
+            db.add(asset)
+        asset.ref_count = (asset.ref_count or 0) + 1
+        db.flush()
+
+    def run(self):
+        db = self.session_factory()
+        started = time.monotonic()
+        uncommitted: Set[str] = set()
+
+        try:
+            self.known_hashes = dict(db.query(ImageAsset.content_hash, ImageAsset.url).all())
+
+            tasks = []
+            for key, model, row_id, label, image, folder in self.pending_rows(db):
+                path = local_path_for(image)
+                if not os.path.exists(path):
+                    self.stats["missing"] += 1
+                    print(f"⚠️ File not found for {model.__tablename__} '{label}': {path}")
+                    continue
+                tasks.append((key, model, row_id, label, path, folder))
+
+            print(f"🚀 {len(tasks)} images to migrate ({self.stats['skipped']} already done, "
+                  f"{self.stats['missing']} missing){' [dry run]' if self.dry_run else ''}")
+
+            if self.dry_run:
+                for key, model, row_id, label, path, folder in tasks:
+                    self.stats["bytes"] += os.path.getsize(path)
+                    print(f"🔎 Would migrate {model.__tablename__} '{label}': {path} -> {folder}")
+                return self.stats
+
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                futures = {
+                    pool.submit(self.upload_one, path, folder): (key, model, row_id, label)
+                    for key, model, row_id, label, path, folder in tasks
+                }
+                for future in as_completed(futures):
+                    key, model, row_id, label = futures[future]
+                    try:
+                        url, digest, size, reused = future.result()
+                    except Exception as e:
+                        self.stats["failed"] += 1
+                        print(f"❌ Failed to migrate {model.__tablename__} '{label}': {str(e)}")
+                        continue
+
+                    self.record(db, model, row_id, url, digest)
+                    self.stats["reused" if reused else "migrated"] += 1
+                    self.stats["bytes"] += size
+                    uncommitted.add(key)
+
+                    if len(uncommitted) >= self.batch_size:
+                        self.commit(db, uncommitted)
+                        self.report(started)
+
+            self.commit(db, uncommitted)
+            return self.stats
+        finally:
+            db.close()
+            self.report(started, final=True)
+
+    def commit(self, db, uncommitted: Set[str]):
+        if not uncommitted:
+            return
+        db.commit()
+        self.done |= uncommitted
+        save_checkpoint(self.checkpoint_path, self.done)
+        uncommitted.clear()
+
+    def report(self, started: float, final: bool = False):
+        elapsed = max(time.monotonic() - started, 1e-6)
+        processed = self.stats["migrated"] + self.stats["reused"]
+        megabytes = self.stats["bytes"] / (1024 * 1024)
+        prefix = "✨ Migration complete" if final else "📈 Progress"
+        print(f"{prefix}: {processed} images ({self.stats['reused']} deduplicated), "
+              f"{self.stats['failed']} failed, {megabytes:.1f} MB in {elapsed:.1f}s "
+              f"({processed / elapsed:.1f} img/s, {megabytes / elapsed:.2f} MB/s)")
+
+
+def migrate_existing_images(
+    uploader: Optional[Uploader] = None,
+    workers: int = 8,
+    batch_size: int = 50,
+    checkpoint_path: str = DEFAULT_CHECKPOINT,
+    dry_run: bool = False,
+):
+    migrator = ImageMigrator(
+        uploader=uploader or default_uploader,
+        workers=workers,
+        batch_size=batch_size,
+        checkpoint_path=checkpoint_path,
+        dry_run=dry_run,
+    )
+    return migrator.run()
+
 
 if __name__ == "__main__":
-    migrate_existing_images()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Migrate local images to Cloudinary")
+    parser.add_argument("--dry-run", action="store_true", help="List what would be migrated without uploading")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent uploads")
+    parser.add_argument("--batch-size", type=int, default=50, help="Rows per commit/checkpoint")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="Checkpoint file path")
+    parser.add_argument("--reset", action="store_true", help="Ignore and remove an existing checkpoint")
+    args = parser.parse_args()
+
+    if args.reset and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    migrate_existing_images(
+        workers=args.workers,
+        batch_size=args.batch_size,
+        checkpoint_path=args.checkpoint,
+        dry_run=args.dry_run,
+    )
+    print("⚠️ IMPORTANT: Backup your database before deleting static/images folder")
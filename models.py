@@ -7,9 +7,10 @@ Defines all database tables using SQLAlchemy ORM:
 - Order: Customer orders
 - OrderItem: Individual items in an order
 - Payment: Payment records
+- ImageAsset: Content-addressed image index (hash -> URL, ref counted)
 """
 
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Float, DateTime, Text, Enum
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Float, DateTime, Text, Enum, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -63,20 +64,33 @@ class Category(Base):
     icon = Column(String, nullable=True)
     parent_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
     is_active = Column(Boolean, default=True)
+    display_order = Column(Integer, nullable=False, default=0, server_default="0")  # position among siblings
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # Maintained by services/category_counters.py - direct products, and including all descendants
+    product_count = Column(Integer, nullable=False, default=0, server_default="0")
+    active_product_count = Column(Integer, nullable=False, default=0, server_default="0")
+    total_product_count = Column(Integer, nullable=False, default=0, server_default="0")
+    total_active_product_count = Column(Integer, nullable=False, default=0, server_default="0")
+
     # Self-referential relationships for hierarchy
     parent = relationship("Category", remote_side=[id], back_populates="subcategories")
     subcategories = relationship(
         "Category", 
         back_populates="parent", 
         cascade="all, delete-orphan",
-        lazy="selectin"  # Auto-load subcategories
+        lazy="selectin",  # Auto-load subcategories
+        order_by=[display_order, id]
     )
     
     # Products can be at any level
     products = relationship("Product", back_populates="category", lazy="selectin")
 
+    # Siblings in display order: WHERE parent_id = ? ORDER BY display_order
+    __table_args__ = (
+        Index("ix_categories_parent_display_order", "parent_id", "display_order"),
+    )
+
 
 class Product(Base):
     __tablename__ = "products"
@@ -89,6 +103,7 @@ class Product(Base):
     stock_quantity = Column(Integer, default=0) 
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
     image = Column(String, nullable=True)
+    image_variants = Column(JSON, nullable=True)  # responsive WebP/AVIF widths + blur placeholder
     is_active = Column(Boolean, default=True)
     is_featured = Column(Boolean, default=False)
     on_sale = Column(Boolean, default=False)
@@ -97,6 +112,16 @@ class Product(Base):
     category = relationship("Category", back_populates="products")
     order_items = relationship("OrderItem", back_populates="product")
 
+    # Listing filters/sorts (routers/products.py listing_query): active products by price or date,
+    # either in one category or across many. The cross-category indexes carry id (so the sort
+    # tiebreak stays in index order) and then the filter columns, checked without a row lookup.
+    __table_args__ = (
+        Index("ix_products_active_category_price", "is_active", "category_id", "price"),
+        Index("ix_products_active_category_created", "is_active", "category_id", "created_at"),
+        Index("ix_products_active_price", "is_active", "price", "id", "category_id", "stock_quantity"),
+        Index("ix_products_active_created", "is_active", "created_at", "id", "category_id", "price", "stock_quantity"),
+    )
+
 
 class Order(Base):
     __tablename__ = "orders"
@@ -144,6 +169,11 @@ class OrderItem(Base):
     order = relationship("Order", back_populates="order_items")
     product = relationship("Product", back_populates="order_items", lazy="joined")
 
+    # Units sold per product (sort=bestselling) without touching the table heap
+    __table_args__ = (
+        Index("ix_order_items_product_quantity", "product_id", "quantity"),
+    )
+
 
 class OrderStatusLog(Base):
     __tablename__ = "order_status_logs"
@@ -180,6 +210,17 @@ class HeroBanner(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
+class ImageAsset(Base):
+    """Content-addressed index of uploaded images (sha256 -> URL) with reference counts."""
+    __tablename__ = "image_assets"
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), unique=True, index=True, nullable=False)
+    url = Column(String, unique=True, index=True, nullable=False)
+    variants = Column(JSON, nullable=True)
+    ref_count = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 class DeliveryRoute(Base):
     __tablename__ = "delivery_routes"
     id = Column(Integer, primary_key=True)
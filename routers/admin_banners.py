@@ -1,28 +1,31 @@
+from typing import List
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
 from sqlalchemy.orm import Session
 import os, uuid
 
 from database import get_db
 from models import HeroBanner, User
+from schemas import HeroBanner as HeroBannerSchema
 from routers.auth import get_current_admin_user
-from utils.cloudinary_config import upload_image_to_cloudinary
+from utils.uploads import read_image_upload
+from utils.image_store import store_image, release_image
 
 
 router = APIRouter() 
 
 
-@router.get("")
+@router.get("", response_model=List[HeroBannerSchema])
 def get_banners(db: Session = Depends(get_db), admin_user: User = Depends(get_current_admin_user)):
     return db.query(HeroBanner).order_by(HeroBanner.created_at.desc()).all()
 
-@router.get("/{banner_id}")
+@router.get("/{banner_id}", response_model=HeroBannerSchema)
 def get_banner_by_id(banner_id: int, db: Session = Depends(get_db), admin_user: User = Depends(get_current_admin_user)):
     banner = db.query(HeroBanner).filter(HeroBanner.id == banner_id).first()
     if not banner:
         raise HTTPException(status_code=404, detail="Banner not found")
     return banner
 
-@router.post("")
+@router.post("", response_model=HeroBannerSchema)
 async def create_banner(
     title: str = Form(...),
     subtitle: str = Form(None),
@@ -31,22 +34,16 @@ async def create_banner(
     db: Session = Depends(get_db),
     admin_user: User = Depends(get_current_admin_user)
 ):
-    if not file.content_type.startswith("image/"):
-        raise HTTPException(status_code=400, detail="File must be an image")
+    upload = await read_image_upload(file)
 
     try:
-        file_content = await file.read()
-        image_url = upload_image_to_cloudinary(
-            file_content, 
-            file.filename, 
-            folder="ecommerce/banners"
-        )
+        asset = await store_image(db, upload, folder="ecommerce/banners")
         
         banner = HeroBanner(
             title=title, 
             subtitle=subtitle, 
             description=description, 
-            image=image_url  # Store Cloudinary URL
+            image=asset.url  # Store Cloudinary URL
         )
         db.add(banner)
         db.commit()
@@ -56,7 +53,7 @@ async def create_banner(
         raise HTTPException(status_code=500, detail=f"Failed to create banner: {str(e)}")
 
 
-@router.put("/{banner_id}")
+@router.put("/{banner_id}", response_model=HeroBannerSchema)
 async def update_banner(
     banner_id: int,
     title: str = Form(...),
@@ -75,25 +72,19 @@ async def update_banner(
     banner.description = description
 
     if file:
-        if not file.content_type.startswith("image/"):
-            raise HTTPException(status_code=400, detail="File must be an image")
-
-        # Delete old image from Cloudinary
-        if banner.image:
-            delete_file_if_exists(banner.image)
+        upload = await read_image_upload(file)
+        old_image = banner.image
 
         # Upload new image
         try:
-            file_content = await file.read()
-            image_url = upload_image_to_cloudinary(
-                file_content, 
-                file.filename, 
-                folder="ecommerce/banners"
-            )
-            banner.image = image_url
+            banner.image = (await store_image(db, upload, folder="ecommerce/banners")).url
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to upload image: {str(e)}")
 
+        # Release old image (deleted from Cloudinary once nothing else uses it)
+        if old_image:
+            release_image(db, old_image)
+
     db.commit()
     db.refresh(banner)
     return banner
@@ -105,8 +96,7 @@ def delete_banner(banner_id: int, db: Session = Depends(get_db), admin_user: Use
     if not banner:
         raise HTTPException(status_code=404, detail="Banner not found")
 
-    if banner.image and os.path.exists(banner.image.lstrip("/")):
-        os.remove(banner.image.lstrip("/"))
+    release_image(db, banner.image)
 
     db.delete(banner)
     db.commit()
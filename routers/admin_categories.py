@@ -1,20 +1,23 @@
 # routers/admin_categories.py
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Union
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Form, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import func, or_
 
 from database import get_db
 from models import Category, Product
 from schemas import (
     CategoryCreate, CategoryOut, CategoryListOut, CategoryUpdate,
-    CategorySimple, CategoryTree, ProductMinimal
+    CategorySimple, CategoryTree, ProductMinimal,
+    CategorySummaryListOut, CategoryTreeListOut
 )
 from routers.auth import get_current_admin_user, User
-from utils.cloudinary_config import upload_image_to_cloudinary
-from utils.delete_file import delete_file_if_exists
-from utils.slugify_helper import generate_unique_slug
+from utils.uploads import read_image_upload
+from utils.image_store import store_image, release_image
+from utils.slugify_helper import save_with_unique_slug
+from utils.category_views import CATEGORY_VIEWS, DISPLAY_ORDER, build_summaries, build_tree, category_rows, child_ids, subtree_rows
+from utils.responses import model_json_response
 
 router = APIRouter()
 
@@ -44,47 +47,71 @@ async def create_category(
 
     image_url = None
     if image:
-        if not image.content_type.startswith("image/"):
-            raise HTTPException(status_code=400, detail="File must be an image")
-        content = await image.read()
-        image_url = upload_image_to_cloudinary(content, image.filename, folder="ecommerce/categories")
+        upload = await read_image_upload(image)
+        image_url = (await store_image(db, upload, folder="ecommerce/categories")).url
+
+    # New categories go after their existing siblings
+    last_position = db.query(func.max(Category.display_order)).filter(Category.parent_id == parent_id).scalar()
 
     new_category = Category(
         name=name,
-        slug=generate_unique_slug(name, db),
         description=description,
         image=image_url,
         parent_id=parent_id,
+        display_order=0 if last_position is None else last_position + 1,
         is_active=True
     )
-    db.add(new_category)
+    save_with_unique_slug(db, new_category, name)
     db.commit()
     db.refresh(new_category)
     return new_category
 
 
-@router.get("", response_model=CategoryListOut)
+@router.get("", response_model=Union[CategorySummaryListOut, CategoryTreeListOut, CategoryListOut])
 def get_all_categories(
     db: Session = Depends(get_db),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
     include_inactive: bool = Query(False),
+    view: str = Query("summary", pattern="^(summary|tree|full)$", description=" | ".join(CATEGORY_VIEWS)),
     admin_user: User = Depends(get_current_admin_user)
 ):
-    """Get all categories with pagination"""
+    """
+    Get all categories with pagination.
+
+    - view=summary (default): counters and subcategory ids only
+    - view=tree: paginates root categories, each with its nested subtree (no products)
+    - view=full: each category with nested subcategories and products (the pre-view default)
+    """
     query = db.query(Category)
     if not include_inactive:
         query = query.filter(Category.is_active == True)
-    
+
+    if view == "summary":
+        total = query.count()
+        rows = category_rows(query.order_by(*DISPLAY_ORDER).offset(skip).limit(limit))
+        children = child_ids(db, [row["id"] for row in rows], active_only=not include_inactive)
+        return model_json_response(CategorySummaryListOut.model_validate({
+            "total": total, "skip": skip, "limit": limit,
+            "categories": build_summaries(rows, children),
+        }))
+
+    if view == "tree":
+        roots = query.filter(Category.parent_id == None)
+        total = roots.count()
+        root_ids = [cid for (cid,) in roots.order_by(*DISPLAY_ORDER).offset(skip).limit(limit).with_entities(Category.id).all()]
+        rows = subtree_rows(db, root_ids, active_only=not include_inactive)
+        return model_json_response(CategoryTreeListOut.model_validate({
+            "total": total, "skip": skip, "limit": limit,
+            "categories": build_tree(rows, root_ids),
+        }))
+
     total = query.count()
-    categories = query.offset(skip).limit(limit).all()
-    
-    return {
-        "total": total,
-        "skip": skip,
-        "limit": limit,
-        "categories": categories
-    }
+    categories = query.order_by(*DISPLAY_ORDER).offset(skip).limit(limit).all()
+    return model_json_response(CategoryListOut.model_validate({
+        "total": total, "skip": skip, "limit": limit,
+        "categories": categories,
+    }, from_attributes=True))
 
 
 @router.get("/tree", response_model=List[CategoryTree])
@@ -103,10 +130,15 @@ def get_category_tree(
             "image": category.image,
             "is_active": category.is_active,
             "parent_id": category.parent_id,
+            "display_order": category.display_order,
+            "product_count": category.product_count,
+            "active_product_count": category.active_product_count,
+            "total_product_count": category.total_product_count,
+            "total_active_product_count": category.total_active_product_count,
             "subcategories": [build_tree(sub) for sub in category.subcategories],
         }
 
-    parents = db.query(Category).filter(Category.parent_id == None).all()
+    parents = db.query(Category).filter(Category.parent_id == None).order_by(*DISPLAY_ORDER).all()
     return [build_tree(parent) for parent in parents]
 
 
@@ -116,7 +148,7 @@ def get_parent_categories(
     admin_user: User = Depends(get_current_admin_user)
 ):
     """Get only parent categories for dropdown"""
-    parents = db.query(Category).filter(Category.parent_id == None).all()
+    parents = db.query(Category).filter(Category.parent_id == None).order_by(*DISPLAY_ORDER).all()
     return parents
 
 
@@ -136,14 +168,11 @@ def search_categories(
         )
     )
     total = query.count()
-    categories = query.offset(skip).limit(limit).all()
-    
-    return {
-        "total": total,
-        "skip": skip,
-        "limit": limit,
-        "categories": categories
-    }
+    categories = query.order_by(*DISPLAY_ORDER).offset(skip).limit(limit).all()
+    return model_json_response(CategoryListOut.model_validate({
+        "total": total, "skip": skip, "limit": limit,
+        "categories": categories,
+    }, from_attributes=True))
 
 @router.get("/{category_id}", response_model=CategoryOut)
 def get_category(
@@ -185,7 +214,7 @@ async def update_category(
             raise HTTPException(status_code=400, detail="Category name already exists")
 
         category.name = name
-        category.slug = generate_unique_slug(name, db, exclude_id=category_id)
+        save_with_unique_slug(db, category, name)
         
     if description is not None:
         category.description = description
@@ -211,13 +240,10 @@ async def update_category(
         category.is_active = is_active
 
     if image:
-        if not image.content_type.startswith("image/"):
-            raise HTTPException(status_code=400, detail="File must be an image")
-        content = await image.read()
-        image_url = upload_image_to_cloudinary(content, image.filename, folder="ecommerce/categories")
-        category.image = image_url
+        upload = await read_image_upload(image)
+        category.image = (await store_image(db, upload, folder="ecommerce/categories")).url
         if old_image:
-            delete_file_if_exists(old_image)
+            release_image(db, old_image)
 
     db.commit()
     db.refresh(category)
@@ -234,25 +260,23 @@ def delete_category(
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
     
-    # Check if category has products
-    product_count = db.query(Product).filter(Product.category_id == category_id).count()
-    if product_count > 0:
+    # Check if category has products (maintained counters - no per-subcategory queries)
+    if category.product_count > 0:
         raise HTTPException(
             status_code=400,
-            detail=f"Cannot delete category with {product_count} products. Move or delete products first."
+            detail=f"Cannot delete category with {category.product_count} products. Move or delete products first."
         )
     
-    # Check if subcategories have products
+    # Check if subcategories (at any depth) have products
     for subcat in category.subcategories:
-        sub_product_count = db.query(Product).filter(Product.category_id == subcat.id).count()
-        if sub_product_count > 0:
+        if subcat.total_product_count > 0:
             raise HTTPException(
                 status_code=400,
-                detail=f"Subcategory '{subcat.name}' has {sub_product_count} products. Cannot delete."
+                detail=f"Subcategory '{subcat.name}' has {subcat.total_product_count} products. Cannot delete."
             )
     
     if category.image:
-        delete_file_if_exists(category.image)
+        release_image(db, category.image)
     
     db.delete(category)
     db.commit()
@@ -285,32 +309,36 @@ def check_circular_parent(db: Session, category_id: int, new_parent_id: int) ->
 @router.get("/{category_id}/products", response_model=List[ProductMinimal])
 def get_category_products(
     category_id: int,
+    response: Response,
     db: Session = Depends(get_db),
     include_subcategory_products: bool = Query(False),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
     admin_user: User = Depends(get_current_admin_user)
 ):
-    """Get all products in a category (optionally include subcategory products)"""
-    category = db.query(Category).filter(Category.id == category_id).first()
-    if not category:
+    """Get a page of products in a category (optionally include subcategory products).
+    The unpaginated total is returned in the X-Total-Count header."""
+    category_exists = db.query(Category.id).filter(Category.id == category_id).first()
+    if not category_exists:
         raise HTTPException(status_code=404, detail="Category not found")
     
     if include_subcategory_products:
-        # Get products from this category and all subcategories
-        category_ids = [category.id]
-        category_ids.extend([sub.id for sub in category.subcategories])
-        products = db.query(Product).filter(Product.category_id.in_(category_ids)).all()
+        # Get products from this category and its direct subcategories
+        category_ids = [category_id] + [cid for (cid,) in db.query(Category.id).filter(Category.parent_id == category_id).all()]
+        query = db.query(Product).filter(Product.category_id.in_(category_ids))
     else:
         # Get only products directly in this category
-        products = category.products
-    
-    return products
+        query = db.query(Product).filter(Product.category_id == category_id)
+
+    response.headers["X-Total-Count"] = str(query.count())
+    return query.order_by(Product.created_at.desc(), Product.id.desc()).offset(skip).limit(limit).all()
 
 
 def calculate_category_stats(db: Session) -> Dict[str, Any]:
     total_categories = db.query(Category).count()
     parent_categories = db.query(Category).filter(Category.parent_id == None).count()
     active_categories = db.query(Category).filter(Category.is_active == True).count()
-    categories_with_products = db.query(Category).join(Product).distinct().count()
+    categories_with_products = db.query(Category).filter(Category.product_count > 0).count()
 
     return {
         "total": total_categories,
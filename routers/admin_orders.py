@@ -5,7 +5,8 @@ from datetime import datetime
 
 from database import get_db
 from models import Order, User, OrderStatusLog, OrderItem
-from schemas import Order as OrderSchema, OrderStatusUpdate
+from schemas import Order as OrderSchema, OrderStatusUpdate, OrderPage
+from utils.responses import model_json_response
 from routers.auth import get_current_admin_user
 
 router = APIRouter() 
@@ -23,7 +24,7 @@ ALLOWED_TRANSITIONS = {
 # -------------------------------
 # Get all orders (paginated)
 # -------------------------------
-@router.get("", response_model=Dict[str, Any])
+@router.get("", response_model=OrderPage)
 def get_all_orders(
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
@@ -63,16 +64,14 @@ def get_all_orders(
     # Paginate
     orders = query.offset((page - 1) * limit).limit(limit).all()
 
-    # Convert to Pydantic models
-    order_list = [OrderSchema.model_validate(o) for o in orders]
-
-    return {
-        "orders": order_list,
+    # Validate straight from ORM objects and serialize in one pass
+    return model_json_response(OrderPage.model_validate({
+        "orders": orders,
         "total_items": total_items,
         "total_pages": total_pages,
         "current_page": page,
         "limit": limit
-    }
+    }, from_attributes=True))
 
 
 # -------------------------------
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, File, UploadFile, Form, Body
+from sqlalchemy import case, update
 from sqlalchemy.orm import Session
 import os
 from typing import List, Dict, Any, Optional
@@ -6,17 +7,19 @@ import uuid
 
 from database import get_db
 from models import Category, Product, User
-from schemas import ProductCreate, ProductUpdate, Product as ProductSchema
+from schemas import ProductCreate, ProductUpdate, Product as ProductSchema, AdminProductPage
+from utils.responses import model_json_response
 from routers.auth import get_current_admin_user
-from utils.delete_file import delete_file_if_exists
-from utils.cloudinary_config import upload_image_to_cloudinary
+from utils.uploads import read_image_upload
+from utils.image_store import store_image, release_image
+from utils.slugify_helper import save_with_unique_slug
 
 router = APIRouter() 
 
 # ----------------------------
 # Get all products (paginated)
 # ----------------------------
-@router.get("", response_model=Dict[str, Any])
+@router.get("", response_model=AdminProductPage)
 def get_all_products(
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
@@ -29,20 +32,18 @@ def get_all_products(
 
     products = query.offset((page - 1) * limit).limit(limit).all()
 
-    # Convert to Pydantic models
-    product_list = [ProductSchema.model_validate(p) for p in products]
-
-    return {
-        "products": product_list,
+    # Validate straight from ORM objects and serialize in one pass
+    return model_json_response(AdminProductPage.model_validate({
+        "products": products,
         "total_items": total_items,
         "total_pages": total_pages,
         "current_page": page
-    }
+    }, from_attributes=True))
 
 # ----------------------------
 # Search products (paginated)
 # ----------------------------
-@router.get("/search", response_model=Dict[str, Any])
+@router.get("/search", response_model=AdminProductPage)
 def search_products(
     q: str = Query(..., description="Search term"),
     page: int = Query(1, ge=1),
@@ -56,20 +57,18 @@ def search_products(
 
     products = query.offset((page - 1) * limit).limit(limit).all()
 
-    # Convert to Pydantic models
-    product_list = [ProductSchema.model_validate(p) for p in products]
-
-    return {
-        "products": product_list,
+    # Validate straight from ORM objects and serialize in one pass
+    return model_json_response(AdminProductPage.model_validate({
+        "products": products,
         "total_items": total_items,
         "total_pages": total_pages,
         "current_page": page
-    }
+    }, from_attributes=True))
 
 @router.post("", response_model=ProductSchema)
 async def create_product(
     name: str = Form(...),
-    slug: str = Form(...),
+    slug: Optional[str] = Form(None),
     description: str = Form(""),
     price: float = Form(...),
     original_price: float | None = Form(None),
@@ -90,14 +89,15 @@ async def create_product(
     is_featured = to_bool(is_featured)
     on_sale = to_bool(on_sale)
 
-    # check for duplicate slug
-    if db.query(Product).filter(Product.slug == slug).first():
+    # explicit slugs must be free; empty ones are generated from the name
+    slug = (slug or "").strip()
+    if slug and db.query(Product.id).filter(Product.slug == slug).first():
         raise HTTPException(status_code=400, detail="Slug already exists")
 
     #  create new product
     db_product = Product(
         name=name,
-        slug=slug,
+        slug=slug or None,
         description=description,
         price=price,
         original_price=original_price,
@@ -110,13 +110,15 @@ async def create_product(
 
     # handle image upload
     if image:
-        if not image.content_type.startswith("image/"):
-            raise HTTPException(status_code=400, detail="File must be an image")
-        content = await image.read()
-        image_url = upload_image_to_cloudinary(content, image.filename, folder="ecommerce/products")
-        db_product.image = image_url
-
-    db.add(db_product)
+        upload = await read_image_upload(image)
+        asset = await store_image(db, upload, folder="ecommerce/products", with_variants=True)
+        db_product.image = asset.url
+        db_product.image_variants = asset.variants
+
+    if slug:
+        db.add(db_product)
+    else:
+        save_with_unique_slug(db, db_product, name)
     db.commit()
     db.refresh(db_product)
     return db_product
@@ -151,6 +153,7 @@ async def update_product(
         raise HTTPException(status_code=404, detail="Product not found")
 
     old_image = product.image
+    old_variants = product.image_variants
 
     # Update fields
     if name is not None:
@@ -179,13 +182,12 @@ async def update_product(
 
     # Image handling
     if image:
-        if not image.content_type.startswith("image/"):
-            raise HTTPException(status_code=400, detail="File must be an image")
-        content = await image.read()
-        image_url = upload_image_to_cloudinary(content, image.filename, folder="ecommerce/products")
-        product.image = image_url
+        upload = await read_image_upload(image)
+        asset = await store_image(db, upload, folder="ecommerce/products", with_variants=True)
+        product.image = asset.url
+        product.image_variants = asset.variants
         if old_image:
-            delete_file_if_exists(old_image)
+            release_image(db, old_image, old_variants)
 
     db.commit()
     db.refresh(product)
@@ -202,7 +204,7 @@ def delete_product(product_id: int, db: Session = Depends(get_db), admin_user: U
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    delete_file_if_exists(product.image)
+    release_image(db, product.image, product.image_variants)
     db.delete(product)
     db.commit()
     return {"detail": "Product deleted"}
@@ -212,26 +214,22 @@ def delete_product(product_id: int, db: Session = Depends(get_db), admin_user: U
 @router.post("/upload-image")
 async def upload_image(
     file: UploadFile = File(...),
+    db: Session = Depends(get_db),
     admin_user: User = Depends(get_current_admin_user)
 ):
-    # Check file type
-    if not file.content_type.startswith("image/"):
-        raise HTTPException(status_code=400, detail="File must be an image")
+    # Stream + validate (size cap, magic bytes)
+    upload = await read_image_upload(file)
 
     try:
-        # Read file content
-        file_content = await file.read()
-        
-        # Upload to Cloudinary
-        image_url = upload_image_to_cloudinary(
-            file_content, 
-            file.filename, 
-            folder="ecommerce/products"
-        )
-        
+        # Upload to Cloudinary (reuses the existing asset for identical bytes).
+        # No product points at this URL yet, so no reference is taken - nothing would release it.
+        asset = await store_image(db, upload, folder="ecommerce/products", with_variants=True, take_reference=False)
+        db.commit()
+
         return {
             "filename": file.filename,
-            "url": image_url  # Now returns Cloudinary URL
+            "url": asset.url,  # Now returns Cloudinary URL
+            "image_variants": asset.variants
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to upload image: {str(e)}")
@@ -266,16 +264,24 @@ def reorder_categories(
     """
     Bulk update display order for categories
     Expects: [{"id": category_id, "order": new_order}, ...]
+    Applied as one UPDATE ... SET display_order = CASE id WHEN ... END WHERE id IN (...)
     """
     try:
-        for item in orders:
-            category = db.query(Category).filter(Category.id == item["id"]).first()
-            if category:
-                # Assuming you add a display_order column to your Category model
-                category.display_order = item["order"]
-        
+        new_order = {int(item["id"]): int(item["order"]) for item in orders}
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail='Each item needs integer "id" and "order"')
+    if not new_order:
+        return {"detail": "Reordered 0 categories successfully"}
+
+    try:
+        result = db.execute(
+            update(Category)
+            .where(Category.id.in_(new_order))
+            .values(display_order=case(new_order, value=Category.id))
+            .execution_options(synchronize_session=False)
+        )
         db.commit()
-        return {"detail": f"Reordered {len(orders)} categories successfully"}
+        return {"detail": f"Reordered {result.rowcount} categories successfully"}
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=f"Failed to reorder: {str(e)}")
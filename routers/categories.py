@@ -1,29 +1,51 @@
 # routers/categories.py - User-facing category and product endpoints
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Union
 
 from database import get_db
 from models import Category, Product
-from schemas import CategoryOut, CategoryTree, ProductMinimal, Product as ProductSchema
+from schemas import CategoryOut, CategoryTree, CategorySummary, ProductMinimal, Product as ProductSchema
+from utils.category_views import CATEGORY_VIEWS, DISPLAY_ORDER, build_summaries, build_tree, category_rows
+from utils.responses import list_json_response
 
 router = APIRouter()
 
 
-@router.get("", response_model=List[CategoryOut])
+@router.get("", response_model=Union[List[CategorySummary], List[CategoryTree], List[CategoryOut]])
 def get_categories(
     db: Session = Depends(get_db),
-    active_only: bool = Query(True, description="Show only active categories")
+    active_only: bool = Query(True, description="Show only active categories"),
+    view: str = Query("summary", pattern="^(summary|tree|full)$", description=" | ".join(CATEGORY_VIEWS))
 ):
     """
-    Get all active categories with their subcategories and products.
-    Returns flat list of all categories.
+    Get all active categories.
+
+    - view=summary (default): flat list with product counters and subcategory ids only
+    - view=tree: root categories with nested subcategories and counters, no products
+    - view=full: flat list, each with nested subcategories and products (the pre-view default;
+      clients that render the embedded products must now ask for it explicitly)
+
+    summary/tree come from one column-only query; use /{category_id}/products for product lists.
     """
     query = db.query(Category)
     if active_only:
         query = query.filter(Category.is_active == True)
-    
-    return query.all()
+    query = query.order_by(*DISPLAY_ORDER)
+
+    if view == "full":
+        return list_json_response(CategoryOut, query.all())
+
+    rows = category_rows(query)
+    if view == "tree":
+        roots = [row["id"] for row in rows if row["parent_id"] is None]
+        return list_json_response(CategoryTree, build_tree(rows, roots))
+
+    children = {}
+    for row in rows:
+        if row["parent_id"] is not None:
+            children.setdefault(row["parent_id"], []).append(row["id"])
+    return list_json_response(CategorySummary, build_summaries(rows, children))
 
 
 @router.get("/tree", response_model=List[CategoryTree])
@@ -37,7 +59,7 @@ def get_category_tree(
     parents = db.query(Category).filter(
         Category.parent_id == None,
         Category.is_active == True
-    ).all()
+    ).order_by(*DISPLAY_ORDER).all()
     return parents
 
 
@@ -52,7 +74,7 @@ def get_parent_categories(
     parents = db.query(Category).filter(
         Category.parent_id == None,
         Category.is_active == True
-    ).all()
+    ).order_by(*DISPLAY_ORDER).all()
     return parents
 
 
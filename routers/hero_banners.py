@@ -1,11 +1,13 @@
 # hero_banners.py
+from typing import List
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from database import get_db
 from models import HeroBanner
+from schemas import HeroBanner as HeroBannerSchema
 
 router = APIRouter() 
 
-@router.get("")   
+@router.get("", response_model=List[HeroBannerSchema])
 def get_public_banners(db: Session = Depends(get_db)):
     return db.query(HeroBanner).order_by(HeroBanner.created_at.desc()).all()
@@ -0,0 +1,110 @@
+# routers/images.py - On-demand resized variants of legacy static/images files
+import asyncio
+import hashlib
+import os
+from functools import partial
+from typing import Dict
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+
+from config import settings
+from utils.conditional_get import if_none_match_matches
+from utils.image_cache import DiskLRUCache
+from utils.image_urls import IMAGE_WIDTHS
+from utils.image_variants import avif_supported, get_process_pool, render_resized
+
+router = APIRouter()
+
+IMAGE_DIR = "static/images"
+
+# Requested widths snap up to one of these so arbitrary ?w= values can't flood the cache
+ALLOWED_WIDTHS = IMAGE_WIDTHS
+
+FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "avif": ("AVIF", "image/avif"),
+    "jpeg": ("JPEG", "image/jpeg"),
+    "jpg": ("JPEG", "image/jpeg"),
+    "png": ("PNG", "image/png"),
+}
+
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+cache = DiskLRUCache(settings.IMAGE_CACHE_DIR, settings.IMAGE_CACHE_MAX_BYTES)
+
+# Single-flight: concurrent requests for the same variant await one render task
+in_flight: Dict[str, asyncio.Task] = {}
+
+
+def snap_width(width: int) -> int:
+    for allowed in ALLOWED_WIDTHS:
+        if width <= allowed:
+            return allowed
+    return ALLOWED_WIDTHS[-1]
+
+
+async def _render_and_store(key: str, source_path: str, width: int, pil_format: str) -> bytes:
+    loop = asyncio.get_running_loop()
+    data = await loop.run_in_executor(get_process_pool(), render_resized, source_path, width, pil_format)
+    await loop.run_in_executor(None, cache.put, key, data)
+    return data
+
+
+def _render_finished(key: str, task: asyncio.Task):
+    if in_flight.get(key) is task:
+        del in_flight[key]
+    if not task.cancelled():
+        task.exception()   # mark retrieved so asyncio doesn't log "never retrieved" when every waiter left
+
+
+async def render_variant(key: str, source_path: str, width: int, pil_format: str) -> bytes:
+    task = in_flight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_render_and_store(key, source_path, width, pil_format))
+        task.add_done_callback(partial(_render_finished, key))
+        in_flight[key] = task
+    # The render runs as its own task: a client disconnecting cancels only its own wait,
+    # never the render other requests are waiting on
+    return await asyncio.shield(task)
+
+
+@router.get("/{name}")
+async def get_resized_image(
+    name: str,
+    request: Request,
+    w: int = Query(640, ge=1, le=4000, description="Target width (snapped to a fixed set)"),
+    fmt: str = Query("webp", description="webp | avif | jpeg | png"),
+):
+    if name != os.path.basename(name) or name.startswith("."):
+        raise HTTPException(status_code=400, detail="Invalid image name")
+
+    fmt = fmt.lower()
+    if fmt not in FORMATS or (fmt == "avif" and not avif_supported()):
+        raise HTTPException(status_code=400, detail="Unsupported format")
+    pil_format, media_type = FORMATS[fmt]
+
+    source_path = os.path.join(IMAGE_DIR, name)
+    try:
+        stat = os.stat(source_path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    width = snap_width(w)
+    # Strong validator derived from the source identity + variant params, known before rendering
+    fingerprint = f"{name}:{stat.st_mtime_ns}:{stat.st_size}:{width}:{pil_format}"
+    digest = hashlib.sha256(fingerprint.encode()).hexdigest()[:32]
+    etag = f'"{digest}"'
+    headers = {"Cache-Control": CACHE_CONTROL, "ETag": etag}
+
+    if if_none_match_matches(request.headers.get("if-none-match", "").encode("latin-1"), etag):
+        return Response(status_code=304, headers=headers)
+
+    key = f"{digest}.{fmt}"
+    data = await asyncio.get_running_loop().run_in_executor(None, cache.read, key)
+    if data is None:
+        try:
+            data = await render_variant(key, source_path, width, pil_format)
+        except Exception as e:
+            raise HTTPException(status_code=422, detail=f"Could not render image: {str(e)}")
+
+    return Response(content=data, media_type=media_type, headers=headers)
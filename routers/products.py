@@ -1,39 +1,75 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session, joinedload
 from typing import Optional, List, Dict, Any
 
 from database import get_db
-from models import Product as ProductModel, Category
-from schemas import Product as ProductSchema
+from models import Product as ProductModel, Category, OrderItem
+from schemas import (
+    Product as ProductSchema, ProductPage, FacetBucket,
+    ProductStock, ProductBatch, ProductBatchRequest
+)
+from utils.responses import model_json_response
+from services.product_search import product_search
+from services.product_cache import product_cache
 
 router = APIRouter() 
 
+FACET_NAMES = ("category", "on_sale", "featured", "price")
+
+MAX_BATCH_IDS = 500
+
+# Each order is backed by an (is_active[, category_id], column) index - see models.Product
+SORT_ORDERS = ("newest", "price_asc", "price_desc", "bestselling")
+
+# (label, min inclusive, max exclusive) in KSh
+PRICE_BANDS = (
+    ("under-500", 0, 500),
+    ("500-1000", 500, 1000),
+    ("1000-2000", 1000, 2000),
+    ("2000-5000", 2000, 5000),
+    ("5000-plus", 5000, None),
+)
+
 # ----------------------------
 # Public: Get all active products (paginated)
 # ----------------------------
-@router.get("", response_model=Dict[str, Any])
+@router.get("", response_model=ProductPage)
 def get_products(
     category: Optional[str] = Query(None),
     search: Optional[str] = Query(None),
     on_sale: Optional[bool] = Query(None),
     is_featured: Optional[bool] = Query(None),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    in_stock: Optional[bool] = Query(None),
+    sort: Optional[str] = Query(None, description="newest | price_asc | price_desc | bestselling (default: relevance when searching, else newest)"),
+    facets: Optional[str] = Query(None, description="Comma-separated facets: category,on_sale,featured,price"),
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
     db: Session = Depends(get_db)
 ):
-    query = db.query(ProductModel).filter(ProductModel.is_active == True)
     subcategories_data = []
     category_data = None
+    cat = None
+
+    if sort is not None and sort not in SORT_ORDERS:
+        raise HTTPException(status_code=400, detail=f"Invalid sort. Use one of: {', '.join(SORT_ORDERS)}")
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise HTTPException(status_code=400, detail="min_price cannot be greater than max_price")
+
+    requested_facets = []
+    if facets:
+        requested_facets = [f.strip() for f in facets.split(",") if f.strip()]
+        unknown = set(requested_facets) - set(FACET_NAMES)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown facets: {', '.join(sorted(unknown))}")
 
     if category:
         cat = db.query(Category).filter(Category.slug == category, Category.is_active == True).first()
         if not cat:
             raise HTTPException(status_code=404, detail="Category not found")
 
-        # Collect all descendant IDs for filtering
-        all_ids = get_all_descendant_ids(cat)
-        query = query.filter(ProductModel.category_id.in_(all_ids))
-
         # Prepare subcategory data
         subcategories_data = [
             {"id": sub.id, "name": sub.name, "slug": sub.slug, "image": sub.image}
@@ -43,44 +79,184 @@ def get_products(
         # Store category info for breadcrumb building
         category_data = {"id": cat.id, "name": cat.name, "slug": cat.slug}
 
-    if on_sale is not None:
-        query = query.filter(ProductModel.on_sale == on_sale)
-    if is_featured is not None:
-        query = query.filter(ProductModel.is_featured == is_featured)
+    query = listing_query(
+        db,
+        category_ids=get_all_descendant_ids(cat) if cat else None,
+        on_sale=on_sale,
+        is_featured=is_featured,
+        min_price=min_price,
+        max_price=max_price,
+        in_stock=in_stock,
+        sort=sort,
+    )
+
+    ranked_ids, did_you_mean = None, None
     if search:
-        query = query.filter(ProductModel.name.ilike(f"%{search}%"))
+        # Typo-tolerant, relevance-ranked ids from the in-memory index (services/product_search.py)
+        ranked_ids, did_you_mean = product_search.search(search)
+        query = query.filter(ProductModel.id.in_(ranked_ids))
 
-    query = query.order_by(ProductModel.created_at.desc())
-    total_items = query.count()
-    total_pages = (total_items + limit - 1) // limit
-    products = query.offset((page - 1) * limit).limit(limit).all()
+    facet_counts = compute_facets(db, query, requested_facets, cat) if requested_facets else None
 
-    product_list = [ProductSchema.model_validate(p) for p in products]
+    if ranked_ids is not None and sort is None:
+        # Keep relevance order: intersect the ranking with the DB filters, then load one page
+        matching = {pid for (pid,) in query.with_entities(ProductModel.id).all()}
+        ordered_ids = [pid for pid in ranked_ids if pid in matching]
+        total_items = len(ordered_ids)
+        page_ids = ordered_ids[(page - 1) * limit:page * limit]
+        position = {pid: i for i, pid in enumerate(page_ids)}
+        products = sorted(
+            query.filter(ProductModel.id.in_(page_ids)).all() if page_ids else [],
+            key=lambda p: position[p.id],
+        )
+    else:
+        total_items = query.count()
+        query = apply_sort(db, query, sort or "newest")
+        products = query.offset((page - 1) * limit).limit(limit).all()
+    total_pages = (total_items + limit - 1) // limit
 
     # ✅ Important: Return both products + subcategories
-    return {
-        "products": product_list,
+    page_out = ProductPage.model_validate({
+        "products": products,
         "subcategories": subcategories_data,
         "category": category_data,
         "total_items": total_items,
         "total_pages": total_pages,
         "current_page": page,
-    }
+        "facets": facet_counts,
+        "did_you_mean": did_you_mean,
+    }, from_attributes=True)
+    return model_json_response(page_out)
+
+
+def listing_query(
+    db: Session,
+    category_ids: Optional[List[int]] = None,
+    on_sale: Optional[bool] = None,
+    is_featured: Optional[bool] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    in_stock: Optional[bool] = None,
+    sort: Optional[str] = None,
+):
+    """
+    Filtered, unsorted query over active products for GET /products (sort with apply_sort).
+
+    Listings are read in sort order straight off one index (see models.Product): the
+    (is_active, category_id, column) ones for a single category, otherwise the
+    (is_active, column, id, ...) ones, which also hold category_id, price and stock so a
+    category subtree or stock filter is checked inside the index. A price range is only made
+    index-seekable when sorting by price; otherwise it is compared as `price + 0`, which keeps
+    the planner on the ordered index instead of collecting the range and sorting it.
+    """
+    query = db.query(ProductModel).filter(ProductModel.is_active == True)
+    if category_ids is not None:
+        query = query.filter(ProductModel.category_id.in_(category_ids))
+    if on_sale is not None:
+        query = query.filter(ProductModel.on_sale == on_sale)
+    if is_featured is not None:
+        query = query.filter(ProductModel.is_featured == is_featured)
+
+    price = ProductModel.price if sort in ("price_asc", "price_desc", "bestselling") else ProductModel.price + 0
+    if min_price is not None:
+        query = query.filter(price >= min_price)
+    if max_price is not None:
+        query = query.filter(price <= max_price)
+    if in_stock is not None:
+        query = query.filter((ProductModel.stock_quantity > 0) if in_stock else (ProductModel.stock_quantity <= 0))
+    return query
+
+# ----------------------------
+# Public: Fetch many products at once (cart / wishlist hydration)
+# Declared before /{product_id} so "batch" isn't parsed as an id
+# ----------------------------
+@router.get("/batch", response_model=ProductBatch)
+def get_products_batch(
+    ids: str = Query(..., description="Comma-separated product ids, e.g. 1,2,3"),
+    fields: str = Query("full", pattern="^(full|stock)$", description="full | stock (price and stock only)"),
+    db: Session = Depends(get_db)
+):
+    try:
+        product_ids = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    return model_json_response(fetch_product_batch(db, product_ids, fields))
+
+
+@router.post("/batch", response_model=ProductBatch)
+def post_products_batch(payload: ProductBatchRequest, db: Session = Depends(get_db)):
+    """Same as GET /batch, for id lists too long for a query string."""
+    return model_json_response(fetch_product_batch(db, payload.ids, payload.fields))
+
+
+def fetch_product_batch(db: Session, product_ids: List[int], fields: str) -> ProductBatch:
+    """
+    One IN query for all ids. Results follow the requested order (duplicates collapsed);
+    ids that don't exist or are inactive are listed in `missing`.
+    """
+    requested = list(dict.fromkeys(product_ids))
+    if len(requested) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
+    if not requested:
+        return ProductBatch(products=[], missing=[])
+
+    query = db.query(ProductModel).filter(ProductModel.id.in_(requested), ProductModel.is_active == True)
+    if fields == "stock":
+        rows = query.with_entities(
+            ProductModel.id, ProductModel.price, ProductModel.original_price,
+            ProductModel.on_sale, ProductModel.stock_quantity
+        ).all()
+        found = {row.id: ProductStock.model_validate(row, from_attributes=True) for row in rows}
+    else:
+        # Category is joined into the same query so serialization doesn't lazy-load per product
+        rows = query.options(joinedload(ProductModel.category)).all()
+        found = {row.id: ProductSchema.model_validate(row, from_attributes=True) for row in rows}
+
+    return ProductBatch(
+        products=[found[pid] for pid in requested if pid in found],
+        missing=[pid for pid in requested if pid not in found],
+    )
 
 # ----------------------------
 # Public: Get one active product by ID
 # ----------------------------
 @router.get("/{product_id}", response_model=ProductSchema)
 def get_product(product_id: int, db: Session = Depends(get_db)):
-    product = db.query(ProductModel).filter(
-        ProductModel.id == product_id,
-        ProductModel.is_active == True
-    ).first()
+    product = product_cache.get_by_id(db, product_id)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return model_json_response(product)
+
+# ----------------------------
+# Public: Get one active product by slug
+# ----------------------------
+@router.get("/slug/{slug}", response_model=ProductSchema)
+def get_product_by_slug(slug: str, db: Session = Depends(get_db)):
+    product = product_cache.get_by_slug(db, slug)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    return product  
+    return model_json_response(product)
     
 
+def apply_sort(db: Session, query, sort: str):
+    """Order the listing; product id breaks ties so pages never overlap."""
+    if sort == "price_asc":
+        return query.order_by(ProductModel.price.asc(), ProductModel.id.asc())
+    if sort == "price_desc":
+        return query.order_by(ProductModel.price.desc(), ProductModel.id.desc())
+    if sort == "bestselling":
+        # Correlated per product: only the filtered rows are summed, each from an index-only
+        # range on order_items(product_id, quantity) - never an aggregate over every order item
+        units_sold = (
+            select(func.coalesce(func.sum(OrderItem.quantity), 0))
+            .where(OrderItem.product_id == ProductModel.id)
+            .correlate(ProductModel)
+            .scalar_subquery()
+        )
+        return query.order_by(units_sold.desc(), ProductModel.created_at.desc(), ProductModel.id.desc())
+    return query.order_by(ProductModel.created_at.desc(), ProductModel.id.desc())
+
+
 def get_all_descendant_ids(category: Category, collected=None):
     if collected is None:
         collected = []
@@ -88,3 +264,74 @@ def get_all_descendant_ids(category: Category, collected=None):
     for sub in category.subcategories:
         get_all_descendant_ids(sub, collected)
     return collected
+
+
+def compute_facets(db: Session, query, requested: List[str], category: Optional[Category]) -> Dict[str, List[FacetBucket]]:
+    """
+    All facet counts for the current filter set from ONE grouped aggregate query.
+    Rows are grouped by (category_id, on_sale, is_featured, price band) and rolled up in Python,
+    so a full facet panel costs about one query regardless of how many facets are asked for.
+    """
+    band_expr = case(
+        *[(ProductModel.price < upper, label) for label, _, upper in PRICE_BANDS if upper is not None],
+        else_=PRICE_BANDS[-1][0],
+    ).label("band")
+
+    rows = (
+        query.order_by(None)
+        .with_entities(ProductModel.category_id, ProductModel.on_sale, ProductModel.is_featured, band_expr, func.count())
+        # Group by the label name so the CASE (and its bound params) is only rendered once
+        .group_by(ProductModel.category_id, ProductModel.on_sale, ProductModel.is_featured, "band")
+        .all()
+    )
+
+    result: Dict[str, List[FacetBucket]] = {}
+
+    if "category" in requested:
+        # Roll each product's category up to the direct child of the filtered category (or to its root)
+        if category is not None:
+            buckets = [sub for sub in category.subcategories if sub.is_active]
+            owner = {cid: sub for sub in buckets for cid in get_all_descendant_ids(sub)}
+        else:
+            all_categories = db.query(Category.id, Category.parent_id, Category.name, Category.slug).all()
+            parents = {c.id: c.parent_id for c in all_categories}
+            roots = {c.id: c for c in all_categories if c.parent_id is None}
+            owner = {}
+            for cid in parents:
+                root, seen = cid, set()
+                while parents.get(root) is not None and root not in seen:
+                    seen.add(root)
+                    root = parents[root]
+                if root in roots:
+                    owner[cid] = roots[root]
+        counts: Dict[int, int] = {}
+        for category_id, _, _, _, count in rows:
+            target = owner.get(category_id)
+            if target is not None:
+                counts[target.id] = counts.get(target.id, 0) + count
+        targets = {t.id: t for t in owner.values()}
+        result["category"] = [
+            FacetBucket(key=str(cid), label=targets[cid].name, count=count, id=cid, slug=targets[cid].slug)
+            for cid, count in sorted(counts.items(), key=lambda item: -item[1])
+        ]
+
+    for facet, column_index in (("on_sale", 1), ("featured", 2)):
+        if facet in requested:
+            totals = {True: 0, False: 0}
+            for row in rows:
+                totals[bool(row[column_index])] += row[4]
+            result[facet] = [
+                FacetBucket(key="true", label="Yes", count=totals[True]),
+                FacetBucket(key="false", label="No", count=totals[False]),
+            ]
+
+    if "price" in requested:
+        totals = {label: 0 for label, _, _ in PRICE_BANDS}
+        for row in rows:
+            totals[row[3]] = totals.get(row[3], 0) + row[4]
+        result["price"] = [
+            FacetBucket(key=label, label=label, count=totals[label], min=low, max=high)
+            for label, low, high in PRICE_BANDS
+        ]
+
+    return result
@@ -0,0 +1,18 @@
+# routers/search.py - Search-box typeahead
+from fastapi import APIRouter, Query
+
+from services.search_index import MAX_SUGGESTIONS, suggest_index
+
+router = APIRouter()
+
+
+@router.get("/suggest")
+def suggest(
+    q: str = Query("", max_length=100),
+    limit: int = Query(8, ge=1, le=MAX_SUGGESTIONS)
+):
+    """
+    Prefix suggestions over active product and category names, most popular first.
+    Served from the in-memory index; no database query unless the index has pending updates.
+    """
+    return {"query": q, "suggestions": suggest_index.suggest(q, limit)}
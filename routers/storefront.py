@@ -0,0 +1,28 @@
+# routers/storefront.py - Aggregated storefront endpoints
+from fastapi import APIRouter, Request, Response
+
+from database import SessionLocal
+from services.storefront_cache import storefront_cache
+from utils.conditional_get import if_none_match_matches
+
+router = APIRouter()
+
+HOME_CACHE_CONTROL = "public, max-age=0, must-revalidate"
+
+
+@router.get("/home")
+def get_storefront_home(request: Request):
+    """
+    Hero banners, category tree, featured and on-sale products in one response.
+    Served from precomputed fragments; If-None-Match is answered without a DB query.
+    """
+    home = storefront_cache.current_home()
+    if home is None:
+        # Session only opened when the cached payload is stale, so hot hits never touch the pool
+        with SessionLocal() as db:
+            home = storefront_cache.get_home(db)
+
+    headers = {"ETag": home.etag, "Cache-Control": HOME_CACHE_CONTROL}
+    if if_none_match_matches(request.headers.get("if-none-match", "").encode("latin-1"), home.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=home.body, media_type="application/json", headers=headers)
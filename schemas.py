@@ -1,7 +1,8 @@
-from pydantic import BaseModel, EmailStr, field_validator
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, field_validator, computed_field
+from typing import Optional, List, Dict, Any, Literal, Union
 from datetime import datetime
 from models import UserRole, OrderStatus, PaymentStatus
+from utils.image_urls import image_srcset
 
 
 # -------------------------------
@@ -87,6 +88,7 @@ class CategoryBase(BaseModel):
     icon: Optional[str] = None
     is_active: bool
     parent_id: Optional[int] = None
+    display_order: int = 0
     created_at: datetime
 
     class Config:
@@ -95,9 +97,18 @@ class CategoryBase(BaseModel):
 
 # Category with subcategories and products
 class CategoryOut(CategoryBase):
+    product_count: int = 0
+    active_product_count: int = 0
+    total_product_count: int = 0
+    total_active_product_count: int = 0
     subcategories: List["CategoryOut"] = []
     products: List[ProductMinimal] = []
 
+    @computed_field
+    @property
+    def image_srcset(self) -> Dict[str, Dict[str, str]]:
+        return image_srcset(self.image, ("card",))
+
     class Config:
         from_attributes = True
 
@@ -112,6 +123,11 @@ class CategoryTree(BaseModel):
     icon: Optional[str] = None
     is_active: bool
     parent_id: Optional[int]
+    display_order: int = 0
+    product_count: int = 0
+    active_product_count: int = 0
+    total_product_count: int = 0
+    total_active_product_count: int = 0
     subcategories: List["CategoryTree"] = []
 
     class Config:
@@ -125,6 +141,40 @@ class CategoryListOut(BaseModel):
     categories: List[CategoryOut]
 
 
+# Flat listing entry: counters and child ids only, no nested products/subcategories
+class CategorySummary(BaseModel):
+    id: int
+    name: str
+    slug: str
+    image: Optional[str] = None
+    icon: Optional[str] = None
+    is_active: bool
+    parent_id: Optional[int] = None
+    display_order: int = 0
+    product_count: int = 0
+    active_product_count: int = 0
+    total_product_count: int = 0
+    total_active_product_count: int = 0
+    subcategory_ids: List[int] = []
+
+    class Config:
+        from_attributes = True
+
+
+class CategorySummaryListOut(BaseModel):
+    total: int
+    skip: int
+    limit: int
+    categories: List[CategorySummary]
+
+
+class CategoryTreeListOut(BaseModel):
+    total: int
+    skip: int
+    limit: int
+    categories: List[CategoryTree]
+
+
 # For dropdown selects in admin
 class CategorySimple(BaseModel):
     id: int
@@ -141,7 +191,7 @@ class CategorySimple(BaseModel):
 # -------------------------------
 class ProductCreate(BaseModel):
     name: str
-    slug: str
+    slug: Optional[str] = None  # generated from name when empty
     description: Optional[str] = None
     price: float
     original_price: Optional[float] = None
@@ -175,6 +225,7 @@ class Product(BaseModel):
     original_price: Optional[float] = None
     stock_quantity: int
     image: Optional[str] = None
+    image_variants: Optional[Dict[str, Any]] = None
     is_active: bool
     is_featured: bool
     on_sale: bool
@@ -182,6 +233,95 @@ class Product(BaseModel):
     category_id: int
     category: Optional[CategoryBase] = None
 
+    @computed_field
+    @property
+    def image_srcset(self) -> Dict[str, Dict[str, str]]:
+        return image_srcset(self.image, ("card", "detail"))
+
+    class Config:
+        from_attributes = True
+
+
+# Paginated envelopes (serialized in one pass, see utils/responses.py)
+class SubcategoryLink(BaseModel):
+    id: int
+    name: str
+    slug: str
+    image: Optional[str] = None
+
+
+class CategoryRef(BaseModel):
+    id: int
+    name: str
+    slug: str
+
+
+class FacetBucket(BaseModel):
+    key: str
+    label: str
+    count: int
+    id: Optional[int] = None
+    slug: Optional[str] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+
+
+class ProductPage(BaseModel):
+    products: List[Product]
+    subcategories: List[SubcategoryLink] = []
+    category: Optional[CategoryRef] = None
+    total_items: int
+    total_pages: int
+    current_page: int
+    facets: Optional[Dict[str, List[FacetBucket]]] = None
+    did_you_mean: Optional[str] = None
+
+
+class AdminProductPage(BaseModel):
+    products: List[Product]
+    total_items: int
+    total_pages: int
+    current_page: int
+
+
+class ProductStock(BaseModel):
+    """Price and availability only, for cart/wishlist re-validation."""
+    id: int
+    price: float
+    original_price: Optional[float] = None
+    on_sale: bool
+    stock_quantity: int
+
+    class Config:
+        from_attributes = True
+
+
+class ProductBatch(BaseModel):
+    products: List[Union[Product, ProductStock]]
+    missing: List[int] = []
+
+
+class ProductBatchRequest(BaseModel):
+    ids: List[int]
+    fields: Literal["full", "stock"] = "full"
+
+
+# -------------------------------
+# Hero Banner Schemas
+# -------------------------------
+class HeroBanner(BaseModel):
+    id: int
+    title: str
+    subtitle: Optional[str] = None
+    description: Optional[str] = None
+    image: str
+    created_at: Optional[datetime] = None
+
+    @computed_field
+    @property
+    def image_srcset(self) -> Dict[str, Dict[str, str]]:
+        return image_srcset(self.image, ("banner",))
+
     class Config:
         from_attributes = True
 
@@ -292,6 +432,14 @@ class Order(BaseModel):
         from_attributes = True
 
 
+class OrderPage(BaseModel):
+    orders: List[Order]
+    total_items: int
+    total_pages: int
+    current_page: int
+    limit: int
+
+
 class OrderStatusUpdate(BaseModel):
     status: Optional[OrderStatus] = None
     payment_status: Optional[PaymentStatus] = None
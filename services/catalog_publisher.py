@@ -0,0 +1,352 @@
+# services/catalog_publisher.py
+"""
+Static catalogue snapshots.
+
+Publishes the browsing catalogue as static files under static/catalog/ (served by the
+existing /static mount) so the storefront can browse without calling the API:
+
+    static/catalog/manifest.json                       -> current version, points at files below
+    static/catalog/files/tree.<hash>.json              -> active category tree
+    static/catalog/files/index.<hash>.ndjson           -> one line per active product
+    static/catalog/files/category-<id>-p<n>.<hash>.json -> products under a category (subtree), paged
+
+Every data file is content-hashed and immutable; the manifest is the only mutable file and
+is swapped atomically (temp file + os.replace), so readers always see a complete version.
+
+Modes:
+- incremental (default, runs after admin writes): re-renders the tree, the product index
+  and only the category pages whose products changed (plus their ancestors, whose pages
+  include the subtree); every other category keeps the pages of the current manifest.
+  Files whose content hash already exists are not rewritten, and files referenced by
+  recent manifests are kept so clients holding an older manifest can finish browsing.
+- full: rewrites every file and prunes anything the new manifest doesn't reference.
+
+Everything is rendered from column-only queries; no ORM objects or relationship loads.
+
+Changes are collected with session events (like utils/resource_versions.py) so the
+publisher knows which categories a commit touched and whether only stock moved. Stock-only
+commits - every checkout - are batched onto a STOCK_DEBOUNCE_SECONDS timer instead of
+triggering a publish each.
+
+Usage:
+    python -m services.catalog_publisher [--full]
+"""
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set
+
+from pydantic import TypeAdapter
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from models import Category, Product
+from schemas import CategoryTree, ProductMinimal
+
+CATALOG_DIR = os.path.join("static", "catalog")
+FILES_DIR = os.path.join(CATALOG_DIR, "files")
+MANIFEST_PATH = os.path.join(CATALOG_DIR, "manifest.json")
+HISTORY_PATH = os.path.join(CATALOG_DIR, ".history.json")
+PAGE_SIZE = 100
+KEEP_VERSIONS = 3
+DEBOUNCE_SECONDS = 2.0
+STOCK_DEBOUNCE_SECONDS = 300.0
+PENDING_KEY = "pending_catalog_changes"
+
+TREE_COLUMNS = (
+    Category.id, Category.name, Category.slug, Category.description, Category.image, Category.icon,
+    Category.is_active, Category.parent_id, Category.display_order, Category.product_count,
+    Category.active_product_count, Category.total_product_count, Category.total_active_product_count,
+)
+PRODUCT_COLUMNS = (
+    Product.id, Product.name, Product.slug, Product.price, Product.original_price, Product.image,
+    Product.category_id, Product.is_active, Product.is_featured, Product.on_sale, Product.stock_quantity,
+    Product.created_at,
+)
+PRODUCT_COLUMN_KEYS = set(inspect(Product).column_attrs.keys())
+STOCK_COLUMNS = {"stock_quantity"}
+
+_tree_adapter = TypeAdapter(List[CategoryTree])
+_products_adapter = TypeAdapter(List[ProductMinimal])
+
+
+def _dumps(data: Any) -> bytes:
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=str).encode()
+
+
+def _atomic_write(path: str, data: bytes):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _load_manifest() -> Optional[Dict[str, Any]]:
+    try:
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+class CatalogPublisher:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timer: Optional[threading.Timer] = None
+        self.pending_lock = threading.Lock()
+        self.pending_all = False
+        self.pending_categories: Set[int] = set()
+
+    def _write_file(self, stem: str, extension: str, data: bytes, force: bool, written: Set[str]) -> str:
+        digest = hashlib.sha256(data).hexdigest()[:16]
+        name = f"{stem}.{digest}.{extension}"
+        path = os.path.join(FILES_DIR, name)
+        if force or not os.path.exists(path):
+            _atomic_write(path, data)
+        written.add(name)
+        return f"files/{name}"
+
+    def render(
+        self,
+        db,
+        changed: Optional[Set[int]] = None,
+        previous: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Render the tree, the index and category pages. With `previous` (the current manifest),
+        categories outside `changed` and their ancestors reuse their existing page files.
+        """
+        categories = db.query(*TREE_COLUMNS).order_by(Category.display_order, Category.id).all()
+        active = [c for c in categories if c.is_active]
+        parents = {c.id: c.parent_id for c in categories}
+
+        children: Dict[Optional[int], List[int]] = defaultdict(list)
+        for category in active:
+            children[category.parent_id].append(category.id)
+
+        def subtree(category_id: int) -> List[int]:
+            ids, stack = [], [category_id]
+            while stack:
+                current = stack.pop()
+                ids.append(current)
+                stack.extend(children.get(current, []))
+            return ids
+
+        # Tree: active roots, every child (as the Category.subcategories relationship returns them)
+        nodes = {c.id: {**c._asdict(), "subcategories": []} for c in categories}
+        for category in categories:
+            if category.parent_id in nodes:
+                nodes[category.parent_id]["subcategories"].append(nodes[category.id])
+        roots = [nodes[c.id] for c in active if c.parent_id is None]
+        tree = _tree_adapter.dump_python(_tree_adapter.validate_python(roots), mode="json")
+
+        products = (
+            db.query(*PRODUCT_COLUMNS)
+            .filter(Product.is_active == True)
+            .order_by(Product.created_at.desc(), Product.id.desc())
+            .all()
+        )
+        index_lines = [
+            _dumps({
+                "id": p.id, "name": p.name, "slug": p.slug, "price": p.price,
+                "original_price": p.original_price, "image": p.image, "category_id": p.category_id,
+                "is_featured": p.is_featured, "on_sale": p.on_sale, "stock_quantity": p.stock_quantity,
+            })
+            for p in products
+        ]
+
+        # A category's pages cover its subtree, so a change dirties it and every ancestor
+        dirty: Optional[Set[int]] = None
+        if changed is not None and previous is not None:
+            dirty = set()
+            for category_id in changed:
+                while category_id is not None and category_id not in dirty:
+                    dirty.add(category_id)
+                    category_id = parents.get(category_id)
+
+        pages: Dict[str, Dict[str, Any]] = {}
+        reused: Dict[str, Dict[str, Any]] = {}
+        to_render = []
+        for category in active:
+            entry = (previous or {}).get("categories", {}).get(category.slug)
+            if (
+                dirty is not None and category.id not in dirty and entry and entry.get("id") == category.id
+                and all(os.path.exists(os.path.join(CATALOG_DIR, page)) for page in entry["pages"])
+            ):
+                reused[category.slug] = entry
+            else:
+                to_render.append(category)
+
+        by_category: Dict[int, List[Any]] = defaultdict(list)
+        for product in products:
+            by_category[product.category_id].append(product)
+
+        for category in to_render:
+            items = sorted(
+                (p for cid in subtree(category.id) for p in by_category.get(cid, [])),
+                key=lambda p: (p.created_at or datetime.min.replace(tzinfo=timezone.utc), p.id),
+                reverse=True,
+            )
+            serialized = _products_adapter.dump_python(
+                _products_adapter.validate_python(items, from_attributes=True), mode="json"
+            )
+            chunks = [serialized[i:i + PAGE_SIZE] for i in range(0, len(serialized), PAGE_SIZE)] or [[]]
+            pages[category.slug] = {"id": category.id, "total": len(serialized), "chunks": chunks}
+
+        order = [c.slug for c in active]
+        return {
+            "tree": tree,
+            "index": b"\n".join(index_lines) + b"\n",
+            "pages": pages,
+            "reused": reused,
+            "order": order,
+        }
+
+    def publish(self, full: bool = False, categories: Optional[Set[int]] = None) -> Dict[str, Any]:
+        """
+        Write a new snapshot. `categories` limits page rendering to those categories (and
+        their ancestors); None re-renders every category page.
+        """
+        with self.lock:
+            os.makedirs(FILES_DIR, exist_ok=True)
+            previous = None if full or categories is None else _load_manifest()
+            with SessionLocal() as db:
+                rendered = self.render(db, categories, previous)
+
+            written: Set[str] = set()
+            manifest: Dict[str, Any] = {
+                "generated_at": datetime.now(timezone.utc).isoformat(),
+                "page_size": PAGE_SIZE,
+                "tree": self._write_file("tree", "json", _dumps(rendered["tree"]), full, written),
+                "index": self._write_file("index", "ndjson", rendered["index"], full, written),
+                "categories": {},
+            }
+            for slug in rendered["order"]:
+                if slug in rendered["reused"]:
+                    entry = rendered["reused"][slug]
+                    written.update(os.path.basename(page) for page in entry["pages"])
+                    manifest["categories"][slug] = entry
+                    continue
+                page = rendered["pages"][slug]
+                manifest["categories"][slug] = {
+                    "id": page["id"],
+                    "total": page["total"],
+                    "pages": [
+                        self._write_file(f"category-{page['id']}-p{n}", "json", _dumps(chunk), full, written)
+                        for n, chunk in enumerate(page["chunks"], start=1)
+                    ],
+                }
+
+            manifest["version"] = hashlib.sha256(_dumps(sorted(written))).hexdigest()[:16]
+            _atomic_write(MANIFEST_PATH, _dumps(manifest))
+            self._prune(written, keep_history=not full)
+            mode = "full" if full else f"incremental, {len(rendered['pages'])} categories rendered"
+            print(f"📦 Published catalog snapshot {manifest['version']} ({len(written)} files, {mode})")
+            return manifest
+
+    def _prune(self, current: Set[str], keep_history: bool):
+        history: List[List[str]] = []
+        if keep_history and os.path.exists(HISTORY_PATH):
+            with open(HISTORY_PATH) as f:
+                history = json.load(f)
+        history = (history + [sorted(current)])[-KEEP_VERSIONS:]
+        _atomic_write(HISTORY_PATH, _dumps(history))
+
+        keep = {name for version in history for name in version}
+        for name in os.listdir(FILES_DIR):
+            if name not in keep and not name.startswith(".tmp-"):
+                os.remove(os.path.join(FILES_DIR, name))
+
+    def schedule(self, categories: Optional[Set[int]] = None, stock_only: bool = False):
+        """
+        Debounced incremental publish after catalogue writes commit. categories=None means
+        every category page. Stock-only changes ride along with a publish that is already
+        due, or wait STOCK_DEBOUNCE_SECONDS so a stream of checkouts costs one publish.
+        """
+        with self.pending_lock:
+            if categories is None:
+                self.pending_all = True
+            else:
+                self.pending_categories |= categories
+            if self.timer is not None:
+                if stock_only:
+                    return
+                self.timer.cancel()
+            self.timer = threading.Timer(STOCK_DEBOUNCE_SECONDS if stock_only else DEBOUNCE_SECONDS, self._publish_pending)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def _publish_pending(self):
+        with self.pending_lock:
+            categories = None if self.pending_all else self.pending_categories
+            self.pending_all, self.pending_categories, self.timer = False, set(), None
+        try:
+            self.publish(categories=categories)
+        except Exception as e:
+            print(f"⚠️ Catalog publish failed: {str(e)}")
+
+
+catalog_publisher = CatalogPublisher()
+
+
+# ---------- change collection ----------
+def _record(session: Session, categories: Optional[Set[int]], stock_only: bool = False):
+    pending = session.info.setdefault(PENDING_KEY, {"categories": set(), "stock_only": True})
+    if categories is None:
+        pending["categories"] = None
+    elif pending["categories"] is not None:
+        pending["categories"] |= categories
+    pending["stock_only"] = pending["stock_only"] and stock_only
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_catalog_changes(session: Session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Category):
+            _record(session, None)   # names, slugs and hierarchy show up on every page
+        elif isinstance(obj, Product):
+            state = inspect(obj)
+            changed = None
+            if obj in session.dirty:
+                changed = {key for key in PRODUCT_COLUMN_KEYS if state.attrs[key].history.has_changes()}
+                if not changed:
+                    continue
+            # Old and new category, so a move re-renders both sides
+            ids = {cid for cid in state.attrs.category_id.history.sum() if cid is not None}
+            _record(session, ids or None, stock_only=changed is not None and changed <= STOCK_COLUMNS)
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _collect_bulk_catalog_changes(orm_execute_state):
+    mapper = orm_execute_state.bind_mapper
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and mapper is not None and mapper.class_ in (Category, Product):
+        _record(orm_execute_state.session, None)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _schedule_publish(session: Session):
+    if session.in_nested_transaction():
+        return
+    pending = session.info.pop(PENDING_KEY, None)
+    if pending and settings.CATALOG_PUBLISH_ENABLED:
+        catalog_publisher.schedule(pending["categories"], pending["stock_only"])
+
+
+@event.listens_for(SessionLocal, "after_soft_rollback")
+def _discard_catalog_changes(session: Session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(PENDING_KEY, None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publish static catalogue snapshot")
+    parser.add_argument("--full", action="store_true", help="Rewrite every file and prune unreferenced ones")
+    args = parser.parse_args()
+    catalog_publisher.publish(full=args.full)
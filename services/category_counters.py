@@ -0,0 +1,190 @@
+# services/category_counters.py
+"""
+Maintained per-category product counters.
+
+Category.product_count / active_product_count count products directly in a category;
+total_product_count / total_active_product_count include every descendant category.
+
+Counters are updated in the same transaction as the product write: a before_flush
+listener turns pending product inserts, deletes, moves (category_id changes) and
+activations into deltas, and applies them with plain UPDATE ... SET n = n + delta
+statements to the category and each of its ancestors. Re-parenting a category moves
+its subtree totals from the old ancestor chain to the new one. Category objects already
+loaded in the session get their counter attributes expired, so the next access reads
+the updated values instead of the stale ones.
+
+Bulk statements (query.update()/delete() on products) bypass the ORM unit of work and
+are not counted; run the rebuild after any such script:
+
+    python -m services.category_counters
+"""
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import case, event, func, inspect, select, update
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import Category, Product
+
+categories_table = Category.__table__
+products_table = Product.__table__
+
+COUNTER_COLUMNS = ("product_count", "active_product_count", "total_product_count", "total_active_product_count")
+
+
+def _old_value(obj, attr: str):
+    history = inspect(obj).attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return getattr(obj, attr)
+
+
+def _old_value_unknown(obj, attr: str) -> bool:
+    # Assigned while expired (e.g. after a commit): the ORM never loaded the value it replaces
+    history = inspect(obj).attrs[attr].history
+    return bool(history.added) and not history.deleted and not history.unchanged
+
+
+def _is_active(value) -> bool:
+    # Column default is True, and defaults are only applied at INSERT time
+    return value is None or bool(value)
+
+
+def _ancestors(parents: Dict[int, Optional[int]], category_id: Optional[int]) -> List[int]:
+    chain, seen = [], set()
+    while category_id is not None and category_id not in seen:
+        seen.add(category_id)
+        chain.append(category_id)
+        category_id = parents.get(category_id)
+    return chain
+
+
+@event.listens_for(SessionLocal, "before_flush")
+def _track_product_counts(session: Session, flush_context, instances):
+    # category_id -> [count delta, active count delta]
+    direct: Dict[int, List[int]] = defaultdict(lambda: [0, 0])
+
+    def add(category_id: Optional[int], count: int, active: bool):
+        if category_id is not None:
+            direct[category_id][0] += count
+            direct[category_id][1] += count if active else 0
+
+    for obj in session.new:
+        if isinstance(obj, Product):
+            add(obj.category_id, 1, _is_active(obj.is_active))
+    for obj in session.deleted:
+        if isinstance(obj, Product):
+            add(_old_value(obj, "category_id"), -1, _is_active(_old_value(obj, "is_active")))
+
+    # Stored values for products whose old category/active flag the session never saw
+    unknown = [
+        obj.id for obj in session.dirty
+        if isinstance(obj, Product) and (_old_value_unknown(obj, "category_id") or _old_value_unknown(obj, "is_active"))
+    ]
+    stored: Dict[int, Tuple[Optional[int], Optional[bool]]] = {}
+    if unknown:
+        rows = session.connection().execute(
+            select(products_table.c.id, products_table.c.category_id, products_table.c.is_active)
+            .where(products_table.c.id.in_(unknown))
+        )
+        stored = {row.id: (row.category_id, row.is_active) for row in rows}
+
+    moved_categories: List[Tuple[int, Optional[int], Optional[int], int, int]] = []
+    for obj in session.dirty:
+        if isinstance(obj, Product):
+            if obj.id in stored:
+                old_category, old_active = stored[obj.id][0], _is_active(stored[obj.id][1])
+            else:
+                old_category, old_active = _old_value(obj, "category_id"), _is_active(_old_value(obj, "is_active"))
+            new_category, new_active = obj.category_id, _is_active(obj.is_active)
+            if (old_category, old_active) != (new_category, new_active):
+                add(old_category, -1, old_active)
+                add(new_category, 1, new_active)
+        elif isinstance(obj, Category) and inspect(obj).attrs.parent_id.history.has_changes():
+            moved_categories.append((
+                obj.id, _old_value(obj, "parent_id"), obj.parent_id,
+                obj.total_product_count or 0, obj.total_active_product_count or 0,
+            ))
+
+    direct = {cid: delta for cid, delta in direct.items() if delta != [0, 0]}
+    if not direct and not moved_categories:
+        return
+
+    connection = session.connection()
+    parents = dict(connection.execute(select(categories_table.c.id, categories_table.c.parent_id)).all())
+
+    # category_id -> [product_count, active_product_count, total_product_count, total_active_product_count] deltas
+    deltas: Dict[int, List[int]] = defaultdict(lambda: [0, 0, 0, 0])
+    for category_id, (count, active) in direct.items():
+        deltas[category_id][0] += count
+        deltas[category_id][1] += active
+        for ancestor in _ancestors(parents, category_id):
+            deltas[ancestor][2] += count
+            deltas[ancestor][3] += active
+
+    for category_id, old_parent, new_parent, total, total_active in moved_categories:
+        for ancestor in _ancestors(parents, old_parent):
+            deltas[ancestor][2] -= total
+            deltas[ancestor][3] -= total_active
+        parents[category_id] = new_parent
+        for ancestor in _ancestors(parents, new_parent):
+            deltas[ancestor][2] += total
+            deltas[ancestor][3] += total_active
+
+    category_mapper = inspect(Category)
+    for category_id, values in deltas.items():
+        if not any(values):
+            continue
+        connection.execute(
+            update(categories_table)
+            .where(categories_table.c.id == category_id)
+            .values({
+                column: categories_table.c[column] + delta
+                for column, delta in zip(COUNTER_COLUMNS, values) if delta
+            })
+        )
+        loaded = session.identity_map.get(category_mapper.identity_key_from_primary_key((category_id,)))
+        if loaded is not None and inspect(loaded).persistent:
+            session.expire(loaded, list(COUNTER_COLUMNS))
+
+
+def rebuild_category_counters(db: Session) -> int:
+    """Recompute every counter from scratch (one grouped query + one batched update)."""
+    direct: Dict[int, Tuple[int, int]] = {
+        category_id: (count, active or 0)
+        for category_id, count, active in db.query(
+            Product.category_id,
+            func.count(Product.id),
+            func.sum(case((Product.is_active == True, 1), else_=0)),
+        ).group_by(Product.category_id).all()
+    }
+    parents = dict(db.query(Category.id, Category.parent_id).all())
+
+    totals: Dict[int, List[int]] = {category_id: [0, 0] for category_id in parents}
+    for category_id, (count, active) in direct.items():
+        for ancestor in _ancestors(parents, category_id):
+            totals[ancestor][0] += count
+            totals[ancestor][1] += active
+
+    rows = [
+        {
+            "id": category_id,
+            "product_count": direct.get(category_id, (0, 0))[0],
+            "active_product_count": direct.get(category_id, (0, 0))[1],
+            "total_product_count": totals[category_id][0],
+            "total_active_product_count": totals[category_id][1],
+        }
+        for category_id in parents
+    ]
+    db.bulk_update_mappings(Category, rows)
+    db.commit()
+    return len(rows)
+
+
+if __name__ == "__main__":
+    with SessionLocal() as db:
+        updated = rebuild_category_counters(db)
+    print(f"✅ Rebuilt product counters for {updated} categories")
@@ -0,0 +1,152 @@
+# services/deletion_queue.py
+"""
+Background deletion of replaced/removed images.
+
+Admin edits used to call cloudinary.uploader.destroy inline, so every save waited on a
+Cloudinary round trip. Now:
+- release_image() stashes URLs on the session (queue_after_commit); they are only handed to
+  the queue once the transaction commits, and dropped on rollback, so a failed save never
+  deletes an image that is still referenced.
+- A single daemon worker drains the queue, batching Cloudinary deletes up to the bulk
+  delete_resources limit, and retries failures with exponential backoff.
+
+The queue is in-process; anything lost on shutdown is picked up by clean_oldphotos.py.
+"""
+import queue
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from utils.cloudinary_config import (
+    CLOUDINARY_BULK_DELETE_LIMIT, delete_images_from_cloudinary, public_id_from_url,
+)
+from utils.delete_file import delete_file_if_exists
+
+PENDING_KEY = "pending_image_deletions"
+
+
+class DeletionQueue:
+    def __init__(self, batch_limit: int = CLOUDINARY_BULK_DELETE_LIMIT):
+        self.batch_limit = batch_limit
+        self.max_attempts = settings.DELETION_MAX_ATTEMPTS
+        self.flush_seconds = settings.DELETION_FLUSH_SECONDS
+        self.queue: "queue.Queue[Tuple[str, int]]" = queue.Queue()
+        self.retries: List[Tuple[float, str, int]] = []  # (due_at, url, attempt)
+        self.stats: Dict[str, int] = {"queued": 0, "deleted": 0, "retried": 0, "failed": 0, "batches": 0}
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def enqueue(self, url: str, attempt: int = 0):
+        if not url:
+            return
+        self.start()
+        self.stats["queued"] += 1
+        self.queue.put((url, attempt))
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="image-deletion", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Signal the worker to drain what is already queued and exit."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def pending(self) -> int:
+        return self.queue.qsize() + len(self.retries)
+
+    def _next_batch(self) -> List[Tuple[str, int]]:
+        batch = []
+        try:
+            batch.append(self.queue.get(timeout=self.flush_seconds))
+        except queue.Empty:
+            pass
+        while len(batch) < self.batch_limit:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+
+        now = time.monotonic()
+        due = [item for item in self.retries if item[0] <= now]
+        self.retries = [item for item in self.retries if item[0] > now]
+        batch.extend((url, attempt) for _, url, attempt in due)
+        return batch
+
+    def _retry(self, url: str, attempt: int):
+        if attempt + 1 >= self.max_attempts:
+            self.stats["failed"] += 1
+            print(f"❌ Giving up deleting {url} after {attempt + 1} attempts")
+            return
+        self.stats["retried"] += 1
+        self.retries.append((time.monotonic() + 2 ** attempt, url, attempt + 1))
+
+    def _process(self, batch: List[Tuple[str, int]]):
+        remote: Dict[str, Tuple[str, int]] = {}
+        for url, attempt in batch:
+            public_id = public_id_from_url(url)
+            if public_id:
+                remote[public_id] = (url, attempt)
+                continue
+            try:
+                delete_file_if_exists(url)
+                self.stats["deleted"] += 1
+            except Exception as e:
+                print(f"⚠️ Failed to delete local image {url}: {str(e)}")
+                self._retry(url, attempt)
+
+        if not remote:
+            return
+        self.stats["batches"] += 1
+        try:
+            results = delete_images_from_cloudinary(list(remote))
+        except Exception as e:
+            print(f"⚠️ Cloudinary bulk delete failed: {str(e)}")
+            results = {}
+
+        for public_id, (url, attempt) in remote.items():
+            if results.get(public_id) in ("deleted", "not_found"):
+                self.stats["deleted"] += 1
+            else:
+                self._retry(url, attempt)
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch:
+                self._process(batch)
+            elif self._stop.is_set():
+                return
+
+
+deletion_queue = DeletionQueue()
+
+
+def queue_after_commit(db: Session, url: str):
+    """Schedule an image deletion for when the current transaction commits."""
+    if url:
+        db.info.setdefault(PENDING_KEY, []).append(url)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _flush_pending_deletions(session: Session):
+    if session.in_nested_transaction():
+        return  # savepoint release, the outer transaction can still roll back
+    for url in session.info.pop(PENDING_KEY, []):
+        deletion_queue.enqueue(url)
+
+
+@event.listens_for(SessionLocal, "after_soft_rollback")
+def _discard_pending_deletions(session: Session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(PENDING_KEY, None)
@@ -0,0 +1,146 @@
+# services/product_cache.py
+"""
+Read-through cache for product detail pages (GET /products/{id}, GET /products/slug/{slug}).
+
+Entries are validated Product schemas kept in an LRU keyed by id, with a slug -> id map
+so both lookups share one entry. Invalidation is per row: every committed write that
+touches a product (admin create/update/delete/move, checkout stock decrements) arrives via
+utils/resource_versions.py row subscribers and drops exactly that entry. Bulk statements
+and category writes (the embedded category name/slug) clear the whole cache.
+
+PRODUCT_CACHE_TTL bounds staleness from writes made by other worker processes. With
+PRODUCT_STOCK_TTL set, stock is re-read on its own shorter clock (one primary-key column
+lookup) so price and description can stay cached longer than availability.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session, joinedload
+
+from config import settings
+from models import Product
+from schemas import Product as ProductSchema
+from utils.resource_versions import RowChanges, subscribe_rows
+
+
+class CachedProduct:
+    __slots__ = ("product", "built_at", "stock_checked_at")
+
+    def __init__(self, product: ProductSchema, built_at: float):
+        self.product = product
+        self.built_at = built_at
+        self.stock_checked_at = built_at
+
+
+class ProductCache:
+    def __init__(self, max_entries: int, ttl: float, stock_ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stock_ttl = stock_ttl
+        self.entries: "OrderedDict[int, CachedProduct]" = OrderedDict()
+        self.slugs: Dict[str, int] = {}
+        self.generation = 0
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    # ---------- invalidation ----------
+    def _drop(self, product_id: int):
+        entry = self.entries.pop(product_id, None)
+        if entry is not None:
+            self.slugs.pop(entry.product.slug, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.slugs.clear()
+            self.generation += 1
+
+    def on_rows_changed(self, changes: RowChanges):
+        if "categories" in changes or ("products" in changes and changes["products"] is None):
+            self.clear()
+            return
+        ids = changes.get("products")
+        if not ids:
+            return
+        with self.lock:
+            for product_id in ids:
+                self._drop(product_id)
+            self.generation += 1
+            self.stats["invalidations"] += len(ids)
+
+    # ---------- lookups ----------
+    def _lookup(self, product_id: Optional[int]) -> Optional[CachedProduct]:
+        if product_id is None:
+            return None
+        with self.lock:
+            entry = self.entries.get(product_id)
+            if entry is None:
+                return None
+            if time.monotonic() - entry.built_at > self.ttl:
+                self._drop(product_id)
+                return None
+            self.entries.move_to_end(product_id)
+            return entry
+
+    def _store(self, product: ProductSchema, generation: int, built_at: float):
+        with self.lock:
+            if generation != self.generation:
+                return   # a write committed while we were loading; don't cache what may be stale
+            self._drop(product.id)
+            self.entries[product.id] = CachedProduct(product, built_at)
+            self.slugs[product.slug] = product.id
+            while len(self.entries) > self.max_entries:
+                _, evicted = self.entries.popitem(last=False)
+                self.slugs.pop(evicted.product.slug, None)
+
+    def _with_fresh_stock(self, db: Session, entry: CachedProduct) -> Optional[ProductSchema]:
+        if not self.stock_ttl or time.monotonic() - entry.stock_checked_at <= self.stock_ttl:
+            return entry.product
+        row = db.query(Product.stock_quantity, Product.is_active).filter(Product.id == entry.product.id).first()
+        if row is None or not row.is_active:
+            with self.lock:
+                self._drop(entry.product.id)
+            return None
+        if row.stock_quantity != entry.product.stock_quantity:
+            entry.product = entry.product.model_copy(update={"stock_quantity": row.stock_quantity})
+        entry.stock_checked_at = time.monotonic()
+        return entry.product
+
+    def _load(self, db: Session, *criteria) -> Optional[ProductSchema]:
+        generation, built_at = self.generation, time.monotonic()
+        product = (
+            db.query(Product)
+            .options(joinedload(Product.category))
+            .filter(Product.is_active == True, *criteria)
+            .first()
+        )
+        if product is None:
+            return None
+        schema = ProductSchema.model_validate(product, from_attributes=True)
+        self._store(schema, generation, built_at)
+        return schema
+
+    def _get(self, db: Session, product_id: Optional[int], *criteria) -> Optional[ProductSchema]:
+        entry = self._lookup(product_id)
+        if entry is not None:
+            product = self._with_fresh_stock(db, entry)
+            if product is not None:
+                self.stats["hits"] += 1
+                return product
+        self.stats["misses"] += 1
+        return self._load(db, *criteria)
+
+    def get_by_id(self, db: Session, product_id: int) -> Optional[ProductSchema]:
+        return self._get(db, product_id, Product.id == product_id)
+
+    def get_by_slug(self, db: Session, slug: str) -> Optional[ProductSchema]:
+        return self._get(db, self.slugs.get(slug), Product.slug == slug)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {**self.stats, "entries": len(self.entries)}
+
+
+product_cache = ProductCache(settings.PRODUCT_CACHE_SIZE, settings.PRODUCT_CACHE_TTL, settings.PRODUCT_STOCK_TTL)
+subscribe_rows(product_cache.on_rows_changed)
@@ -0,0 +1,218 @@
+# services/product_search.py
+"""
+Typo-tolerant product search behind GET /products?search=.
+
+The index lives in memory and holds active products' name and description terms:
+- every term is normalized (case and accents folded, see utils/text_normalize.py)
+- a trigram -> terms map generates fuzzy candidates for each query token
+- candidates are confirmed with a bounded edit distance (1 typo for short words, 2 for longer)
+- the last query token also matches as a prefix, so "mathem" finds "mathematics"
+
+Scoring per product: for each query token, the best matching term's similarity times the
+field weight (name 3, description 1), times IDF so rare words dominate. Products must match
+every query token. Featured products and products that sell get a multiplicative boost.
+
+When a query token had no exact match, the closest known term (most frequent on ties) is
+used to build a `did_you_mean` suggestion, e.g. "kiswahli grade 4" -> "kiswahili grade 4".
+
+Freshness follows services/search_index.py: committed product writes queue the changed ids
+(utils/resource_versions.py row subscribers) and the next search reloads only those rows;
+sales figures are refreshed with a periodic full rebuild.
+"""
+import math
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import OrderItem, Product
+from utils.resource_versions import RowChanges, subscribe_rows
+from utils.text_normalize import edit_distance, ngrams, tokenize
+
+NAME_WEIGHT = 3.0
+DESCRIPTION_WEIGHT = 1.0
+FEATURED_BOOST = 1.25
+SALES_BOOST = 0.1          # score *= 1 + SALES_BOOST * log1p(units sold)
+MIN_TRIGRAM_OVERLAP = 0.3  # share of a query token's trigrams a candidate term must contain
+REFRESH_SECONDS = 600
+
+
+def max_typos(token: str) -> int:
+    if len(token) <= 3:
+        return 0
+    return 1 if len(token) <= 6 else 2
+
+
+class ProductDoc:
+    __slots__ = ("id", "terms", "is_featured", "sales")
+
+    def __init__(self, id: int, name: str, description: Optional[str], is_featured: bool, sales: float):
+        self.id = id
+        # term -> best field weight it appears in
+        self.terms: Dict[str, float] = {}
+        for term in tokenize(description or ""):
+            self.terms[term] = DESCRIPTION_WEIGHT
+        for term in tokenize(name):
+            self.terms[term] = NAME_WEIGHT
+        self.is_featured = bool(is_featured)
+        self.sales = sales
+
+    @property
+    def boost(self) -> float:
+        return (FEATURED_BOOST if self.is_featured else 1.0) * (1 + SALES_BOOST * math.log1p(self.sales))
+
+
+class ProductSearchIndex:
+    def __init__(self):
+        self.docs: Dict[int, ProductDoc] = {}
+        self.postings: Dict[str, Set[int]] = {}       # term -> product ids
+        self.trigrams: Dict[str, Set[str]] = {}       # trigram -> terms
+        self.built_at = 0.0
+        self.needs_full = True
+        self.pending: Set[int] = set()
+        self.lock = threading.Lock()
+
+    # ---------- maintenance ----------
+    def on_rows_changed(self, changes: RowChanges):
+        if "products" not in changes:
+            return
+        with self.lock:
+            if changes["products"] is None:
+                self.needs_full = True
+            else:
+                self.pending.update(i for i in changes["products"] if i is not None)
+
+    def _load(self, db: Session, ids: Optional[Set[int]] = None) -> List[ProductDoc]:
+        query = db.query(Product.id, Product.name, Product.description, Product.is_featured).filter(Product.is_active == True)
+        sales_query = db.query(OrderItem.product_id, func.sum(OrderItem.quantity)).group_by(OrderItem.product_id)
+        if ids is not None:
+            query = query.filter(Product.id.in_(ids))
+            sales_query = sales_query.filter(OrderItem.product_id.in_(ids))
+        sales = {pid: float(total or 0) for pid, total in sales_query.all()}
+        return [ProductDoc(pid, name, description, featured, sales.get(pid, 0)) for pid, name, description, featured in query.all()]
+
+    def _reindex(self, docs: Dict[int, ProductDoc]):
+        postings: Dict[str, Set[int]] = defaultdict(set)
+        for doc in docs.values():
+            for term in doc.terms:
+                postings[term].add(doc.id)
+        trigrams: Dict[str, Set[str]] = defaultdict(set)
+        for term in postings:
+            for gram in ngrams(term):
+                trigrams[gram].add(term)
+        # Swap whole structures so concurrent searches see either the old or the new index
+        self.docs, self.postings, self.trigrams = docs, dict(postings), dict(trigrams)
+
+    def rebuild(self, db: Session):
+        self._reindex({doc.id: doc for doc in self._load(db)})
+        self.built_at = time.monotonic()
+        self.needs_full = False
+        self.pending = set()
+
+    def apply_pending(self, db: Session):
+        pending, self.pending = self.pending, set()
+        docs = {pid: doc for pid, doc in self.docs.items() if pid not in pending}
+        for doc in self._load(db, pending):
+            docs[doc.id] = doc
+        self._reindex(docs)
+
+    def ensure_current(self):
+        if not (self.needs_full or self.pending or time.monotonic() - self.built_at > REFRESH_SECONDS):
+            return
+        with self.lock:
+            with SessionLocal() as db:
+                if self.needs_full or time.monotonic() - self.built_at > REFRESH_SECONDS:
+                    self.rebuild(db)
+                elif self.pending:
+                    self.apply_pending(db)
+
+    # ---------- queries ----------
+    def _candidates(self, token: str, is_last: bool) -> Dict[str, Tuple[float, bool]]:
+        """term -> (similarity in 0..1, is_typo) for every indexed term close enough to the query token"""
+        postings, trigrams = self.postings, self.trigrams
+        matches: Dict[str, Tuple[float, bool]] = {}
+        if token in postings:
+            matches[token] = (1.0, False)
+
+        grams = set(ngrams(token))
+        overlap: Dict[str, int] = defaultdict(int)
+        for gram in grams:
+            for term in trigrams.get(gram, ()):
+                overlap[term] += 1
+
+        allowed = max_typos(token)
+        for term, shared in overlap.items():
+            if term in matches:
+                continue
+            if is_last and len(token) >= 2 and term.startswith(token):
+                matches[term] = (0.9, False)
+                continue
+            if allowed == 0 or shared < MIN_TRIGRAM_OVERLAP * len(grams):
+                continue
+            distance = edit_distance(token, term, allowed)
+            if distance <= allowed:
+                matches[term] = (1.0 - distance / (len(token) + 1), True)
+
+        if is_last and len(token) < 2 and token not in matches:
+            # One-letter prefixes are too broad for the trigram map; scan terms directly
+            matches.update({term: (0.9, False) for term in postings if term.startswith(token)})
+        return matches
+
+    def search(self, q: str) -> Tuple[List[int], Optional[str]]:
+        """
+        Every matching product id, best first, and a spelling suggestion when the query
+        contained unknown words that could be corrected. Nothing is truncated here: the
+        router intersects the ids with its filters, so counts, facets and explicit sorts
+        see every match and only the final page is sliced.
+        """
+        self.ensure_current()
+        tokens = tokenize(q)
+        if not tokens:
+            return [], None
+
+        docs, postings = self.docs, self.postings
+        total_docs = max(len(docs), 1)
+        scores: Optional[Dict[int, float]] = None
+        corrected: List[str] = []
+        changed = False
+
+        for position, token in enumerate(tokens):
+            is_last = position == len(tokens) - 1
+            token_scores: Dict[int, float] = defaultdict(float)
+            candidates = self._candidates(token, is_last)
+
+            for term, (similarity, _) in candidates.items():
+                idf = math.log(1 + total_docs / len(postings[term]))
+                for pid in postings[term]:
+                    doc = docs.get(pid)
+                    if doc is None:
+                        continue
+                    score = similarity * doc.terms[term] * idf
+                    if score > token_scores[pid]:
+                        token_scores[pid] = score
+
+            # Spelling suggestion: the closest real term, most common on ties (prefix matches don't count)
+            typos = [(similarity, len(postings[term]), term) for term, (similarity, is_typo) in candidates.items() if is_typo]
+            best = max(typos, default=None)
+            if token in postings or best is None:
+                corrected.append(token)
+            else:
+                corrected.append(best[2])
+                changed = True
+
+            if scores is None:
+                scores = dict(token_scores)
+            else:
+                scores = {pid: score + token_scores[pid] for pid, score in scores.items() if pid in token_scores}
+
+        ranked = sorted((scores or {}).items(), key=lambda item: (-item[1] * docs[item[0]].boost, item[0]))
+        suggestion = " ".join(corrected) if changed else None
+        return [pid for pid, _ in ranked], suggestion
+
+
+product_search = ProductSearchIndex()
+subscribe_rows(product_search.on_rows_changed)
@@ -0,0 +1,172 @@
+# services/search_index.py
+"""
+In-memory prefix index for search-box typeahead.
+
+Active product and category names are normalized (utils/text_normalize.py) and every
+token is stored in one sorted array of (token, entry id). A suggestion query bisects to
+the first query token's prefix range, checks the remaining tokens against each candidate,
+and keeps the top K by popularity (units sold for products, active product count for
+categories) - no database access on the hot path.
+
+Updates are incremental: committed writes to products/categories (utils/resource_versions.py
+row subscribers) queue the changed ids, and the next query reloads just those rows and
+re-sorts the in-memory array. Popularity is refreshed with a full rebuild every
+POPULARITY_REFRESH_SECONDS since sales don't go through the catalogue tables.
+"""
+import heapq
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import Category, OrderItem, Product
+from utils.resource_versions import RowChanges, subscribe_rows
+from utils.text_normalize import normalize
+
+POPULARITY_REFRESH_SECONDS = 600
+MAX_SUGGESTIONS = 20
+
+# entry key: ("product" | "category", id)
+EntryKey = Tuple[str, int]
+
+
+class Entry:
+    __slots__ = ("kind", "id", "name", "slug", "image", "tokens", "popularity")
+
+    def __init__(self, kind: str, id: int, name: str, slug: str, image: Optional[str], popularity: float):
+        self.kind = kind
+        self.id = id
+        self.name = name
+        self.slug = slug
+        self.image = image
+        self.tokens = tuple(normalize(name).split())
+        self.popularity = popularity
+
+    def as_dict(self) -> Dict:
+        return {"type": self.kind, "id": self.id, "name": self.name, "slug": self.slug, "image": self.image}
+
+
+class SuggestIndex:
+    def __init__(self):
+        self.entries: Dict[EntryKey, Entry] = {}
+        self.keys: List[Tuple[str, EntryKey]] = []   # sorted (token, entry key)
+        self.built_at = 0.0
+        self.needs_full = True
+        self.pending: Dict[str, Set[int]] = {}
+        self.lock = threading.Lock()
+
+    # ---------- maintenance ----------
+    def on_rows_changed(self, changes: RowChanges):
+        with self.lock:
+            for table in ("products", "categories"):
+                if table not in changes:
+                    continue
+                ids = changes[table]
+                if ids is None:
+                    self.needs_full = True
+                else:
+                    self.pending.setdefault(table, set()).update(i for i in ids if i is not None)
+
+    def _product_popularity(self, db: Session, ids: Optional[Set[int]] = None) -> Dict[int, float]:
+        query = db.query(OrderItem.product_id, func.sum(OrderItem.quantity)).group_by(OrderItem.product_id)
+        if ids is not None:
+            query = query.filter(OrderItem.product_id.in_(ids))
+        return {pid: float(total or 0) for pid, total in query.all()}
+
+    def _category_popularity(self, db: Session, ids: Optional[Set[int]] = None) -> Dict[int, float]:
+        query = (
+            db.query(Product.category_id, func.count(Product.id))
+            .filter(Product.is_active == True)
+            .group_by(Product.category_id)
+        )
+        if ids is not None:
+            query = query.filter(Product.category_id.in_(ids))
+        return {cid: float(count) for cid, count in query.all()}
+
+    def _load_products(self, db: Session, ids: Optional[Set[int]] = None) -> List[Entry]:
+        query = db.query(Product.id, Product.name, Product.slug, Product.image).filter(Product.is_active == True)
+        if ids is not None:
+            query = query.filter(Product.id.in_(ids))
+        popularity = self._product_popularity(db, ids)
+        return [Entry("product", pid, name, slug, image, popularity.get(pid, 0)) for pid, name, slug, image in query.all()]
+
+    def _load_categories(self, db: Session, ids: Optional[Set[int]] = None) -> List[Entry]:
+        query = db.query(Category.id, Category.name, Category.slug, Category.image).filter(Category.is_active == True)
+        if ids is not None:
+            query = query.filter(Category.id.in_(ids))
+        popularity = self._category_popularity(db, ids)
+        return [Entry("category", cid, name, slug, image, popularity.get(cid, 0)) for cid, name, slug, image in query.all()]
+
+    def _reindex(self, entries: Dict[EntryKey, Entry]):
+        keys = sorted((token, key) for key, entry in entries.items() for token in set(entry.tokens))
+        # Swap both structures together so concurrent suggest() calls see either the old or the new index
+        self.keys, self.entries = keys, entries
+
+    def rebuild(self, db: Session):
+        entries = self._load_products(db) + self._load_categories(db)
+        self._reindex({(e.kind, e.id): e for e in entries})
+        self.built_at = time.monotonic()
+        self.needs_full = False
+        self.pending = {}
+
+    def apply_pending(self, db: Session):
+        pending, self.pending = self.pending, {}
+        entries = dict(self.entries)
+        for table, kind, loader in (("products", "product", self._load_products), ("categories", "category", self._load_categories)):
+            ids = pending.get(table)
+            if not ids:
+                continue
+            for entry_id in ids:
+                entries.pop((kind, entry_id), None)   # deleted or deactivated rows stay out
+            for entry in loader(db, ids):
+                entries[(entry.kind, entry.id)] = entry
+        self._reindex(entries)
+
+    def ensure_current(self):
+        stale = time.monotonic() - self.built_at > POPULARITY_REFRESH_SECONDS
+        if not (self.needs_full or stale or self.pending):
+            return
+        with self.lock:
+            with SessionLocal() as db:
+                if self.needs_full or time.monotonic() - self.built_at > POPULARITY_REFRESH_SECONDS:
+                    self.rebuild(db)
+                elif self.pending:
+                    self.apply_pending(db)
+
+    # ---------- queries ----------
+    def suggest(self, q: str, limit: int = 8) -> List[Dict]:
+        self.ensure_current()
+        tokens = normalize(q).split()
+        if not tokens:
+            return []
+
+        keys, entries = self.keys, self.entries   # snapshot; maintenance swaps, never mutates in place
+        first, rest = tokens[0], tokens[1:]
+        start = bisect_left(keys, (first,))
+
+        candidates: Set[EntryKey] = set()
+        for i in range(start, len(keys)):
+            token, key = keys[i]
+            if not token.startswith(first):
+                break
+            candidates.add(key)
+
+        def matches(entry: Entry) -> bool:
+            return all(any(t.startswith(q_token) for t in entry.tokens) for q_token in rest)
+
+        scored = (
+            # Names that start with the query rank first, then popularity, then shorter names
+            ((entry.tokens[0].startswith(first), entry.popularity, -len(entry.name)), entry)
+            for entry in (entries[key] for key in candidates if key in entries)
+            if matches(entry)
+        )
+        top = heapq.nlargest(min(limit, MAX_SUGGESTIONS), scored, key=lambda item: item[0])
+        return [entry.as_dict() for _, entry in top]
+
+
+suggest_index = SuggestIndex()
+subscribe_rows(suggest_index.on_rows_changed)
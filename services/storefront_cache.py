@@ -0,0 +1,133 @@
+# services/storefront_cache.py
+"""
+Precomputed fragments for the storefront home page.
+
+Each fragment declares the resources it depends on. A fragment is rebuilt only when
+one of those resource versions has moved (see utils/resource_versions.py) or its TTL
+has passed (the TTL bounds staleness when several worker processes hold their own
+counters). The assembled home payload is serialized once to JSON bytes with a strong
+ETag, so repeat requests - and every If-None-Match revalidation - skip the database.
+"""
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+
+from config import settings
+from models import Category, HeroBanner, Product
+from schemas import CategoryTree, HeroBanner as HeroBannerSchema, Product as ProductSchema
+from utils.resource_versions import BOOT_ID, get_versions
+
+HOME_PRODUCT_LIMIT = 20
+
+_banners_adapter = TypeAdapter(List[HeroBannerSchema])
+_tree_adapter = TypeAdapter(List[CategoryTree])
+_products_adapter = TypeAdapter(List[ProductSchema])
+
+
+def build_hero_banners(db: Session) -> Any:
+    banners = db.query(HeroBanner).order_by(HeroBanner.created_at.desc()).all()
+    return _banners_adapter.dump_python(_banners_adapter.validate_python(banners, from_attributes=True), mode="json")
+
+
+def build_category_tree(db: Session) -> Any:
+    parents = (
+        db.query(Category)
+        .filter(Category.parent_id == None, Category.is_active == True)
+        .order_by(Category.display_order, Category.id)
+        .all()
+    )
+    return _tree_adapter.dump_python(_tree_adapter.validate_python(parents, from_attributes=True), mode="json")
+
+
+def _product_fragment(db: Session, *criteria) -> Any:
+    products = (
+        db.query(Product)
+        .filter(Product.is_active == True, *criteria)
+        .order_by(Product.created_at.desc())
+        .limit(HOME_PRODUCT_LIMIT)
+        .all()
+    )
+    return _products_adapter.dump_python(_products_adapter.validate_python(products, from_attributes=True), mode="json")
+
+
+def build_featured(db: Session) -> Any:
+    return _product_fragment(db, Product.is_featured == True)
+
+
+def build_on_sale(db: Session) -> Any:
+    return _product_fragment(db, Product.on_sale == True)
+
+
+# fragment name -> (resources it depends on, builder)
+FRAGMENTS: Dict[str, Tuple[Tuple[str, ...], Callable[[Session], Any]]] = {
+    "hero_banners": (("banners",), build_hero_banners),
+    "categories": (("categories", "products"), build_category_tree),  # tree carries product counts
+    "featured": (("products", "categories"), build_featured),
+    "on_sale": (("products", "categories"), build_on_sale),
+}
+
+
+class CachedBody:
+    __slots__ = ("body", "etag", "versions", "built_at")
+
+    def __init__(self, body: bytes, versions: Tuple, built_at: float):
+        self.body = body
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self.versions = versions
+        self.built_at = built_at
+
+
+class StorefrontCache:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.fragments: Dict[str, Tuple[Tuple, float, Any]] = {}  # name -> (versions, built_at, data)
+        self.home: Optional[CachedBody] = None
+        self.lock = threading.Lock()
+
+    def _all_versions(self) -> Tuple:
+        resources = sorted({r for deps, _ in FRAGMENTS.values() for r in deps})
+        return (BOOT_ID,) + get_versions(resources)
+
+    def _fresh(self, versions: Tuple, built_at: float, current: Tuple, now: float) -> bool:
+        return versions == current and now - built_at < self.ttl
+
+    def current_home(self) -> Optional[CachedBody]:
+        """The cached home payload if it is still valid - no DB access."""
+        home = self.home
+        if home and self._fresh(home.versions, home.built_at, self._all_versions(), time.monotonic()):
+            return home
+        return None
+
+    def fragment(self, db: Session, name: str) -> Any:
+        deps, builder = FRAGMENTS[name]
+        current = get_versions(deps)
+        now = time.monotonic()
+        cached = self.fragments.get(name)
+        if cached and self._fresh(cached[0], cached[1], current, now):
+            return cached[2]
+        data = builder(db)
+        self.fragments[name] = (current, now, data)
+        return data
+
+    def get_home(self, db: Session) -> CachedBody:
+        home = self.current_home()
+        if home:
+            return home
+        with self.lock:
+            home = self.current_home()
+            if home:
+                return home
+            # Capture versions before building so a write during the build forces a rebuild next time
+            versions = self._all_versions()
+            payload = {name: self.fragment(db, name) for name in FRAGMENTS}
+            body = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode()
+            self.home = CachedBody(body, versions, time.monotonic())
+            return self.home
+
+
+storefront_cache = StorefrontCache(ttl=settings.STOREFRONT_CACHE_TTL)
@@ -0,0 +1,48 @@
+"""
+Shared test setup.
+
+Tests run against a throwaway SQLite database: DATABASE_URL is pointed at a temp file
+before any app module is imported (database.py builds the engine at import time), and
+every test that asks for `db` gets freshly created tables. `catalogue` adds the small
+category tree most tests build on.
+"""
+import os
+import tempfile
+from types import SimpleNamespace
+
+_tmpdir = tempfile.mkdtemp(prefix="ecommerce-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir, 'test.db')}"
+os.environ.setdefault("CATALOG_PUBLISH_ENABLED", "false")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import pytest  # noqa: E402
+
+from database import Base, SessionLocal, engine  # noqa: E402
+import models  # noqa: E402,F401  (registers tables on Base)
+from models import Category, Product  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def catalogue(db):
+    """Books -> Grade 4 -> one product (Maths 4), committed. Tests add whatever else they need."""
+    books = Category(name="Books", slug="books")
+    db.add(books)
+    db.flush()
+    grade4 = Category(name="Grade 4", slug="grade-4", parent_id=books.id)
+    db.add(grade4)
+    db.flush()
+    product = Product(name="Maths 4", slug="maths-4", price=500, stock_quantity=5, category_id=grade4.id)
+    db.add(product)
+    db.commit()
+    return SimpleNamespace(books=books, grade4=grade4, product=product)
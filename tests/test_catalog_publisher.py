@@ -0,0 +1,88 @@
+"""Static catalogue snapshots: incremental renders and change collection."""
+import json
+import os
+
+import pytest
+
+from config import settings
+from models import Category, Product
+from services import catalog_publisher as publisher_module
+from services.catalog_publisher import catalog_publisher
+
+
+@pytest.fixture
+def catalog_dir(tmp_path, monkeypatch):
+    root = tmp_path / "catalog"
+    monkeypatch.setattr(publisher_module, "CATALOG_DIR", str(root))
+    monkeypatch.setattr(publisher_module, "FILES_DIR", str(root / "files"))
+    monkeypatch.setattr(publisher_module, "MANIFEST_PATH", str(root / "manifest.json"))
+    monkeypatch.setattr(publisher_module, "HISTORY_PATH", str(root / ".history.json"))
+    return root
+
+
+@pytest.fixture
+def stationery(db, catalogue):
+    """A second root category beside the shared catalogue, with one product."""
+    category = Category(name="Stationery", slug="stationery")
+    db.add(category)
+    db.flush()
+    db.add(Product(name="Pencil", slug="pencil", price=20, stock_quantity=100, category_id=category.id))
+    db.commit()
+    return category
+
+
+def _read(catalog_dir, relative):
+    with open(os.path.join(catalog_dir, relative)) as f:
+        return json.load(f)
+
+
+def test_full_publish_renders_tree_and_subtree_pages(db, stationery, catalog_dir):
+    manifest = catalog_publisher.publish(full=True)
+
+    tree = _read(catalog_dir, manifest["tree"])
+    assert [c["slug"] for c in tree] == ["books", "stationery"]
+    assert [c["slug"] for c in tree[0]["subcategories"]] == ["grade-4"]
+    # A parent's pages include its subcategories' products
+    assert [p["slug"] for p in _read(catalog_dir, manifest["categories"]["books"]["pages"][0])] == ["maths-4"]
+    assert manifest["categories"]["stationery"]["total"] == 1
+
+
+def test_incremental_publish_renders_only_affected_categories(db, catalogue, stationery, catalog_dir):
+    before = catalog_publisher.publish(full=True)
+    catalogue.product.price = 550
+    db.commit()
+
+    after = catalog_publisher.publish(categories={catalogue.grade4.id})
+
+    assert after["categories"]["stationery"] == before["categories"]["stationery"]
+    for slug in ("grade-4", "books"):   # the category and its ancestor
+        assert after["categories"][slug]["pages"] != before["categories"][slug]["pages"]
+        assert _read(catalog_dir, after["categories"][slug]["pages"][0])[0]["price"] == 550
+
+
+@pytest.fixture
+def scheduled(monkeypatch):
+    calls = []
+    monkeypatch.setattr(settings, "CATALOG_PUBLISH_ENABLED", True)
+    monkeypatch.setattr(catalog_publisher, "schedule", lambda categories=None, stock_only=False: calls.append((categories, stock_only)))
+    return calls
+
+
+def test_stock_only_commit_is_flagged(db, stationery, scheduled):
+    product = db.query(Product).filter(Product.slug == "pencil").one()
+    product.stock_quantity -= 1
+    db.commit()
+    assert scheduled == [({stationery.id}, True)]
+
+
+def test_product_move_touches_both_categories(db, catalogue, stationery, scheduled):
+    product = db.query(Product).filter(Product.slug == "pencil").one()
+    product.category_id = catalogue.books.id
+    db.commit()
+    assert scheduled == [({stationery.id, catalogue.books.id}, False)]
+
+
+def test_category_edit_renders_everything(db, stationery, scheduled):
+    stationery.name = "Office"
+    db.commit()
+    assert scheduled == [(None, False)]
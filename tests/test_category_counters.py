@@ -0,0 +1,30 @@
+"""Maintained category product counters (services/category_counters.py)."""
+import services.category_counters  # noqa: F401  (registers the flush hook)
+from models import Product
+
+
+def test_loaded_categories_see_new_counts_without_refresh(db, catalogue):
+    books, grade4 = catalogue.books, catalogue.grade4
+    assert (books.total_product_count, grade4.product_count) == (1, 1)   # loaded into the session
+
+    db.add(Product(name="English 4", slug="english-4", price=450, category_id=grade4.id))
+    db.flush()
+
+    assert grade4.product_count == 2
+    assert grade4.active_product_count == 2
+    assert books.product_count == 0
+    assert books.total_product_count == 2
+    assert books.total_active_product_count == 2
+
+
+def test_deactivation_and_delete_update_loaded_counters(db, catalogue):
+    books, grade4, product = catalogue.books, catalogue.grade4, catalogue.product
+
+    product.is_active = False
+    db.flush()
+    assert (grade4.product_count, grade4.active_product_count) == (1, 0)
+    assert books.total_active_product_count == 0
+
+    db.delete(product)
+    db.flush()
+    assert books.total_product_count == 0
@@ -0,0 +1,40 @@
+"""GET /categories views and their documented response models."""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routers import categories
+
+
+@pytest.fixture
+def client(catalogue):
+    app = FastAPI()
+    app.include_router(categories.router, prefix="/categories")
+    return TestClient(app)
+
+
+def test_default_is_summary(client):
+    body = client.get("/categories").json()
+    assert [c["slug"] for c in body] == ["books", "grade-4"]
+    assert "products" not in body[0]
+    assert body[0]["subcategory_ids"] == [body[1]["id"]]
+
+
+def test_tree_nests_without_products(client):
+    body = client.get("/categories", params={"view": "tree"}).json()
+    assert [c["slug"] for c in body] == ["books"]
+    assert [c["slug"] for c in body[0]["subcategories"]] == ["grade-4"]
+    assert "products" not in body[0]
+
+
+def test_full_keeps_embedded_products(client):
+    body = client.get("/categories", params={"view": "full"}).json()
+    grade4 = next(c for c in body if c["slug"] == "grade-4")
+    assert [p["slug"] for p in grade4["products"]] == ["maths-4"]
+
+
+def test_openapi_documents_every_view(client):
+    schema = client.get("/openapi.json").json()
+    response = schema["paths"]["/categories"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    refs = {variant["items"]["$ref"].rsplit("/", 1)[-1] for variant in response["anyOf"]}
+    assert refs == {"CategorySummary", "CategoryTree", "CategoryOut"}
@@ -0,0 +1,74 @@
+"""Orphan collection in clean_oldphotos.py against an in-memory storage backend."""
+from datetime import datetime, timedelta, timezone
+
+import clean_oldphotos
+from clean_oldphotos import cleanup_orphans, image_key
+from models import ImageAsset
+
+URL = "https://res.cloudinary.com/test/image/upload/ecommerce/products/{}.jpg"
+
+
+class FakeStore:
+    name = "fake"
+
+    def __init__(self, keys):
+        old = datetime.now(timezone.utc) - timedelta(days=2)
+        self.files = {key: old for key in keys}
+        self.deleted = []
+
+    def list(self):
+        return list(self.files.items())
+
+    def delete(self, keys):
+        self.deleted.extend(keys)
+        for key in keys:
+            self.files.pop(key)
+
+
+def _asset(db, name: str, ref_count: int) -> ImageAsset:
+    asset = ImageAsset(content_hash=name.ljust(64, "0"), url=URL.format(name), ref_count=ref_count)
+    db.add(asset)
+    db.commit()
+    return asset
+
+
+def test_orphan_deletes_its_unreferenced_asset_row(db):
+    _asset(db, "dead", 0)
+    live = _asset(db, "live", 1)
+    store = FakeStore([image_key(URL.format("dead")), image_key(URL.format("live")), "stray.jpg"])
+
+    cleanup_orphans([store])
+
+    assert sorted(store.deleted) == sorted([image_key(URL.format("dead")), "stray.jpg"])
+    db.expire_all()
+    assert [asset.id for asset in db.query(ImageAsset).all()] == [live.id]
+
+
+def test_asset_referenced_again_keeps_its_file(db, monkeypatch):
+    asset = _asset(db, "reused", 0)
+    store = FakeStore([image_key(asset.url)])
+    collect = clean_oldphotos.collect_unreferenced_assets
+
+    def collect_then_reference(session):
+        # An upload of the same bytes takes a reference after the GC has listed the row
+        assets = collect(session)
+        db.query(ImageAsset).filter(ImageAsset.id == asset.id).update({"ref_count": 1})
+        db.commit()
+        return assets
+
+    monkeypatch.setattr(clean_oldphotos, "collect_unreferenced_assets", collect_then_reference)
+    cleanup_orphans([store])
+
+    assert store.deleted == []
+    db.expire_all()
+    assert db.get(ImageAsset, asset.id).ref_count == 1
+
+
+def test_dry_run_keeps_files_and_rows(db):
+    asset = _asset(db, "dead", 0)
+    store = FakeStore([image_key(asset.url)])
+
+    cleanup_orphans([store], dry_run=True)
+
+    assert store.deleted == []
+    assert db.query(ImageAsset).count() == 1
@@ -0,0 +1,92 @@
+"""
+upload_image_to_cloudinary_async against a local stub of the Cloudinary upload API.
+
+The stub answers every upload after a fixed delay. While several uploads are in flight,
+a ticker coroutine measures event-loop lag: if the SDK call ran on the loop the ticker
+would stall for the whole upload.
+"""
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cloudinary
+import pytest
+
+from config import settings
+from utils import cloudinary_config
+
+STUB_DELAY = 0.3
+
+
+class StubUploadHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(STUB_DELAY)
+        body = json.dumps({
+            "public_id": "ecommerce/stub",
+            "secure_url": "https://res.cloudinary.com/test/image/upload/v1/ecommerce/stub.jpg",
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_cloudinary():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubUploadHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    previous = dict(cloudinary.config().__dict__)
+    cloudinary.config(
+        cloud_name="test", api_key="key", api_secret="secret",
+        upload_prefix=f"http://127.0.0.1:{server.server_address[1]}",
+    )
+    yield
+    cloudinary.config(**previous)
+    server.shutdown()
+
+
+async def _max_loop_lag(stop: asyncio.Event, interval: float = 0.01) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - started - interval)
+    return worst
+
+
+def test_event_loop_stays_responsive_during_uploads(stub_cloudinary):
+    uploads = settings.CLOUDINARY_UPLOAD_WORKERS
+
+    async def scenario():
+        stop = asyncio.Event()
+        ticker = asyncio.create_task(_max_loop_lag(stop))
+        started = time.perf_counter()
+        urls = await asyncio.gather(*[
+            cloudinary_config.upload_image_to_cloudinary_async(b"\xff\xd8\xff fake jpeg", f"img{i}.jpg")
+            for i in range(uploads)
+        ])
+        elapsed = time.perf_counter() - started
+        stop.set()
+        return urls, elapsed, await ticker
+
+    urls, elapsed, lag = asyncio.run(scenario())
+
+    assert all(url.endswith("stub.jpg") for url in urls)
+    # Uploads overlap on the pool instead of running one after another
+    assert elapsed < STUB_DELAY * uploads
+    # The loop kept ticking while every upload was waiting on the network
+    assert lag < STUB_DELAY / 3
+
+
+def test_upload_timeout_is_enforced(stub_cloudinary, monkeypatch):
+    monkeypatch.setattr(settings, "CLOUDINARY_UPLOAD_TIMEOUT", STUB_DELAY / 3)
+    with pytest.raises(Exception, match="timed out|failed"):
+        asyncio.run(cloudinary_config.upload_image_to_cloudinary_async(b"data", "slow.jpg"))
@@ -0,0 +1,74 @@
+"""CompressionMiddleware negotiation and Vary handling."""
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from utils import compression
+from utils.compression import CompressionMiddleware
+
+BIG = {"items": ["x" * 50] * 200}
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+
+    @app.get("/big")
+    def big():
+        return BIG
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/cors")
+    def cors():
+        return JSONResponse(BIG, headers={"Vary": "Origin"})
+
+    return TestClient(CompressionMiddleware(app))
+
+
+def test_gzip_when_accepted(client):
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.json() == BIG
+
+
+@pytest.mark.parametrize("path, accept", [("/big", "identity"), ("/small", "gzip")])
+def test_uncompressed_responses_still_vary(client, path, accept):
+    response = client.get(path, headers={"Accept-Encoding": accept})
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+
+
+def test_vary_merges_with_existing_value(client):
+    response = client.get("/cors", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["vary"] == "Origin, Accept-Encoding"
+
+
+def test_large_bodies_compress_off_the_loop(client, monkeypatch):
+    calls = []
+    monkeypatch.setattr(compression.anyio.to_thread, "run_sync", _recording(calls, compression.anyio.to_thread.run_sync))
+    client.app.thread_bytes = 1024
+
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert calls == ["gzip"]
+    assert response.json() == BIG
+
+
+def _recording(calls, run_sync):
+    async def recording_run_sync(fn, *args, **kwargs):
+        if fn is compression.compress:
+            calls.append(args[1])
+        return await run_sync(fn, *args, **kwargs)
+    return recording_run_sync
+
+
+def test_moderate_levels():
+    body = b'{"name": "x"}' * 1000
+    assert gzip.decompress(compression.compress(body, "gzip")) == body
+    assert compression.GZIP_LEVEL == 6
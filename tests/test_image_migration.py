@@ -0,0 +1,112 @@
+"""ImageMigrator (migrate_images_to_cloudinary.py) against local files and a stub uploader."""
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import migrate_images_to_cloudinary as migration
+from database import SessionLocal
+from models import ImageAsset, Product
+
+PRODUCTS = 5
+
+
+class StubUploader:
+    """Records uploads; raises once `fail_after` uploads have succeeded."""
+
+    def __init__(self, fail_after=None):
+        self.fail_after = fail_after
+        self.filenames = []
+        self.lock = threading.Lock()
+
+    def __call__(self, content, filename, folder):
+        with self.lock:
+            if self.fail_after is not None and len(self.filenames) >= self.fail_after:
+                raise SystemExit("simulated crash")
+            self.filenames.append(filename)
+        return f"https://res.cloudinary.com/test/image/upload/{folder}/{filename}"
+
+
+@pytest.fixture
+def images(db, catalogue, tmp_path, monkeypatch):
+    """PRODUCTS Grade 4 books with local image files (the shared catalogue's product has none)."""
+    image_dir = tmp_path / "images"
+    image_dir.mkdir()
+    monkeypatch.setattr(migration, "IMAGE_DIR", str(image_dir))
+
+    products = []
+    for i in range(1, PRODUCTS + 1):
+        (image_dir / f"p{i}.jpg").write_bytes(f"image {i}".encode())
+        products.append(Product(
+            name=f"Book {i}", slug=f"book-{i}", price=100, category_id=catalogue.grade4.id,
+            image=f"/static/images/p{i}.jpg",
+        ))
+    db.add_all(products)
+    db.commit()
+    return SimpleNamespace(dir=tmp_path, ids=[product.id for product in products])
+
+
+def _migrator(images, uploader, **kwargs):
+    kwargs.setdefault("batch_size", 2)
+    return migration.ImageMigrator(
+        uploader=uploader, workers=1, checkpoint_path=str(images.dir / "checkpoint.json"),
+        session_factory=SessionLocal, **kwargs,
+    )
+
+
+def _images(db):
+    db.expire_all()
+    return dict(db.query(Product.id, Product.image).filter(Product.image.isnot(None)).all())
+
+
+def test_dry_run_touches_nothing(db, images):
+    uploader = StubUploader()
+    stats = _migrator(images, uploader, dry_run=True).run()
+
+    assert uploader.filenames == []
+    assert stats["bytes"] == sum(len(f"image {i}") for i in range(1, PRODUCTS + 1))
+    assert all(image.startswith("/static/images/") for image in _images(db).values())
+    assert not (images.dir / "checkpoint.json").exists()
+
+
+def test_rows_are_committed_in_batches(db, images, monkeypatch):
+    saved = []
+    real_save = migration.save_checkpoint
+    monkeypatch.setattr(migration, "save_checkpoint", lambda path, done: (saved.append(len(done)), real_save(path, done)))
+
+    stats = _migrator(images, StubUploader(), batch_size=2).run()
+
+    assert stats["migrated"] == PRODUCTS
+    assert saved == [2, 4, 5]   # two full batches, then the remainder
+    assert all("cloudinary.com" in image for image in _images(db).values())
+    assert db.query(ImageAsset).count() == PRODUCTS
+
+
+def test_rerun_resumes_after_last_committed_batch(db, images):
+    with pytest.raises(SystemExit):
+        _migrator(images, StubUploader(fail_after=3), batch_size=2).run()
+
+    # Only the first full batch was committed; the third upload was rolled back with the crash
+    with open(images.dir / "checkpoint.json") as f:
+        assert json.load(f)["done"] == [f"products:{pid}" for pid in images.ids[:2]]
+    stored = _images(db)
+    assert [pid for pid, image in sorted(stored.items()) if "cloudinary.com" in image] == images.ids[:2]
+
+    uploader = StubUploader()
+    stats = _migrator(images, uploader, batch_size=2).run()
+
+    assert stats["migrated"] == PRODUCTS - 2
+    assert len(uploader.filenames) == PRODUCTS - 2
+    assert all("cloudinary.com" in image for image in _images(db).values())
+
+
+def test_checkpointed_rows_are_skipped(db, images):
+    first, _, third = images.ids[:3]
+    migration.save_checkpoint(str(images.dir / "checkpoint.json"), {f"products:{first}", f"products:{third}"})
+    uploader = StubUploader()
+    stats = _migrator(images, uploader).run()
+
+    assert stats["skipped"] == 2
+    assert stats["migrated"] == PRODUCTS - 2
+    assert _images(db)[first] == "/static/images/p1.jpg"
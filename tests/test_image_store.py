@@ -0,0 +1,73 @@
+"""Reference counting in utils/image_store.py with the Cloudinary upload stubbed out."""
+import asyncio
+import hashlib
+import io
+
+import pytest
+
+from models import ImageAsset
+from services.deletion_queue import PENDING_KEY
+from utils import image_store
+from utils.uploads import ImageUpload
+
+
+@pytest.fixture
+def uploads(monkeypatch):
+    calls = []
+
+    async def fake_upload(file, filename, folder="ecommerce"):
+        calls.append(filename)
+        return f"https://res.cloudinary.com/test/image/upload/{folder}/{filename}"
+
+    monkeypatch.setattr(image_store, "upload_image_to_cloudinary_async", fake_upload)
+    return calls
+
+
+def _upload(data: bytes) -> ImageUpload:
+    return ImageUpload(io.BytesIO(data), "cover.jpg", "image/jpeg", len(data), hashlib.sha256(data).hexdigest())
+
+
+def _store(db, data: bytes, **kwargs) -> ImageAsset:
+    return asyncio.run(image_store.store_image(db, _upload(data), folder="ecommerce/products", **kwargs))
+
+
+def _count_in_db(db, asset_id: int) -> int:
+    return db.query(ImageAsset.ref_count).filter(ImageAsset.id == asset_id).scalar()
+
+
+def test_identical_bytes_share_one_asset(db, uploads):
+    first = _store(db, b"same bytes")
+    second = _store(db, b"same bytes")
+
+    assert first.id == second.id
+    assert len(uploads) == 1
+    assert second.ref_count == _count_in_db(db, first.id) == 2
+
+
+def test_counter_is_updated_in_the_database_not_written_back(db, uploads):
+    asset = _store(db, b"bytes")
+    # Someone else takes a reference behind this session's back
+    db.execute(ImageAsset.__table__.update().values(ref_count=ImageAsset.ref_count + 5))
+    _store(db, b"bytes")
+    db.flush()
+
+    assert _count_in_db(db, asset.id) == 7
+
+
+def test_standalone_upload_takes_no_reference(db, uploads):
+    asset = _store(db, b"loose", take_reference=False)
+    assert _count_in_db(db, asset.id) == 0
+
+
+def test_release_deletes_on_last_reference(db, uploads):
+    asset = _store(db, b"bytes")
+    _store(db, b"bytes")
+    url = asset.url
+
+    image_store.release_image(db, url)
+    assert _count_in_db(db, asset.id) == 1
+    assert not db.info.get(PENDING_KEY)
+
+    image_store.release_image(db, url)
+    assert db.query(ImageAsset).filter(ImageAsset.url == url).first() is None
+    assert db.info[PENDING_KEY] == [url]
@@ -0,0 +1,91 @@
+"""On-demand resizing endpoint (routers/images.py) and its disk cache."""
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from routers import images
+from utils.image_cache import DiskLRUCache
+from utils.image_urls import DELIVERY_PRESETS, image_srcset
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    source_dir = tmp_path / "images"
+    source_dir.mkdir()
+    Image.new("RGB", (800, 600), "navy").save(source_dir / "cover.png")
+    monkeypatch.setattr(images, "IMAGE_DIR", str(source_dir))
+    monkeypatch.setattr(images, "cache", DiskLRUCache(str(tmp_path / "cache"), 10 * 1024 * 1024))
+
+    app = FastAPI()
+    app.include_router(images.router, prefix="/img")
+    return TestClient(app)
+
+
+def test_renders_then_serves_from_cache(client):
+    first = client.get("/img/cover.png?w=300&fmt=png")
+    second = client.get("/img/cover.png?w=300&fmt=png")
+
+    assert first.status_code == second.status_code == 200
+    assert first.content == second.content
+    assert first.headers["content-type"] == "image/png"
+    assert len(images.cache.entries) == 1
+
+
+@pytest.mark.parametrize("header", ['"other", {etag}', "W/{etag}", "*"])
+def test_if_none_match_lists_and_weak_tags(client, header):
+    etag = client.get("/img/cover.png?w=300&fmt=png").headers["etag"]
+    response = client.get("/img/cover.png?w=300&fmt=png", headers={"If-None-Match": header.format(etag=etag)})
+    assert response.status_code == 304
+
+
+def test_if_none_match_mismatch_renders(client):
+    response = client.get("/img/cover.png?w=300&fmt=png", headers={"If-None-Match": '"stale", W/"older"'})
+    assert response.status_code == 200
+
+
+def test_cache_read_survives_eviction_race(tmp_path):
+    cache = DiskLRUCache(str(tmp_path), 1024)
+    path = cache.put("key", b"bytes")
+    assert cache.read("key") == b"bytes"
+
+    (tmp_path / "key").unlink()   # evicted by another request after the index lookup
+    assert cache.read("key") is None
+    assert "key" not in cache.entries
+
+
+def test_cancelled_waiter_does_not_strand_others(monkeypatch):
+    renders = []
+
+    async def slow_render(key, source_path, width, pil_format):
+        renders.append(key)
+        await asyncio.sleep(0.05)
+        return b"rendered"
+
+    monkeypatch.setattr(images, "_render_and_store", slow_render)
+
+    async def scenario():
+        first = asyncio.create_task(images.render_variant("k", "src", 320, "WEBP"))
+        second = asyncio.create_task(images.render_variant("k", "src", 320, "WEBP"))
+        await asyncio.sleep(0)
+        first.cancel()   # the client that started the render disconnects
+        result = await second
+        await asyncio.sleep(0)
+        return first.cancelled(), result
+
+    cancelled, result = asyncio.run(scenario())
+
+    assert cancelled
+    assert result == b"rendered"
+    assert renders == ["k"]
+    assert images.in_flight == {}
+
+
+def test_local_srcset_widths_are_served_unsnapped():
+    srcset = image_srcset("/static/images/cover.jpg", DELIVERY_PRESETS)
+    for preset, variants in srcset.items():
+        for width, url in variants.items():
+            assert url == f"/img/cover.jpg?w={width}"
+            assert images.snap_width(int(width)) == int(width), (preset, width)
@@ -0,0 +1,104 @@
+"""
+GET /products sort orders: results and SQLite query plans (EXPLAIN QUERY PLAN) of the
+query the router actually builds (listing_query + apply_sort).
+
+Each sort must be served by an index that delivers its order - the category one for a
+single category, the cross-category one for a subtree or no category - without a temp
+B-tree, whatever price, stock and category filters are combined, and the total count must
+never touch the table. sort=bestselling must
+read order_items only through the covering (product_id, quantity) index for the filtered
+products - never a full scan.
+"""
+import pytest
+from sqlalchemy import func, text
+
+from database import engine
+from models import Order, OrderItem, Product
+from routers.products import apply_sort, listing_query
+
+SUBTREE = [1, 2, 3]
+
+
+def _plan(db, query):
+    sql = str(query.statement.compile(engine, compile_kwargs={"literal_binds": True}))
+    return [row[-1] for row in db.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+
+def _listing(db, sort, **filters):
+    return apply_sort(db, listing_query(db, sort=sort, **filters), sort).limit(20)
+
+
+FILTERS = {
+    "none": ({}, None),
+    "category": ({"category_ids": [1]}, "category"),
+    "subtree": ({"category_ids": SUBTREE}, None),
+    "price range": ({"min_price": 100, "max_price": 500}, None),
+    "min price": ({"min_price": 100}, None),
+    "in stock": ({"in_stock": True}, None),
+    "category, price range": ({"category_ids": [1], "min_price": 100, "max_price": 500}, "category"),
+    "subtree, price range, in stock": ({"category_ids": SUBTREE, "min_price": 100, "max_price": 500, "in_stock": True}, None),
+}
+
+SORT_INDEXES = {
+    # sort: (index without a single category, index for one category)
+    "newest": ("ix_products_active_created", "ix_products_active_category_created"),
+    "price_asc": ("ix_products_active_price", "ix_products_active_category_price"),
+    "price_desc": ("ix_products_active_price", "ix_products_active_category_price"),
+}
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+@pytest.mark.parametrize("sort", SORT_INDEXES)
+def test_sorts_use_their_index(db, sort, filters):
+    kwargs, scope = FILTERS[filters]
+    index = SORT_INDEXES[sort][scope == "category"]
+    plan = _plan(db, _listing(db, sort, **kwargs))
+    assert any(step.startswith(f"SEARCH products USING INDEX {index} ") for step in plan), plan
+    assert not any("TEMP B-TREE" in step for step in plan), plan
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_total_count_reads_only_an_index(db, filters):
+    # What query.count() runs for total_items: every filter column sits in one listing index
+    query = listing_query(db, sort="newest", **FILTERS[filters][0])
+    plan = _plan(db, db.query(func.count()).select_from(query.subquery()))
+    assert len(plan) == 1 and plan[0].startswith("SEARCH products USING COVERING INDEX ix_products_active_"), plan
+
+
+def test_listing_filters_match_rows(db, catalogue):
+    subtree = [catalogue.books.id, catalogue.grade4.id]
+    for name, price, stock in (("cheap", 50, 3), ("mid", 300, 0), ("mid-stocked", 300, 2), ("dear", 900, 1)):
+        db.add(Product(name=name, slug=name, price=price, stock_quantity=stock, category_id=catalogue.books.id))
+    db.commit()
+
+    for sort in ("newest", "price_asc"):
+        query = listing_query(db, category_ids=subtree, min_price=100, max_price=400, in_stock=True, sort=sort)
+        assert [p.name for p in apply_sort(db, query, sort).all()] == ["mid-stocked"]
+
+
+def test_bestselling_reads_order_items_through_covering_index(db):
+    plan = _plan(db, _listing(db, "bestselling", category_ids=SUBTREE, min_price=100))
+    order_item_steps = [step for step in plan if "order_items" in step]
+    assert order_item_steps, plan
+    assert all("COVERING INDEX ix_order_items_product_quantity (product_id=?)" in step for step in order_item_steps), plan
+
+
+def test_bestselling_orders_by_units_sold(db, catalogue):
+    quiet, popular = [
+        Product(name=name, slug=name, price=100, category_id=catalogue.grade4.id) for name in ("quiet", "popular")
+    ]
+    elsewhere = Product(name="elsewhere", slug="elsewhere", price=100, category_id=catalogue.books.id)
+    db.add_all([quiet, popular, elsewhere])
+    db.flush()
+    order = Order(order_number="ORD-1", email="a@example.com", phone="0700", full_name="A", total_amount=1)
+    order.order_items = [
+        OrderItem(product_id=quiet.id, quantity=1, price=100),
+        OrderItem(product_id=popular.id, quantity=3, price=100),
+        OrderItem(product_id=popular.id, quantity=2, price=100),
+        OrderItem(product_id=elsewhere.id, quantity=50, price=100),
+    ]
+    db.add(order)
+    db.commit()
+
+    names = [p.name for p in _listing(db, "bestselling", category_ids=[catalogue.grade4.id]).all()]
+    assert names == ["popular", "quiet", "Maths 4"]   # the shared product has no sales
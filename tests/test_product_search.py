@@ -0,0 +1,108 @@
+"""
+Product search (services/product_search.py): relevance, full result sets through
+GET /products, and a latency benchmark over a synthetic catalogue (run with -s for timings).
+"""
+import itertools
+import random
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from models import Category, Product
+from routers import products as products_router
+from services.product_search import product_search
+
+SUBJECTS = ["mathematics", "kiswahili", "english", "science", "social studies", "agriculture",
+            "chemistry", "physics", "biology", "geography", "history", "business studies"]
+KINDS = ["workbook", "textbook", "revision guide", "teacher guide", "activity book"]
+
+_slugs = itertools.count(1)
+
+
+def _rebuild():
+    product_search.needs_full = True
+    product_search.ensure_current()
+
+
+@pytest.fixture
+def category(db):
+    category = Category(name="Books", slug="books")
+    db.add(category)
+    db.commit()
+    return category
+
+
+def _add(db, category, name, description="", **fields):
+    db.add(Product(name=name, slug=f"product-{next(_slugs)}", description=description, price=fields.pop("price", 500),
+                   category_id=category.id, **fields))
+
+
+def test_relevance_typos_prefixes_and_suggestions(db, category):
+    _add(db, category, "Kiswahili Grade 4", "Lugha na fasihi")
+    _add(db, category, "Mathematics Grade 4", "Numbers and shapes")
+    _add(db, category, "Atlas", "Maps with a kiswahili glossary")
+    db.commit()
+    _rebuild()
+
+    ids, suggestion = product_search.search("kiswahli grade 4")
+    names = [db.get(Product, pid).name for pid in ids]
+    assert names == ["Kiswahili Grade 4"]
+    assert suggestion == "kiswahili grade 4"
+
+    ids, _ = product_search.search("kiswahili")
+    # Name matches outrank description matches
+    assert [db.get(Product, pid).name for pid in ids] == ["Kiswahili Grade 4", "Atlas"]
+
+    ids, suggestion = product_search.search("mathem")
+    assert [db.get(Product, pid).name for pid in ids] == ["Mathematics Grade 4"]
+    assert suggestion is None
+
+
+def test_listing_counts_every_match(db, category):
+    for i in range(600):
+        _add(db, category, f"Maths workbook {i}", price=100 + i, on_sale=i % 2 == 0)
+    _add(db, category, "Atlas")
+    db.commit()
+    _rebuild()
+
+    app = FastAPI()
+    app.include_router(products_router.router, prefix="/products")
+    client = TestClient(app)
+
+    relevance = client.get("/products", params={"search": "maths", "limit": 20}).json()
+    assert relevance["total_items"] == 600
+    assert len(relevance["products"]) == 20
+
+    by_price = client.get("/products", params={"search": "maths", "sort": "price_desc", "facets": "on_sale"}).json()
+    assert by_price["total_items"] == 600
+    assert by_price["products"][0]["price"] == 699   # the most expensive match, beyond any top-N cut
+    assert sum(bucket["count"] for bucket in by_price["facets"]["on_sale"]) == 600
+
+
+def test_search_latency(db, category):
+    rng = random.Random(7)
+    for i in range(5000):
+        subject, kind = rng.choice(SUBJECTS), rng.choice(KINDS)
+        _add(db, category, f"{subject.title()} {kind} grade {rng.randint(1, 12)}",
+             f"{subject} {kind} for learners, edition {i}", is_featured=i % 50 == 0)
+    db.commit()
+
+    started = time.perf_counter()
+    _rebuild()
+    build_ms = (time.perf_counter() - started) * 1000
+
+    queries = ["mathematics", "kiswahli grade 4", "chemestry textbook", "revision", "bio", "g",
+               "social studies grade 7", "teacher guide english", "physcis workbok", "histroy"]
+    timings = []
+    for _ in range(5):
+        for q in queries:
+            started = time.perf_counter()
+            ids, _ = product_search.search(q)
+            timings.append((time.perf_counter() - started) * 1000)
+            assert ids, q
+    timings.sort()
+    p50, p95 = timings[len(timings) // 2], timings[int(len(timings) * 0.95)]
+    print(f"\n📊 search over 5000 products: index build {build_ms:.0f} ms, p50 {p50:.1f} ms, p95 {p95:.1f} ms")
+    assert p95 < 250
@@ -0,0 +1,33 @@
+"""Typeahead index (services/search_index.py) and the rate-limit group of its endpoint."""
+from models import Category, Product
+from services.search_index import SuggestIndex
+from utils.rate_limit import route_group
+
+
+def test_apply_pending_swaps_in_a_new_index(db):
+    category = Category(name="Books", slug="books")
+    db.add(category)
+    db.commit()
+    old_book = Product(name="Mathematics Grade 4", slug="maths-4", price=500, category_id=category.id)
+    db.add(old_book)
+    db.commit()
+
+    index = SuggestIndex()
+    index.rebuild(db)
+    keys, entries = index.keys, index.entries   # what an in-flight suggest() holds
+
+    db.delete(old_book)
+    db.add(Product(name="Mathematics Grade 5", slug="maths-5", price=500, category_id=category.id))
+    db.commit()
+    index.pending = {"products": {old_book.id, old_book.id + 1}}
+    index.apply_pending(db)
+
+    assert ("product", old_book.id) in entries
+    assert all(key in entries for _, key in keys)
+    assert [s["name"] for s in index.suggest("math")] == ["Mathematics Grade 5"]
+
+
+def test_suggest_has_its_own_rate_limit_group():
+    assert route_group("/search/suggest", b"q=ma") == "suggest"
+    assert route_group("/search", b"q=maths") == "search"
+    assert route_group("/products", b"search=maths") == "search"
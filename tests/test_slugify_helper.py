@@ -0,0 +1,66 @@
+"""Slug allocation and the savepoint retry in utils/slugify_helper.py."""
+from models import Category
+from utils import slugify_helper
+from utils.slugify_helper import allocate_slug, allocate_slugs, save_with_unique_slug
+
+
+def test_allocate_slug_picks_next_free_suffix(db):
+    db.add_all([Category(name="Books", slug="books"), Category(name="Books", slug="books-1"),
+                Category(name="Books", slug="books-3")])
+    db.commit()
+    assert allocate_slug(db, Category, "Books") == "books-2"
+    assert allocate_slug(db, Category, "Stationery") == "stationery"
+
+
+def test_allocate_slugs_suffixes_duplicates_within_batch(db, monkeypatch):
+    db.add_all([Category(name="Books", slug="books"), Category(name="Books", slug="books-2")])
+    db.commit()
+    monkeypatch.setattr(slugify_helper, "BULK_BASES_PER_QUERY", 1)
+
+    slugs = allocate_slugs(db, Category, ["Books", "Maps", "Books", "maps", "Books"])
+
+    assert slugs == ["books-1", "maps", "books-3", "maps-1", "books-4"]
+
+
+def _collide_once(monkeypatch, taken: str):
+    """First allocation returns a slug another row already holds, as if a concurrent writer won the race."""
+    calls = []
+    real = slugify_helper.allocate_slug
+
+    def allocate(db, model, name, exclude_id=None):
+        calls.append(name)
+        return taken if len(calls) == 1 else real(db, model, name, exclude_id=exclude_id)
+
+    monkeypatch.setattr(slugify_helper, "allocate_slug", allocate)
+    return calls
+
+
+def test_retry_keeps_pending_edits_on_update(db, monkeypatch):
+    db.add(Category(name="Books", slug="books"))
+    category = Category(name="Old name", slug="old-name", description="old")
+    db.add(category)
+    db.commit()
+
+    calls = _collide_once(monkeypatch, "books")
+    category.description = "edited before the slug was saved"
+    category.name = "Books"
+    save_with_unique_slug(db, category, "Books")
+    db.commit()
+    db.expire_all()
+
+    assert len(calls) == 2
+    assert (category.name, category.slug) == ("Books", "books-1")
+    assert category.description == "edited before the slug was saved"
+
+
+def test_retry_inserts_new_object(db, monkeypatch):
+    db.add(Category(name="Books", slug="books"))
+    db.commit()
+
+    _collide_once(monkeypatch, "books")
+    category = Category(name="Books", description="fresh")
+    save_with_unique_slug(db, category, "Books")
+    db.commit()
+    db.expire_all()
+
+    assert (category.slug, category.description) == ("books-1", "fresh")
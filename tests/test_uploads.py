@@ -0,0 +1,103 @@
+"""Upload guards: streaming validation, magic-byte sniffing and the multipart body limit."""
+import asyncio
+import hashlib
+import io
+import struct
+
+import pytest
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.testclient import TestClient
+from starlette.datastructures import Headers
+
+from config import settings
+from utils.uploads import CHUNK_SIZE, UploadSizeLimitMiddleware, read_image_upload, sniff_image_type
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 100
+
+
+def _upload(data: bytes, content_type: str = "image/png", size_known: bool = False) -> UploadFile:
+    return UploadFile(
+        io.BytesIO(data), size=len(data) if size_known else None, filename="cover.png",
+        headers=Headers({"content-type": content_type}),
+    )
+
+
+def _read(upload: UploadFile, **kwargs):
+    return asyncio.run(read_image_upload(upload, **kwargs))
+
+
+def test_valid_image_is_hashed_and_rewound():
+    upload = _upload(PNG)
+    upload.file.seek(7)   # a previous reader left the file mid-way
+    result = _read(upload)
+
+    assert (result.content_type, result.size) == ("image/png", len(PNG))
+    assert result.sha256 == hashlib.sha256(PNG).hexdigest()
+    # Handed to the uploader at the start of the file
+    assert result.file.tell() == 0
+    assert result.file.read() == PNG
+
+
+def test_spoofed_content_type_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        _read(_upload(b"<?php system($_GET['c']); ?>", content_type="image/jpeg"))
+    assert error.value.status_code == 400
+
+
+@pytest.mark.parametrize("size_known", [True, False])
+def test_body_over_limit_is_rejected(monkeypatch, size_known):
+    monkeypatch.setattr(settings, "MAX_UPLOAD_BYTES", CHUNK_SIZE)
+    with pytest.raises(HTTPException) as error:
+        _read(_upload(PNG + b"\x00" * (2 * CHUNK_SIZE), size_known=size_known))
+    assert error.value.status_code == 413
+
+
+def test_empty_file_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        _read(_upload(b""))
+    assert error.value.status_code == 400
+
+
+def _bmp_head(dib_size: int) -> bytes:
+    return b"BM" + struct.pack("<IHHI", 1000, 0, 0, 54) + struct.pack("<I", dib_size) + b"\x00" * 14
+
+
+def test_bmp_requires_known_dib_header():
+    assert sniff_image_type(_bmp_head(40)) == "image/bmp"
+    assert sniff_image_type(_bmp_head(124)) == "image/bmp"
+    assert sniff_image_type(b"BMW owners manual, chapter one") is None
+    assert sniff_image_type(b"BM") is None
+
+
+def _client(max_bytes: int) -> TestClient:
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    return TestClient(UploadSizeLimitMiddleware(app, max_bytes=max_bytes))
+
+
+def test_multipart_under_limit_passes():
+    response = _client(4096).post("/upload", files={"file": ("a.jpg", b"x" * 1000)})
+    assert response.status_code == 200
+    assert response.json() == {"size": 1000}
+
+
+def test_declared_content_length_over_limit_is_rejected():
+    response = _client(4096).post("/upload", files={"file": ("a.jpg", b"x" * 10_000)})
+    assert response.status_code == 413
+
+
+def test_chunked_body_over_limit_is_rejected():
+    def body():
+        yield b"--b\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.jpg\"\r\n\r\n"
+        for _ in range(10):
+            yield b"x" * 1000
+        yield b"\r\n--b--\r\n"
+
+    response = _client(4096).post(
+        "/upload", content=body(), headers={"Content-Type": "multipart/form-data; boundary=b"},
+    )
+    assert response.status_code == 413
@@ -0,0 +1,75 @@
+"""
+Lightweight category listings (view=summary|tree) built from one column-only query.
+
+Loading Category ORM objects pulls in the selectin `subcategories` and `products`
+relationships, and CategoryOut then serializes every product once per ancestor level.
+These helpers select plain columns instead and assemble the hierarchy in Python.
+"""
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy.orm import Query, Session
+
+from models import Category
+
+CATEGORY_VIEWS = ("summary", "tree", "full")
+
+# Sibling order everywhere categories are listed (ix_categories_parent_display_order)
+DISPLAY_ORDER = (Category.display_order, Category.id)
+
+SUMMARY_COLUMNS = (
+    Category.id, Category.name, Category.slug, Category.description, Category.image,
+    Category.icon, Category.is_active, Category.parent_id, Category.display_order,
+    Category.product_count, Category.active_product_count,
+    Category.total_product_count, Category.total_active_product_count,
+)
+
+
+def category_rows(query: Query) -> List[Dict[str, Any]]:
+    """Run a Category query as plain column rows (no relationship loading)."""
+    return [dict(row._mapping) for row in query.with_entities(*SUMMARY_COLUMNS).all()]
+
+
+def child_ids(db: Session, parent_ids: Iterable[int], active_only: bool = False) -> Dict[int, List[int]]:
+    parent_ids = list(parent_ids)
+    children: Dict[int, List[int]] = defaultdict(list)
+    if not parent_ids:
+        return children
+    query = db.query(Category.id, Category.parent_id).filter(Category.parent_id.in_(parent_ids))
+    if active_only:
+        query = query.filter(Category.is_active == True)
+    query = query.order_by(*DISPLAY_ORDER)
+    for category_id, parent_id in query.all():
+        children[parent_id].append(category_id)
+    return children
+
+
+def build_summaries(rows: List[Dict[str, Any]], children: Dict[int, List[int]]) -> List[Dict[str, Any]]:
+    return [{**row, "subcategory_ids": children.get(row["id"], [])} for row in rows]
+
+
+def build_tree(rows: List[Dict[str, Any]], root_ids: Iterable[int]) -> List[Dict[str, Any]]:
+    """Nest flat rows under their parents and return the given roots, in root_ids order.
+    Children keep the order of `rows`, so callers pass rows already sorted by DISPLAY_ORDER."""
+    nodes = {row["id"]: {**row, "subcategories": []} for row in rows}
+    for row in rows:
+        parent = nodes.get(row["parent_id"])
+        if parent is not None:
+            parent["subcategories"].append(nodes[row["id"]])
+    return [nodes[i] for i in root_ids if i in nodes]
+
+
+def subtree_rows(db: Session, root_ids: List[int], active_only: bool = False) -> List[Dict[str, Any]]:
+    """Rows for the given roots and all their descendants, one query per tree level."""
+    rows: List[Dict[str, Any]] = []
+    seen = set()
+    query = db.query(Category).filter(Category.id.in_(root_ids))
+    while True:
+        if active_only:
+            query = query.filter(Category.is_active == True)
+        level = [row for row in category_rows(query.order_by(*DISPLAY_ORDER)) if row["id"] not in seen]
+        if not level:
+            return rows
+        seen.update(row["id"] for row in level)
+        rows.extend(level)
+        query = db.query(Category).filter(Category.parent_id.in_([row["id"] for row in level]))
@@ -1,8 +1,15 @@
+import asyncio
 import cloudinary
 import cloudinary.uploader
+import cloudinary.api
 import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import BinaryIO
 from dotenv import load_dotenv
 
+from config import settings
+
 load_dotenv()
 
 cloudinary.config(
@@ -12,7 +19,13 @@ cloudinary.config(
     secure=True
 )
 
-def upload_image_to_cloudinary(file_content: bytes, filename: str, folder: str = "ecommerce") -> str:
+# Bounded pool for uploads so async endpoints never block the event loop on Cloudinary
+UPLOAD_EXECUTOR = ThreadPoolExecutor(
+    max_workers=settings.CLOUDINARY_UPLOAD_WORKERS,
+    thread_name_prefix="cloudinary-upload",
+)
+
+def upload_image_to_cloudinary(file_content: bytes | BinaryIO, filename: str, folder: str = "ecommerce", timeout: float | None = None) -> str:
     try:
         # Generate unique public_id - DON'T include folder in public_id
         base_name = os.path.splitext(filename)[0]
@@ -23,13 +36,57 @@ def upload_image_to_cloudinary(file_content: bytes, filename: str, folder: str =
             public_id=base_name,  # Just the filename, no folder here
             overwrite=True,
             resource_type="image",
-            folder=folder  # Folder is handled separately
+            folder=folder,  # Folder is handled separately
+            timeout=timeout
         )
         
         return result['secure_url']
     except Exception as e:
         raise Exception(f"Cloudinary upload failed: {str(e)}")
 
+async def upload_image_to_cloudinary_async(file_content: bytes | BinaryIO, filename: str, folder: str = "ecommerce") -> str:
+    """
+    Non-blocking upload for async endpoints.
+    Runs the SDK call on the bounded upload pool; the timeout covers both queueing and the upload itself.
+    """
+    timeout = settings.CLOUDINARY_UPLOAD_TIMEOUT
+    loop = asyncio.get_running_loop()
+    upload = partial(upload_image_to_cloudinary, file_content, filename, folder=folder, timeout=timeout)
+    try:
+        return await asyncio.wait_for(loop.run_in_executor(UPLOAD_EXECUTOR, upload), timeout=timeout)
+    except asyncio.TimeoutError:
+        raise Exception(f"Cloudinary upload timed out after {timeout}s")
+
+def public_id_from_url(image_url: str) -> str | None:
+    """
+    Extract the public_id from a Cloudinary delivery URL
+    Example: https://res.cloudinary.com/demo/image/upload/v1234/ecommerce/image.jpg -> ecommerce/image
+    """
+    if not image_url or "cloudinary.com" not in image_url:
+        return None
+    parts = image_url.split('/upload/')
+    if len(parts) < 2:
+        return None
+    path = parts[1].split('/')
+    if path and path[0].startswith('v') and path[0][1:].isdigit():
+        path = path[1:]  # Skip version number
+    return '/'.join(path).rsplit('.', 1)[0]  # Remove extension
+
+# Admin API limit for delete_resources
+CLOUDINARY_BULK_DELETE_LIMIT = 100
+
+def delete_images_from_cloudinary(public_ids: list[str]) -> dict:
+    """
+    Bulk delete by public_id, CLOUDINARY_BULK_DELETE_LIMIT ids per API call
+    Returns {public_id: result} ("deleted", "not_found", ...)
+    """
+    results = {}
+    for start in range(0, len(public_ids), CLOUDINARY_BULK_DELETE_LIMIT):
+        batch = public_ids[start:start + CLOUDINARY_BULK_DELETE_LIMIT]
+        response = cloudinary.api.delete_resources(batch, resource_type="image", type="upload")
+        results.update(response.get("deleted", {}))
+    return results
+
 def delete_image_from_cloudinary(image_url: str) -> bool:
     """
     Delete image from Cloudinary using its URL
@@ -44,16 +101,10 @@ def delete_image_from_cloudinary(image_url: str) -> bool:
         return False
     
     try:
-        # Extract public_id from URL
-        # Example: https://res.cloudinary.com/demo/image/upload/v1234/ecommerce/image.jpg
-        # Extract: ecommerce/image
-        parts = image_url.split('/upload/')
-        if len(parts) < 2:
+        public_id = public_id_from_url(image_url)
+        if not public_id:
             return False
         
-        path = parts[1].split('/')[1:]  # Skip version number
-        public_id = '/'.join(path).rsplit('.', 1)[0]  # Remove extension
-        
         # Delete from Cloudinary
         result = cloudinary.uploader.destroy(public_id)
         print(f"🗑️ Deleted from Cloudinary: {public_id}")
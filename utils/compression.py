@@ -0,0 +1,219 @@
+"""
+Response compression (brotli / gzip) with a precompressed cache (pure ASGI middleware).
+
+- Encoding is negotiated from Accept-Encoding; brotli is used when the optional `brotli`
+  package is installed, gzip otherwise. Bodies under COMPRESSION_MIN_BYTES, non-text
+  content types and streamed responses are passed through untouched.
+- Responses carrying a strong ETag (storefront home, category tree, product pages - see
+  utils/conditional_get.py) are cacheable: their compressed bodies are kept in an LRU keyed
+  by (ETag, encoding), so hot responses are compressed once.
+- Levels are moderate (brotli 5, gzip 6): higher settings cost several times the CPU for a
+  few percent smaller bodies. Bodies over COMPRESSION_THREAD_BYTES are compressed on a
+  worker thread so a large response never stalls the event loop.
+- Every compressible response carries Vary: Accept-Encoding, including the ones sent
+  uncompressed (client without gzip/br, body under the threshold), so shared caches
+  never hand an identity body to a client that asked for compression or vice versa.
+- A compressed representation gets its own ETag ("<etag>-br" / "<etag>-gzip"). Incoming
+  If-None-Match values are mapped back to the identity ETag before reaching the inner
+  validators, so 304s keep working for compressed clients.
+"""
+import gzip
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import anyio
+
+from config import settings
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSIBLE_TYPES = (b"application/json", b"text/", b"application/javascript", b"application/xml", b"image/svg+xml")
+
+BROTLI_QUALITY = 5
+GZIP_LEVEL = 6
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def add_vary(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    """Append Accept-Encoding to Vary, merging with a value set further in (e.g. Origin)."""
+    for i, (name, value) in enumerate(headers):
+        if name.lower() == b"vary":
+            if b"accept-encoding" in value.lower() or value.strip() == b"*":
+                return headers
+            headers = list(headers)
+            headers[i] = (name, value + b", Accept-Encoding")
+            return headers
+    return list(headers) + [(b"vary", b"Accept-Encoding")]
+
+
+def varies_by_encoding(start: Dict) -> bool:
+    names = {k.lower(): v for k, v in start.get("headers", [])}
+    return start["status"] == 304 or names.get(b"content-type", b"").startswith(COMPRESSIBLE_TYPES)
+
+
+def encoded_etag(etag: bytes, encoding: str) -> bytes:
+    return etag[:-1] + b"-" + encoding.encode() + b'"' if etag.endswith(b'"') else etag + b"-" + encoding.encode()
+
+
+def strip_encoding_suffixes(if_none_match: bytes) -> bytes:
+    tags = []
+    for tag in if_none_match.split(b","):
+        tag = tag.strip()
+        for suffix in (b'-br"', b'-gzip"'):
+            if tag.endswith(suffix):
+                tag = tag[: -len(suffix)] + b'"'
+        tags.append(tag)
+    return b", ".join(tags)
+
+
+class CompressedCache:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.total = 0
+        self.entries: "OrderedDict[Tuple[bytes, str], bytes]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, key: Tuple[bytes, str]) -> Optional[bytes]:
+        with self.lock:
+            body = self.entries.get(key)
+            if body is None:
+                self.stats["misses"] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return body
+
+    def put(self, key: Tuple[bytes, str], body: bytes):
+        with self.lock:
+            if key in self.entries:
+                return
+            self.entries[key] = body
+            self.total += len(body)
+            while self.total > self.max_bytes and self.entries:
+                _, evicted = self.entries.popitem(last=False)
+                self.total -= len(evicted)
+
+
+compressed_cache = CompressedCache(settings.COMPRESSION_CACHE_MAX_BYTES)
+
+
+class CompressionMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self.min_bytes = settings.COMPRESSION_MIN_BYTES
+        self.thread_bytes = settings.COMPRESSION_THREAD_BYTES
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_headers: List[Tuple[bytes, bytes]] = list(scope.get("headers", []))
+        accept = next((v for k, v in request_headers if k == b"accept-encoding"), b"").decode("latin-1")
+        encoding = choose_encoding(accept)
+        if encoding is None:
+            async def send_identity(message):
+                if message["type"] == "http.response.start" and varies_by_encoding(message):
+                    message = {**message, "headers": add_vary(message.get("headers", []))}
+                await send(message)
+
+            return await self.app(scope, receive, send_identity)
+
+        # Let inner validators compare against the identity ETag
+        scope = dict(scope)
+        scope["headers"] = [
+            (k, strip_encoding_suffixes(v) if k == b"if-none-match" else v) for k, v in request_headers
+        ]
+
+        start: Dict = {}
+        chunks: List[bytes] = []
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal passthrough
+            if message["type"] == "http.response.start":
+                start.update(message)
+                return
+
+            if passthrough:
+                return await send(message)
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                # Streaming response (files etc.): don't buffer, send as-is
+                passthrough = True
+                await send({**start, "headers": add_vary(start.get("headers", []))} if varies_by_encoding(start) else start)
+                await send({"type": "http.response.body", "body": b"".join(chunks), "more_body": True})
+                return
+
+            await self._finish(send, start, b"".join(chunks), encoding)
+
+        await self.app(scope, receive, send_compressed)
+
+    async def _finish(self, send, start: Dict, body: bytes, encoding: str):
+        headers = list(start.get("headers", []))
+        names = {k.lower(): v for k, v in headers}
+        content_type = names.get(b"content-type", b"")
+        etag = names.get(b"etag")
+
+        if start["status"] == 304 and etag:
+            headers = [(k, encoded_etag(v, encoding) if k.lower() == b"etag" else v) for k, v in headers]
+            await send({**start, "headers": add_vary(headers)})
+            return await send({"type": "http.response.body", "body": body})
+
+        if (
+            start["status"] != 200
+            or b"content-encoding" in names
+            or len(body) < self.min_bytes
+            or not content_type.startswith(COMPRESSIBLE_TYPES)
+        ):
+            await send({**start, "headers": add_vary(headers)} if varies_by_encoding(start) else start)
+            return await send({"type": "http.response.body", "body": body})
+
+        cacheable = etag is not None and not etag.startswith(b"W/")
+        compressed = compressed_cache.get((etag, encoding)) if cacheable else None
+        if compressed is None:
+            if len(body) > self.thread_bytes:
+                compressed = await anyio.to_thread.run_sync(compress, body, encoding)
+            else:
+                compressed = compress(body, encoding)
+            if cacheable:
+                compressed_cache.put((etag, encoding), compressed)
+
+        headers = [
+            (k, encoded_etag(v, encoding) if k.lower() == b"etag" else v)
+            for k, v in headers if k.lower() != b"content-length"
+        ]
+        headers += [
+            (b"content-encoding", encoding.encode()),
+            (b"content-length", str(len(compressed)).encode()),
+        ]
+        await send({**start, "headers": add_vary(headers)})
+        await send({"type": "http.response.body", "body": compressed})
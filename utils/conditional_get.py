@@ -0,0 +1,90 @@
+"""
+ETag / conditional GET for public read endpoints (pure ASGI middleware).
+
+The validator is derived from the resource versions a route depends on (see
+utils/resource_versions.py) plus the full request URL, so it is known *before* the
+handler runs: a matching If-None-Match is answered with 304 without executing any
+queries. Versions are captured before the handler, so a write racing the handler can
+only make the ETag older than the data, never newer (clients simply refetch).
+
+An epoch (ETAG_TTL seconds) is mixed in so validators roll over even when another
+worker process made the write this process never saw.
+"""
+import hashlib
+import time
+from typing import Optional, Tuple
+
+from config import settings
+from utils.resource_versions import BOOT_ID, get_versions
+
+# Public path prefix -> resources whose changes alter the response
+ROUTE_DEPENDENCIES: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("/products", ("products", "categories")),
+    ("/categories", ("categories", "products")),
+    ("/hero-banners", ("banners",)),
+    ("/delivery", ("delivery",)),
+)
+
+CACHE_CONTROL = b"public, max-age=0, must-revalidate"
+
+
+def dependencies_for(path: str) -> Optional[Tuple[str, ...]]:
+    for prefix, resources in ROUTE_DEPENDENCIES:
+        if path == prefix or path.startswith(prefix + "/"):
+            return resources
+    return None
+
+
+def compute_etag(path: str, query_string: bytes, resources: Tuple[str, ...]) -> str:
+    epoch = int(time.time() // settings.ETAG_TTL)
+    token = f"{BOOT_ID}:{epoch}:{get_versions(resources)}:{path}?{query_string.decode('latin-1')}"
+    return f'"{hashlib.sha256(token.encode()).hexdigest()[:32]}"'
+
+
+def if_none_match_matches(header: Optional[bytes], etag: str) -> bool:
+    """If-None-Match list check; uses weak comparison, so W/"x" matches "x"."""
+    if not header:
+        return False
+    value = header.decode("latin-1").strip()
+    if value == "*":
+        return True
+    tags = {tag.strip().removeprefix("W/") for tag in value.split(",")}
+    return etag.removeprefix("W/") in tags
+
+
+class ConditionalGetMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            return await self.app(scope, receive, send)
+
+        resources = dependencies_for(scope["path"])
+        if resources is None:
+            return await self.app(scope, receive, send)
+
+        etag = compute_etag(scope["path"], scope.get("query_string", b""), resources)
+        headers = dict(scope.get("headers", []))
+
+        if if_none_match_matches(headers.get(b"if-none-match"), etag):
+            await send({
+                "type": "http.response.start",
+                "status": 304,
+                "headers": [(b"etag", etag.encode()), (b"cache-control", CACHE_CONTROL)],
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_validators(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                existing = {name.lower() for name, _ in message.get("headers", [])}
+                extra = []
+                if b"etag" not in existing:
+                    extra.append((b"etag", etag.encode()))
+                if b"cache-control" not in existing:
+                    extra.append((b"cache-control", CACHE_CONTROL))
+                message = {**message, "headers": list(message.get("headers", [])) + extra}
+            await send(message)
+
+        await self.app(scope, receive, send_with_validators)
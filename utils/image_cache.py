@@ -0,0 +1,98 @@
+"""
+Size-bounded LRU disk cache for rendered image variants.
+
+Entries are plain files named by their cache key. Recency is tracked in memory (seeded
+from file mtimes on startup) and the least recently used files are evicted once the
+total size passes max_bytes. Writes go through a temp file + os.replace so readers never
+see a partial image.
+"""
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+
+class DiskLRUCache:
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[str, int]" = OrderedDict()  # key -> size, oldest first
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file() and not entry.name.startswith("."):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(files):
+            self.entries[name] = size
+            self.total_bytes += size
+        self._evict()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def get(self, key: str) -> Optional[str]:
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            self._forget(key)
+            return None
+        return path
+
+    def read(self, key: str) -> Optional[bytes]:
+        """
+        Return the cached bytes, or None on a miss. Reading (rather than handing out a path)
+        means eviction can't delete the file between the lookup and the response.
+        """
+        path = self.get(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            self._forget(key)
+            return None
+
+    def put(self, key: str, data: bytes) -> str:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        path = self.path_for(key)
+        os.replace(tmp_path, path)
+
+        with self.lock:
+            if key in self.entries:
+                self.total_bytes -= self.entries.pop(key)
+            self.entries[key] = len(data)
+            self.total_bytes += len(data)
+        self._evict()
+        return path
+
+    def _forget(self, key: str):
+        with self.lock:
+            size = self.entries.pop(key, None)
+            if size is not None:
+                self.total_bytes -= size
+
+    def _evict(self):
+        while True:
+            with self.lock:
+                if self.total_bytes <= self.max_bytes or len(self.entries) <= 1:
+                    return
+                key, size = self.entries.popitem(last=False)
+                self.total_bytes -= size
+            try:
+                os.remove(self.path_for(key))
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,121 @@
+"""
+Content-addressed image storage.
+
+Uploads are keyed by the SHA-256 of their bytes (computed while streaming, see
+utils/uploads.py). The image_assets table is a local hash -> URL index:
+- identical bytes reuse the existing asset with no network call at all
+- the Cloudinary public_id is the hash, so two different "cover.jpg" files never collide
+- ref_count tracks how many rows point at an asset; the remote file is only destroyed
+  when the last reference is released
+
+Reference counts are changed with a single UPDATE ... SET ref_count = ref_count +/- 1
+RETURNING, so concurrent uploads and deletes never overwrite each other's count.
+"""
+import os
+from typing import Any, Dict, Optional
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from models import ImageAsset
+from services.deletion_queue import queue_after_commit
+from utils.cloudinary_config import upload_image_to_cloudinary_async
+from utils.image_variants import build_image_variants, iter_variant_urls
+from utils.uploads import ImageUpload
+
+
+async def _build_variants(upload: ImageUpload, filename: str, folder: str) -> Optional[Dict[str, Any]]:
+    # A failure here never blocks the upload itself
+    try:
+        return await build_image_variants(upload.read(), filename, folder=folder)
+    except Exception as e:
+        print(f"⚠️ Failed to build image variants for {upload.filename}: {str(e)}")
+        return None
+
+
+def _adjust_refs(db: Session, asset: ImageAsset, delta: int) -> Optional[int]:
+    """Atomically add delta to the asset's ref_count (never below 0); None if the row is gone."""
+    count = db.execute(
+        update(ImageAsset)
+        .where(ImageAsset.id == asset.id, ImageAsset.ref_count + delta >= 0)
+        .values(ref_count=ImageAsset.ref_count + delta)
+        .returning(ImageAsset.ref_count)
+        .execution_options(synchronize_session=False)
+    ).scalar_one_or_none()
+    if count is not None:
+        # Mirror the database value without marking the attribute dirty (a later flush must not write it back)
+        set_committed_value(asset, "ref_count", count)
+    return count
+
+
+async def store_image(
+    db: Session,
+    upload: ImageUpload,
+    folder: str,
+    with_variants: bool = False,
+    take_reference: bool = True,
+) -> ImageAsset:
+    """
+    Return the asset for these bytes, uploading only if the hash has never been seen.
+    Takes one reference unless take_reference is False (uploads not yet attached to any row);
+    callers release it with release_image() when the row stops using the URL.
+    The caller owns the transaction (the asset row is flushed, not committed).
+    """
+    asset = db.query(ImageAsset).filter(ImageAsset.content_hash == upload.sha256).first()
+    extension = os.path.splitext(upload.filename)[1] or ".img"
+    filename = f"{upload.sha256}{extension}"
+
+    if asset is not None:
+        if with_variants and not asset.variants:
+            asset.variants = await _build_variants(upload, filename, folder)
+            db.flush()
+        if not take_reference or _adjust_refs(db, asset, 1) is not None:
+            return asset
+        # The last reference was released and the row deleted in between; store it again
+        db.expunge(asset)
+
+    url = await upload_image_to_cloudinary_async(upload.file, filename, folder=folder)
+    variants = await _build_variants(upload, filename, folder) if with_variants else None
+    asset = ImageAsset(
+        content_hash=upload.sha256,
+        url=url,
+        variants=variants,
+        ref_count=0,
+    )
+    try:
+        with db.begin_nested():
+            db.add(asset)
+    except IntegrityError:
+        # Another request stored the same bytes first; the remote upload was idempotent (same public_id)
+        asset = db.query(ImageAsset).filter(ImageAsset.content_hash == upload.sha256).one()
+
+    if take_reference:
+        _adjust_refs(db, asset, 1)
+    return asset
+
+
+def release_image(db: Session, url: Optional[str], variants: Optional[Dict[str, Any]] = None):
+    """
+    Drop one reference to an image URL. Files are deleted only when nothing points at them.
+    URLs that predate the index (legacy uploads, local static files) are deleted directly.
+    Deletion happens on the background queue once the caller's transaction commits.
+    """
+    if not url:
+        return
+
+    asset = db.query(ImageAsset).filter(ImageAsset.url == url).first()
+    if asset is None:
+        queue_after_commit(db, url)
+        for variant_url in iter_variant_urls(variants):
+            queue_after_commit(db, variant_url)
+        return
+
+    # None: already at zero (or gone) - nothing left to release
+    if _adjust_refs(db, asset, -1) == 0:
+        queue_after_commit(db, asset.url)
+        for variant_url in iter_variant_urls(asset.variants):
+            queue_after_commit(db, variant_url)
+        db.delete(asset)
+        db.flush()
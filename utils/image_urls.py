@@ -0,0 +1,51 @@
+"""
+Bandwidth-aware delivery URLs for stored images.
+
+Stored Cloudinary secure_urls point at full originals. Cloudinary can transform on the
+fly, so we build srcset-ready variant URLs by inserting a transformation segment
+(f_auto,q_auto,c_limit,w_N) after /upload/ - pure string work, no network calls.
+Legacy local images (/static/images/...) map onto the /img resizing endpoint instead.
+"""
+import os
+from typing import Dict, Iterable, Optional
+
+# The only widths we ever deliver. /img snaps requests onto these (so ?w= can't flood its
+# cache), and every preset draws from them so srcset URLs are served at the width they name.
+IMAGE_WIDTHS = (160, 320, 480, 640, 960, 1280, 1920)
+
+# Named presets -> widths emitted for srcset
+DELIVERY_PRESETS: Dict[str, tuple] = {
+    "thumb": (160, 320),
+    "card": (320, 480, 640),
+    "detail": (480, 640, 960, 1280),
+    "banner": (640, 960, 1280, 1920),
+}
+
+UPLOAD_MARKER = "/upload/"
+LOCAL_PREFIXES = ("/static/images/", "static/images/")
+
+
+def transformed_url(url: str, width: int) -> Optional[str]:
+    """Variant URL for a single width, or None if the URL isn't one we can transform."""
+    if "cloudinary.com" in url and UPLOAD_MARKER in url:
+        head, tail = url.split(UPLOAD_MARKER, 1)
+        return f"{head}{UPLOAD_MARKER}f_auto,q_auto,c_limit,w_{width}/{tail}"
+    if url.startswith(LOCAL_PREFIXES):
+        return f"/img/{os.path.basename(url)}?w={width}"
+    return None
+
+
+def image_srcset(url: Optional[str], presets: Iterable[str]) -> Dict[str, Dict[str, str]]:
+    """{preset: {width: url}} for every requested preset; empty when there is no transformable image."""
+    if not url:
+        return {}
+    srcset: Dict[str, Dict[str, str]] = {}
+    for preset in presets:
+        variants = {}
+        for width in DELIVERY_PRESETS[preset]:
+            variant = transformed_url(url, width)
+            if variant is None:
+                return {}
+            variants[str(width)] = variant
+        srcset[preset] = variants
+    return srcset
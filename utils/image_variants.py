@@ -0,0 +1,138 @@
+"""
+Upload-time image derivatives.
+
+For every uploaded product image we render a fixed set of responsive widths in WebP
+(plus AVIF when the installed Pillow can encode it) and a tiny blurred placeholder.
+Rendering is CPU-bound, so it runs in a process pool; the encoded variants are then
+uploaded through the normal async Cloudinary path.
+
+Stored shape (Product.image_variants):
+    {
+        "width": 2400, "height": 1600,
+        "placeholder": "data:image/webp;base64,...",
+        "webp": {"320": "https://...", "640": "https://...", ...},
+        "avif": {...}            # only when AVIF is available
+    }
+"""
+import asyncio
+import base64
+import os
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import Any, Dict, Iterator, Optional
+
+from PIL import Image, ImageFilter, ImageOps, features
+
+from utils.cloudinary_config import upload_image_to_cloudinary_async
+
+VARIANT_WIDTHS = (320, 640, 960, 1280)
+PLACEHOLDER_WIDTH = 16
+WEBP_QUALITY = 80
+AVIF_QUALITY = 60
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def avif_supported() -> bool:
+    """Pillow only encodes AVIF with a libavif-enabled build or the pillow-avif-plugin."""
+    try:
+        if features.check("avif"):
+            return True
+    except ValueError:
+        pass
+    return ".avif" in Image.registered_extensions()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    # Created lazily so importing this module never forks (gunicorn/uvicorn workers)
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=max(1, min(4, (os.cpu_count() or 2) - 1)))
+    return _process_pool
+
+
+def shutdown_process_pool():
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+def _encode(img: Image.Image, fmt: str, quality: int) -> bytes:
+    buffer = BytesIO()
+    img.save(buffer, format=fmt, quality=quality)
+    return buffer.getvalue()
+
+
+def render_variants(data: bytes, with_avif: bool) -> Dict[str, Any]:
+    """Decode once and encode every derivative. Runs inside the process pool."""
+    with Image.open(BytesIO(data)) as source:
+        img = ImageOps.exif_transpose(source)
+        img = img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB")
+
+    width, height = img.size
+    formats = [("webp", "WEBP", WEBP_QUALITY)]
+    if with_avif:
+        formats.append(("avif", "AVIF", AVIF_QUALITY))
+
+    files = []
+    # Never upscale: widths wider than the source collapse into one variant at the native width
+    widths = sorted({min(w, width) for w in VARIANT_WIDTHS})
+    for target in widths:
+        resized = img if target == width else img.resize(
+            (target, max(1, round(height * target / width))), Image.LANCZOS
+        )
+        for key, fmt, quality in formats:
+            files.append((key, target, _encode(resized, fmt, quality)))
+
+    tiny = img.resize((PLACEHOLDER_WIDTH, max(1, round(height * PLACEHOLDER_WIDTH / width))), Image.BILINEAR)
+    tiny = tiny.filter(ImageFilter.GaussianBlur(1))
+    placeholder = "data:image/webp;base64," + base64.b64encode(_encode(tiny, "WEBP", 40)).decode()
+
+    return {"width": width, "height": height, "placeholder": placeholder, "files": files}
+
+
+def render_resized(path: str, width: int, fmt: str) -> bytes:
+    """Resize a local image to `width` (never upscaled) and encode as `fmt`. Runs inside the process pool."""
+    with Image.open(path) as source:
+        img = ImageOps.exif_transpose(source)
+        has_alpha = img.mode in ("RGBA", "LA", "P") and fmt != "JPEG"
+        img = img.convert("RGBA" if has_alpha else "RGB")
+    if width < img.width:
+        img = img.resize((width, max(1, round(img.height * width / img.width))), Image.LANCZOS)
+    quality = {"WEBP": WEBP_QUALITY, "AVIF": AVIF_QUALITY}.get(fmt, 85)
+    buffer = BytesIO()
+    img.save(buffer, format=fmt, quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+async def build_image_variants(data: bytes, filename: str, folder: str) -> Dict[str, Any]:
+    """Render derivatives off the event loop and upload them next to the original."""
+    loop = asyncio.get_running_loop()
+    rendered = await loop.run_in_executor(get_process_pool(), render_variants, data, avif_supported())
+
+    base_name = os.path.splitext(filename)[0]
+    # public_id is the filename minus its extension, so the format must be part of the stem
+    # or the WebP and AVIF renditions of one width would overwrite each other
+    uploads = [
+        upload_image_to_cloudinary_async(content, f"{base_name}_w{width}_{key}", folder=f"{folder}/variants")
+        for key, width, content in rendered["files"]
+    ]
+    urls = await asyncio.gather(*uploads)
+
+    variants: Dict[str, Any] = {
+        "width": rendered["width"],
+        "height": rendered["height"],
+        "placeholder": rendered["placeholder"],
+    }
+    for (key, width, _), url in zip(rendered["files"], urls):
+        variants.setdefault(key, {})[str(width)] = url
+    return variants
+
+
+def iter_variant_urls(variants: Optional[Dict[str, Any]]) -> Iterator[str]:
+    """Yield every stored variant URL (used when the original is replaced or deleted)."""
+    if not variants:
+        return
+    for key in ("webp", "avif"):
+        yield from (variants.get(key) or {}).values()
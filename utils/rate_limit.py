@@ -0,0 +1,185 @@
+"""
+In-process rate limiting and load shedding (pure ASGI middleware).
+
+- RateLimitMiddleware: token bucket per (client IP, route group). Returns 429 + Retry-After.
+- ConcurrencyLimitMiddleware: caps in-flight requests. Requests that would wait in the
+  queue longer than the configured threshold get 503 + Retry-After instead of piling up
+  on the DB pool and threadpool.
+
+Counters are kept in LIMITER_STATS and exposed through get_limiter_stats().
+"""
+import asyncio
+import json
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+from config import settings
+
+# Paths that never count against limits
+EXEMPT_PREFIXES = ("/health", "/static", "/docs", "/redoc", "/openapi.json")
+
+# Hard cap on tracked buckets; the least recently used ones are evicted past it
+MAX_TRACKED_BUCKETS = 50_000
+
+LIMITER_STATS: Dict[str, object] = {
+    "allowed": 0,
+    "rate_limited": {},    # group -> count
+    "shed": 0,
+    "in_flight": 0,
+    "peak_in_flight": 0,
+    "max_queue_wait_ms": 0.0,
+}
+
+
+def parse_rate(value: str) -> Tuple[int, float]:
+    """Parse "<requests>/<seconds>" into (capacity, refill tokens per second)."""
+    requests, _, seconds = value.partition("/")
+    capacity = int(requests)
+    period = float(seconds or 60)
+    return capacity, capacity / period
+
+
+def route_group(path: str, query_string: bytes) -> str:
+    """Map a request onto the route group whose limit applies to it."""
+    if path.startswith("/auth/login"):
+        return "auth"
+    if path.startswith("/delivery/stops/"):
+        return "delivery_stops"
+    if path.startswith("/img/"):
+        return "images"
+    if path.startswith("/search/suggest"):
+        return "suggest"
+    if path.startswith(("/products", "/search")) and (b"search=" in query_string or path.startswith("/search")):
+        return "search"
+    return "default"
+
+
+def client_ip(scope) -> str:
+    """
+    Resolve the client IP. X-Forwarded-For is only honoured when RATE_LIMIT_TRUST_PROXY is on,
+    and then we take the rightmost hop our own proxies didn't add: entries to its left are
+    client-supplied and can be spoofed freely.
+    """
+    if settings.RATE_LIMIT_TRUST_PROXY:
+        for name, value in scope.get("headers", []):
+            if name == b"x-forwarded-for":
+                hops = [hop.strip() for hop in value.decode("latin-1").split(",") if hop.strip()]
+                if hops:
+                    return hops[max(len(hops) - settings.RATE_LIMIT_PROXY_HOPS, 0)]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def get_limiter_stats() -> Dict[str, object]:
+    stats = dict(LIMITER_STATS)
+    stats["rate_limited"] = dict(LIMITER_STATS["rate_limited"])
+    return stats
+
+
+async def send_error(send, status_code: int, detail: str, retry_after: int):
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(retry_after).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class TokenBucket:
+    __slots__ = ("capacity", "rate", "tokens", "updated")
+
+    def __init__(self, capacity: int, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def take(self, now: float) -> float:
+        """Consume one token. Returns 0 if allowed, otherwise seconds until a token is available."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimitMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self.limits = {
+            "default": parse_rate(settings.RATE_LIMIT_DEFAULT),
+            "search": parse_rate(settings.RATE_LIMIT_SEARCH),
+            "delivery_stops": parse_rate(settings.RATE_LIMIT_DELIVERY_STOPS),
+            "auth": parse_rate(settings.RATE_LIMIT_AUTH),
+            "images": parse_rate(settings.RATE_LIMIT_IMAGES),
+            "suggest": parse_rate(settings.RATE_LIMIT_SUGGEST),
+        }
+        # LRU order: most recently used last
+        self.buckets: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED or scope["path"].startswith(EXEMPT_PREFIXES):
+            return await self.app(scope, receive, send)
+
+        now = time.monotonic()
+        group = route_group(scope["path"], scope.get("query_string", b""))
+        key = (client_ip(scope), group)
+
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            while len(self.buckets) >= MAX_TRACKED_BUCKETS:
+                self.buckets.popitem(last=False)
+            bucket = self.buckets[key] = TokenBucket(*self.limits[group])
+        else:
+            self.buckets.move_to_end(key)
+
+        wait = bucket.take(now)
+        if wait:
+            limited = LIMITER_STATS["rate_limited"]
+            limited[group] = limited.get(group, 0) + 1
+            return await send_error(send, 429, "Too many requests", max(1, math.ceil(wait)))
+
+        LIMITER_STATS["allowed"] += 1
+        await self.app(scope, receive, send)
+
+
+class ConcurrencyLimitMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self.max_wait = settings.MAX_QUEUE_WAIT_MS / 1000
+        self.semaphore = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(EXEMPT_PREFIXES):
+            return await self.app(scope, receive, send)
+
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(settings.MAX_CONCURRENT_REQUESTS)
+
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            LIMITER_STATS["shed"] += 1
+            return await send_error(send, 503, "Server busy, please retry", max(1, math.ceil(self.max_wait * 2)))
+
+        waited_ms = (time.monotonic() - started) * 1000
+        if waited_ms > LIMITER_STATS["max_queue_wait_ms"]:
+            LIMITER_STATS["max_queue_wait_ms"] = round(waited_ms, 2)
+
+        LIMITER_STATS["in_flight"] += 1
+        if LIMITER_STATS["in_flight"] > LIMITER_STATS["peak_in_flight"]:
+            LIMITER_STATS["peak_in_flight"] = LIMITER_STATS["in_flight"]
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            LIMITER_STATS["in_flight"] -= 1
+            self.semaphore.release()
@@ -0,0 +1,123 @@
+"""
+Per-resource version counters.
+
+Every committed write to a tracked table bumps that resource's counter. Caches key
+their entries on the versions they were built from, so invalidation is just "versions
+changed" - no cache needs to know which router did the write.
+
+Writes are detected with session events, so admin routers, checkout and scripts all count:
+- after_flush collects the tables of new/dirty/deleted ORM objects
+- do_orm_execute catches bulk UPDATE/DELETE statements (query.update(), update())
+- after_commit bumps the collected resources; rollbacks discard them
+
+Row-level subscribers also get the primary keys that changed per table (None when a bulk
+statement touched an unknown set of rows), so in-memory indexes can update precisely.
+
+Counters are per process; BOOT_ID is mixed into validators so restarts never reuse ETags.
+"""
+import threading
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+
+# table name -> resource name
+TRACKED_TABLES = {
+    "products": "products",
+    "categories": "categories",
+    "hero_banners": "banners",
+    "delivery_routes": "delivery",
+    "delivery_stops": "delivery",
+}
+
+BOOT_ID = uuid.uuid4().hex[:8]
+PENDING_KEY = "pending_resource_changes"
+PENDING_ROWS_KEY = "pending_row_changes"
+
+# table name -> changed primary keys, or None for "unknown rows" (bulk statements)
+RowChanges = Dict[str, Optional[Set[int]]]
+
+_versions: Dict[str, int] = {name: 0 for name in set(TRACKED_TABLES.values())}
+_lock = threading.Lock()
+_subscribers: List[Callable[[Set[str]], None]] = []
+_row_subscribers: List[Callable[[RowChanges], None]] = []
+
+
+def get_version(resource: str) -> int:
+    return _versions[resource]
+
+
+def get_versions(resources: Iterable[str]) -> Tuple[int, ...]:
+    return tuple(_versions[name] for name in resources)
+
+
+def bump(*resources: str):
+    changed = set(resources)
+    with _lock:
+        for name in changed:
+            _versions[name] += 1
+    for callback in list(_subscribers):
+        try:
+            callback(changed)
+        except Exception as e:
+            print(f"⚠️ Resource change subscriber failed: {str(e)}")
+
+
+def subscribe(callback: Callable[[Set[str]], None]):
+    """Call `callback(changed_resources)` after every committed change."""
+    _subscribers.append(callback)
+
+
+def subscribe_rows(callback: Callable[[RowChanges], None]):
+    """Call `callback({table: ids or None})` after every committed change to tracked tables."""
+    _row_subscribers.append(callback)
+
+
+def _record(session: Session, table: Optional[str], row_id: Optional[int] = None, bulk: bool = False):
+    if table not in TRACKED_TABLES:
+        return
+    session.info.setdefault(PENDING_KEY, set()).add(TRACKED_TABLES[table])
+    rows: RowChanges = session.info.setdefault(PENDING_ROWS_KEY, {})
+    if bulk:
+        rows[table] = None
+    elif rows.get(table, set()) is not None:
+        rows.setdefault(table, set()).add(row_id)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_flushed(session: Session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        _record(session, getattr(obj, "__tablename__", None), getattr(obj, "id", None))
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _collect_bulk(orm_execute_state):
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and orm_execute_state.bind_mapper is not None:
+        table = orm_execute_state.bind_mapper.local_table.name
+        _record(orm_execute_state.session, table, bulk=True)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _bump_committed(session: Session):
+    if session.in_nested_transaction():
+        return
+    changed = session.info.pop(PENDING_KEY, None)
+    rows = session.info.pop(PENDING_ROWS_KEY, None)
+    if changed:
+        bump(*changed)
+    if rows:
+        for callback in list(_row_subscribers):
+            try:
+                callback(rows)
+            except Exception as e:
+                print(f"⚠️ Row change subscriber failed: {str(e)}")
+
+
+@event.listens_for(SessionLocal, "after_soft_rollback")
+def _discard_uncommitted(session: Session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(PENDING_KEY, None)
+        session.info.pop(PENDING_ROWS_KEY, None)
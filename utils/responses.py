@@ -0,0 +1,38 @@
+"""
+Fast JSON responses for large list endpoints.
+
+Returning a dict of Pydantic models with response_model=Dict[str, Any] makes FastAPI
+validate it again and run jsonable_encoder over every nested object. Building a typed
+envelope once and dumping it with pydantic-core (model_dump_json, Rust) skips that second
+conversion entirely. Returning a Response means FastAPI does not re-serialize it; the
+envelope is still declared as response_model so the OpenAPI docs stay accurate.
+"""
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Type
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+
+def model_json_response(model: BaseModel, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    return Response(
+        content=model.model_dump_json(),
+        status_code=status_code,
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(item_type: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[item_type])
+
+
+def list_json_response(item_type: Type[BaseModel], items: List[Any], headers: Optional[Dict[str, str]] = None) -> Response:
+    """Validate plain dicts/rows as List[item_type] and dump them in one pass."""
+    adapter = _list_adapter(item_type)
+    return Response(
+        content=adapter.dump_json(adapter.validate_python(items, from_attributes=True)),
+        media_type="application/json",
+        headers=headers,
+    )
@@ -1,24 +1,102 @@
-from sqlalchemy.orm import Session
-from models import Category
+"""
+Unique slug allocation for any model with a unique `slug` column (Category, Product).
+
+One query fetches every existing slug sharing the base ("books", "books-1", "books-7", ...)
+as plain strings - no ORM objects or relationship loading - and the next free suffix is
+picked in Python. Two writers can still pick the same slug concurrently; the unique
+constraint catches that and save_with_unique_slug() retries with a fresh allocation.
+"""
+from typing import Dict, Iterable, List, Optional, Set
+
 from slugify import slugify
+from sqlalchemy import inspect, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+SLUG_RETRY_ATTEMPTS = 3
+BULK_BASES_PER_QUERY = 200
+
+
+def base_slug(name: str) -> str:
+    return slugify(name) or "item"
+
+
+def _slug_filter(model, base: str):
+    # slugify output is [a-z0-9-] only, so the base can't contain LIKE wildcards
+    return or_(model.slug == base, model.slug.like(f"{base}-%"))
 
-def generate_unique_slug(name: str, db: Session, exclude_id: int | None = None) -> str:
-    """Generate a unique slug for a category name.
-    Optionally exclude a specific category ID (useful during updates).
+
+def _next_free(base: str, taken: Set[str]) -> str:
+    if base not in taken:
+        return base
+    used = {
+        int(slug[len(base) + 1:])
+        for slug in taken
+        if slug.startswith(base + "-") and slug[len(base) + 1:].isdigit()
+    }
+    suffix = 1
+    while suffix in used:
+        suffix += 1
+    return f"{base}-{suffix}"
+
+
+def allocate_slug(db: Session, model, name: str, exclude_id: Optional[int] = None) -> str:
+    """Next free slug for `name` in `model`'s table (one query).
+    exclude_id lets a row being renamed keep or reuse its own slug."""
+    base = base_slug(name)
+    query = db.query(model.slug).filter(_slug_filter(model, base))
+    if exclude_id is not None:
+        query = query.filter(model.id != exclude_id)
+    return _next_free(base, {slug for (slug,) in query.all()})
+
+
+def allocate_slugs(db: Session, model, names: Iterable[str]) -> List[str]:
     """
-    base_slug = slugify(name)
-    slug = base_slug
-    count = 1
+    Bulk mode for imports: unique slugs for many names, in order, with one query per
+    BULK_BASES_PER_QUERY distinct bases. Duplicates within the batch get distinct suffixes.
+    """
+    names = list(names)
+    bases = [base_slug(name) for name in names]
+    distinct = list(dict.fromkeys(bases))
+
+    taken: Dict[str, Set[str]] = {base: set() for base in distinct}
+    for i in range(0, len(distinct), BULK_BASES_PER_QUERY):
+        chunk = distinct[i:i + BULK_BASES_PER_QUERY]
+        rows = db.query(model.slug).filter(or_(*[_slug_filter(model, base) for base in chunk])).all()
+        for (slug,) in rows:
+            for base in chunk:
+                if slug == base or slug.startswith(base + "-"):
+                    taken[base].add(slug)
 
-    while True:
-        query = db.query(Category).filter(Category.slug == slug)
-        if exclude_id:
-            query = query.filter(Category.id != exclude_id)
+    slugs = []
+    for base in bases:
+        slug = _next_free(base, taken[base])
+        taken[base].add(slug)
+        slugs.append(slug)
+    return slugs
 
-        if not query.first():
-            break
 
-        slug = f"{base_slug}-{count}"
-        count += 1
+def save_with_unique_slug(db: Session, obj, name: str, attempts: int = SLUG_RETRY_ATTEMPTS):
+    """
+    Assign a fresh slug to `obj` and flush it inside a savepoint. If a concurrent writer
+    took the same slug first, the unique constraint fails the savepoint and we reallocate.
 
-    return slug
+    Edits the caller already made to a persistent `obj` (e.g. a rename in update_category)
+    are flushed into the outer transaction first, so rolling back a failed savepoint can
+    only ever undo the slug write, never those edits.
+    """
+    model = type(obj)
+    if inspect(obj).persistent:
+        db.flush()
+    for attempt in range(attempts):
+        slug = allocate_slug(db, model, name, exclude_id=obj.id)
+        try:
+            # Assigned inside the savepoint so a collision only rolls back this flush
+            with db.begin_nested():
+                obj.slug = slug
+                db.add(obj)
+                db.flush()
+            return obj
+        except IntegrityError:
+            if attempt == attempts - 1:
+                raise
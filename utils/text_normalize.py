@@ -0,0 +1,49 @@
+"""Text normalization and fuzzy-matching helpers shared by the search indexes."""
+import re
+import unicodedata
+from typing import List
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    """'Kiswahili Mufti — Gredi 4' -> 'kiswahili mufti gredi 4'"""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _NON_ALNUM.sub(" ", stripped.casefold()).strip()
+
+
+def tokenize(text: str) -> List[str]:
+    return normalize(text).split()
+
+
+def ngrams(word: str, n: int = 3) -> List[str]:
+    """Padded character n-grams: 'math' -> ['$ma', 'mat', 'ath', 'th$']"""
+    padded = f"${word}$"
+    if len(padded) <= n:
+        return [padded]
+    return [padded[i:i + n] for i in range(len(padded) - n + 1)]
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Damerau-Levenshtein (optimal string alignment) distance, cut off early:
+    returns max_distance + 1 as soon as the distance is known to exceed max_distance.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous2, previous = previous, current
+    return min(previous[-1], max_distance + 1)
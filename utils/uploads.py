@@ -0,0 +1,178 @@
+"""
+Streaming validation for image uploads.
+
+Starlette already spools multipart files into a SpooledTemporaryFile (memory up to 1 MB,
+then disk). Instead of `await image.read()` pulling the whole file into memory, we walk
+the spooled file in chunks to enforce the size cap and sniff the real type from the magic
+bytes, then rewind it and hand the file object straight to the upload pipeline.
+
+Starlette spools the whole body before the endpoint runs, so UploadSizeLimitMiddleware
+caps multipart request bodies up front: a declared Content-Length over the limit gets 413
+without reading anything, and chunked bodies are counted as they stream in.
+"""
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import BinaryIO, Optional
+
+from fastapi import HTTPException, UploadFile
+
+from config import settings
+
+CHUNK_SIZE = 64 * 1024
+
+# BITMAPINFOHEADER sizes: OS/2 v1, OS/2 v2 (short and full), Windows v3, v4, v5
+BMP_DIB_HEADER_SIZES = {12, 16, 40, 52, 56, 64, 108, 124}
+
+# ISO-BMFF brands (bytes 8-12 after "ftyp") that identify AVIF / HEIC images
+AVIF_BRANDS = {b"avif", b"avis"}
+HEIC_BRANDS = {b"heic", b"heix", b"hevc", b"mif1", b"msf1"}
+
+
+@dataclass
+class ImageUpload:
+    file: BinaryIO
+    filename: str
+    content_type: str
+    size: int
+    sha256: str
+
+    def read(self) -> bytes:
+        """Read the whole body (only for consumers that really need bytes, e.g. Pillow)."""
+        self.file.seek(0)
+        data = self.file.read()
+        self.file.seek(0)
+        return data
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """Return the MIME type implied by the file's magic bytes, or None if it is not a supported image."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return "image/gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head[4:8] == b"ftyp":
+        brand = head[8:12]
+        if brand in AVIF_BRANDS:
+            return "image/avif"
+        if brand in HEIC_BRANDS:
+            return "image/heic"
+    # "BM" alone matches plenty of text files; also require a known DIB header size
+    if head.startswith(b"BM") and len(head) >= 18 and int.from_bytes(head[14:18], "little") in BMP_DIB_HEADER_SIZES:
+        return "image/bmp"
+    return None
+
+
+async def read_image_upload(upload: UploadFile, max_bytes: Optional[int] = None) -> ImageUpload:
+    """
+    Validate an uploaded image chunk by chunk.
+
+    Raises 413 once the body passes max_bytes and 400 if the first chunk is not a known
+    image format (the client-supplied content_type is not trusted).
+    """
+    max_bytes = max_bytes or settings.MAX_UPLOAD_BYTES
+
+    # Cheap early rejection when the parser already knows the size
+    if getattr(upload, "size", None) and upload.size > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Image exceeds {max_bytes // (1024 * 1024)} MB limit")
+
+    await upload.seek(0)
+    digest = hashlib.sha256()
+    size = 0
+    content_type = None
+
+    while True:
+        chunk = await upload.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        if content_type is None:
+            content_type = sniff_image_type(chunk[:32])
+            if content_type is None:
+                raise HTTPException(status_code=400, detail="File must be an image")
+        size += len(chunk)
+        if size > max_bytes:
+            raise HTTPException(status_code=413, detail=f"Image exceeds {max_bytes // (1024 * 1024)} MB limit")
+        digest.update(chunk)
+
+    if not size:
+        raise HTTPException(status_code=400, detail="Uploaded file is empty")
+
+    await upload.seek(0)
+    return ImageUpload(
+        file=upload.file,
+        filename=upload.filename or "image",
+        content_type=content_type,
+        size=size,
+        sha256=digest.hexdigest(),
+    )
+
+
+class RequestTooLarge(Exception):
+    pass
+
+
+class UploadSizeLimitMiddleware:
+    """Reject multipart bodies over MAX_MULTIPART_BYTES before they are parsed (pure ASGI)."""
+
+    def __init__(self, app, max_bytes: Optional[int] = None):
+        self.app = app
+        self.max_bytes = max_bytes or settings.MAX_MULTIPART_BYTES
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = dict(scope["headers"])
+        if not headers.get(b"content-type", b"").startswith(b"multipart/form-data"):
+            return await self.app(scope, receive, send)
+
+        declared = headers.get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > self.max_bytes:
+            return await self._reject(send)
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    exceeded = True
+                    raise RequestTooLarge()
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            # FastAPI turns body-parsing errors into a 400; swap that for our 413
+            if exceeded and not response_started:
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except RequestTooLarge:
+            if response_started:
+                raise
+        if exceeded and not response_started:
+            await self._reject(send)
+
+    async def _reject(self, send):
+        body = json.dumps({"detail": f"Request body exceeds {self.max_bytes // (1024 * 1024)} MB limit"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})